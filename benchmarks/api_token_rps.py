@@ -0,0 +1,47 @@
+# * API Token Benchmark: Requests per second on `/api/v1/task/` with `Token` and `Signed` authentication
+# * Usage: `python -m benchmarks.api_token_rps --tasks 100 --seconds 10 --concurrency 8 --workers 4`
+import argparse
+import json
+
+from benchmarks.utils import Server, hammer, seed_user, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.authtoken.models import Token
+
+    from task_manager.tasks.authentication import SignedTokenAuthentication
+
+    user = seed_user("benchmark", args.tasks)
+    token, _ = Token.objects.get_or_create(user=user)
+    schemes = {
+        "Token": token.key,
+        "Signed": SignedTokenAuthentication.issue_token(user),
+    }
+
+    with Server(workers=args.workers) as server:
+        results = [
+            {
+                "scheme": scheme,
+                **hammer(
+                    server.port,
+                    "/api/v1/task/",
+                    {"Authorization": f"{scheme} {key}"},
+                    args.seconds,
+                    args.concurrency,
+                ),
+            }
+            for scheme, key in schemes.items()
+        ]
+    print(json.dumps({"tasks": args.tasks, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
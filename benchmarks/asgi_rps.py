@@ -0,0 +1,57 @@
+# * ASGI Benchmark: The task API under sync gunicorn workers versus uvicorn workers (`config/asgi.py`)
+# * at a high number of concurrent connections, same worker count for both
+# * Usage: `python -m benchmarks.asgi_rps --tasks 1000 --seconds 10 --concurrency 1000 --workers 4`
+import argparse
+import json
+
+from benchmarks.utils import Server, hammer, seed_user, setup_django
+
+MODES = {
+    "wsgi": ("config.wsgi:application", ()),
+    "asgi": ("config.asgi:application", ("-k", "uvicorn.workers.UvicornWorker")),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.authtoken.models import Token
+
+    user = seed_user("benchmark", args.tasks)
+    token, _ = Token.objects.get_or_create(user=user)
+    task = user.task_set.order_by("pk").first()
+    headers = {"Authorization": f"Token {token.key}"}
+    paths = [
+        "/api/v1/task/",
+        f"/api/v1/task/{task.pk}/",
+        f"/api/v1/task/{task.pk}/history/",
+    ]
+
+    results = {}
+    for mode, (app, extra_args) in MODES.items():
+        with Server(app=app, workers=args.workers, extra_args=extra_args) as server:
+            results[mode] = [
+                hammer(server.port, path, headers, args.seconds, args.concurrency)
+                for path in paths
+            ]
+    print(
+        json.dumps(
+            {
+                "tasks": args.tasks,
+                "concurrency": args.concurrency,
+                "workers": args.workers,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# * Cascade Contention Benchmark: Threads creating pending tasks for the same user through `priority_cascade_logic`
+# * Compares `TASKS_PRIORITY_CASCADE_MODE` "locking" and "optimistic",
+# * meaningful on Postgres (SQLite serialises writers)
+# * `--users`: Spreads the threads over that many users, a user's writes queue up on its `TaskChangeSequence` row
+# * Usage: `DATABASE_URL=postgres:///task_manager python -m benchmarks.cascade_contention --threads 8 --seconds 10`
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks.utils import percentile, seed_user, setup_django
+
+
+def run(mode, users, args):
+    from django.db import connection, transaction
+    from django.test import override_settings
+
+    from task_manager.tasks import views
+    from task_manager.tasks.models import Task
+
+    fallbacks = []
+    locking_priority_cascade = views.locking_priority_cascade
+
+    def counting_locking_cascade(*cascade_args):
+        fallbacks.append(1)
+        return locking_priority_cascade(*cascade_args)
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(seed):
+        generator = random.Random(seed)
+        user = users[seed % len(users)]
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            form = views.TaskCreateForm(
+                data={
+                    "title": "Contended task",
+                    "description": "Created by benchmarks",
+                    "priority": generator.randrange(args.spread),
+                    "completed": False,
+                    "status": "PENDING",
+                }
+            )
+            form.is_valid()
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    views.priority_cascade_logic(form, user)
+                    form.instance.user = user
+                    form.save()
+                local.append(time.perf_counter() - started)
+            except Exception:
+                failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    Task.objects.filter(user__in=users, title="Contended task").delete()
+    views.locking_priority_cascade = counting_locking_cascade
+    try:
+        with override_settings(TASKS_PRIORITY_CASCADE_MODE=mode):
+            threads = [
+                threading.Thread(target=worker, args=(seed,))
+                for seed in range(args.threads)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+    finally:
+        views.locking_priority_cascade = locking_priority_cascade
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "creates": len(latencies),
+        "errors": sum(errors),
+        "locking_cascades": len(fallbacks),
+        "creates_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument(
+        "--spread", type=int, default=50, help="Priorities drawn from [0, spread)"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    users = [
+        seed_user("benchmark" if index == 0 else f"benchmark-{index}", args.tasks)
+        for index in range(args.users)
+    ]
+    results = [run(mode, users, args) for mode in ("locking", "optimistic")]
+    print(
+        json.dumps(
+            {
+                "tasks": args.tasks,
+                "threads": args.threads,
+                "users": args.users,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
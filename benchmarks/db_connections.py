@@ -0,0 +1,88 @@
+# * Database Connections Benchmark: Connect overhead and the highest concurrency each `CONN_MAX_AGE` sustains
+# * Point `DATABASE_URL` at Postgres directly and at PgBouncer to compare pooling setups, on SQLite the
+# * connect cost is close to zero and only the second half is meaningful
+# * Usage: `python -m benchmarks.db_connections --tasks 1000 --seconds 5 --workers 4 --p99-budget 250`
+import argparse
+import json
+import time
+
+from benchmarks.utils import Server, hammer, seed_user, session_cookie_for, setup_django
+
+CONCURRENCY = [1, 2, 4, 8, 16, 32, 64]
+CONN_MAX_AGES = {"per_request": "0", "persistent": "60"}
+
+
+def connect_overhead(iterations):
+    """Microseconds per `SELECT 1` on a fresh connection versus on a reused one"""
+    from django.db import connections
+
+    connection = connections["default"]
+
+    def select_one():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        select_one()
+        connection.close()
+    fresh = time.perf_counter() - start
+
+    select_one()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        select_one()
+    reused = time.perf_counter() - start
+    return {
+        "fresh_us": round(fresh / iterations * 1e6, 1),
+        "reused_us": round(reused / iterations * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seconds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--path", default="/tasks/")
+    parser.add_argument("--p99-budget", type=float, default=250.0)
+    args = parser.parse_args()
+
+    setup_django()
+    user = seed_user("benchmark", args.tasks)
+    headers = {"Cookie": session_cookie_for(user)}
+
+    results = {"connect": connect_overhead(args.iterations)}
+    for mode, conn_max_age in CONN_MAX_AGES.items():
+        levels = []
+        with Server(workers=args.workers, env={"CONN_MAX_AGE": conn_max_age}) as server:
+            for concurrency in CONCURRENCY:
+                load = hammer(
+                    server.port, args.path, headers, args.seconds, concurrency
+                )
+                levels.append({"concurrency": concurrency, **load})
+        sustained = [
+            level["concurrency"]
+            for level in levels
+            if not level["errors"] and level["p99_ms"] <= args.p99_budget
+        ]
+        results[mode] = {
+            "max_sustainable_concurrency": max(sustained, default=0),
+            "levels": [
+                {
+                    key: level[key]
+                    for key in ("concurrency", "rps", "p50_ms", "p99_ms", "errors")
+                }
+                for level in levels
+            ],
+        }
+    print(
+        json.dumps(
+            {"tasks": args.tasks, "path": args.path, "results": results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# * Export RSS Benchmark: Streams `/api/v1/task/export/` for a user with `--rows` tasks and checks peak RSS growth
+# * Usage: `python -m benchmarks.export_rss --rows 1000000 --budget 64`, exits non-zero over budget
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import seed_user, setup_django
+
+
+def max_rss_mb():
+    # * `ru_maxrss` is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# * Measure: Runs in a fresh interpreter so seeding does not inflate the high-water mark
+def measure(username, query):
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    from task_manager.tasks.models import User
+
+    token, _ = Token.objects.get_or_create(user=User.objects.get(username=username))
+    client = Client(HTTP_HOST="localhost", HTTP_AUTHORIZATION=f"Token {token.key}")
+    client.get("/api/v1/task/?title=warm-up")
+    baseline = max_rss_mb()
+    started = time.perf_counter()
+    response = client.get(f"/api/v1/task/export/{query}")
+    size = sum(len(chunk) for chunk in response.streaming_content)
+    return {
+        "query": query,
+        "bytes": size,
+        "seconds": round(time.perf_counter() - started, 2),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(max_rss_mb(), 1),
+        "growth_mb": round(max_rss_mb() - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--budget", type=float, default=64, help="Max RSS growth in MB")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--query", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    setup_django()
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.query)))
+        return
+
+    seed_user("benchmark", args.rows)
+    results = []
+    for query in ("?filetype=csv", "?filetype=jsonl&compress=gzip"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.export_rss", "--measure", "benchmark"]
+            + ["--query", query],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    print(
+        json.dumps(
+            {"rows": args.rows, "budget_mb": args.budget, "results": results}, indent=2
+        )
+    )
+    if any(result["growth_mb"] > args.budget for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# * Import Benchmark: Times `run_import` (what the `import_tasks` Celery task runs) on a generated CSV file
+# * Usage: `python -m benchmarks.import_rows --rows 100000 --existing 1000`
+import argparse
+import io
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.utils import seed_user, setup_django
+
+
+def generate_csv(rows, seed=7):
+    generator = random.Random(seed)
+    buffer = io.StringIO()
+    buffer.write("title,description,completed,priority,status\n")
+    for i in range(rows):
+        completed = generator.random() < 0.3
+        buffer.write(
+            f"Imported task {i},Generated by benchmarks,{completed},"
+            f"{generator.randrange(rows)},{'COMPLETED' if completed else 'PENDING'}\n"
+        )
+    return buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--existing", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.files.base import ContentFile
+    from django.test import override_settings
+
+    from task_manager.tasks.imports import run_import
+    from task_manager.tasks.models import Task, TaskImport
+
+    user = seed_user("benchmark", args.existing)
+    content = generate_csv(args.rows)
+    with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+        task_import = TaskImport.objects.create(
+            user=user, file=ContentFile(content, name="tasks.csv"), file_format="csv"
+        )
+        started = time.perf_counter()
+        run_import(task_import)
+        seconds = time.perf_counter() - started
+
+    print(
+        json.dumps(
+            {
+                "rows": args.rows,
+                "existing": args.existing,
+                "bytes": len(content),
+                "status": task_import.status,
+                "rows_imported": task_import.rows_imported,
+                "rows_failed": task_import.rows_failed,
+                "tasks": Task.objects.filter(user=user).count(),
+                "seconds": round(seconds, 2),
+                "rows_per_second": round(args.rows / seconds),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
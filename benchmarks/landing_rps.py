@@ -0,0 +1,32 @@
+# * Landing Pages Benchmark: Requests per second on `/tasks/`, `/all-tasks/` and `/completed-tasks/` under gunicorn
+# * Usage: `python -m benchmarks.landing_rps --tasks 10000 --seconds 10 --concurrency 8 --workers 4`
+import argparse
+import json
+
+from benchmarks.utils import Server, hammer, seed_user, session_cookie_for, setup_django
+
+PATHS = ["/tasks/", "/all-tasks/", "/completed-tasks/", "/tasks/?page=20"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    user = seed_user("benchmark", args.tasks)
+    headers = {"Cookie": session_cookie_for(user)}
+
+    with Server(workers=args.workers) as server:
+        results = [
+            hammer(server.port, path, headers, args.seconds, args.concurrency)
+            for path in PATHS
+        ]
+    print(json.dumps({"tasks": args.tasks, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# * Landing Templates Benchmark: Rendering time of one `/all-tasks/` page (template only, the queries run beforehand)
+# * "uncached": templates parsed on every render and no fragment caching, as with `DEBUG=True` before
+# * "cached_loader": compiled templates reused, `django.template.loaders.cached.Loader`
+# * "cached_loader_fragments": plus warm `{% cache %}` fragments (header, task cards, pagination)
+# * Usage: `python -m benchmarks.landing_templates --tasks 100 --repeat 200`
+import argparse
+import copy
+import json
+import time
+
+from benchmarks.utils import seed_user, setup_django
+
+LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test import RequestFactory, override_settings
+
+    from task_manager.tasks.views import GenericAllTaskView
+
+    user = seed_user("benchmark", args.tasks)
+    view = GenericAllTaskView.as_view(paginate_by=args.tasks)
+    request = RequestFactory().get("/all-tasks/")
+    request.user = user
+
+    def templates(loaders):
+        templates = copy.deepcopy(settings.TEMPLATES)
+        templates[-1]["APP_DIRS"] = False
+        templates[-1]["OPTIONS"]["loaders"] = loaders
+        return templates
+
+    def caches(backend):
+        return {
+            **settings.CACHES,
+            "template_fragments": {"BACKEND": f"django.core.cache.backends.{backend}"},
+        }
+
+    modes = {
+        "uncached": (templates(LOADERS), caches("dummy.DummyCache")),
+        "cached_loader": (
+            templates([("django.template.loaders.cached.Loader", LOADERS)]),
+            caches("dummy.DummyCache"),
+        ),
+        "cached_loader_fragments": (
+            templates([("django.template.loaders.cached.Loader", LOADERS)]),
+            caches("locmem.LocMemCache"),
+        ),
+    }
+    results = {}
+    for mode, (template_settings, cache_settings) in modes.items():
+        with override_settings(TEMPLATES=template_settings, CACHES=cache_settings):
+            # * Warm up: compiles the templates / fills the fragments of the measured modes
+            view(request).render()
+            timings = []
+            for _ in range(args.repeat):
+                response = view(request)
+                start = time.perf_counter()
+                response.render()
+                timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[mode] = {
+            "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+            "best_ms": round(timings[0] * 1000, 3),
+            "bytes": len(response.content),
+        }
+    results["speedup"] = round(
+        results["uncached"]["median_ms"]
+        / results["cached_loader_fragments"]["median_ms"],
+        1,
+    )
+    print(json.dumps({"tasks": args.tasks, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
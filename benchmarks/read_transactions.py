@@ -0,0 +1,68 @@
+# * Read Transactions Benchmark: Round trips and latency of read endpoints with and without `TASKS_NON_ATOMIC_READS`
+# * Round trips count statements plus BEGIN and COMMIT per transaction (as sent by psycopg2)
+# * Usage: `python -m benchmarks.read_transactions --tasks 1000 --seconds 10 --concurrency 8 --workers 4`
+import argparse
+import json
+from unittest import mock
+
+from benchmarks.utils import Server, hammer, seed_user, session_cookie_for, setup_django
+
+PATHS = ["/tasks/", "/all-tasks/", "/api/v1/task/", "/sessiontest/"]
+MODES = {"atomic": "False", "non_atomic": "True"}
+
+
+def round_trips(user, path, non_atomic_reads):
+    from django.db import connections
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(user)
+    client.get(path)
+    connection = connections["default"]
+    commit = type(connection).commit
+    with override_settings(TASKS_NON_ATOMIC_READS=non_atomic_reads), mock.patch.object(
+        type(connection), "commit", autospec=True, side_effect=commit
+    ) as commits, CaptureQueriesContext(connection) as context:
+        client.get(path)
+    statements = [
+        query for query in context.captured_queries if query["sql"] != "BEGIN"
+    ]
+    return len(statements) + 2 * commits.call_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    user = seed_user("benchmark", args.tasks)
+    headers = {"Cookie": session_cookie_for(user)}
+
+    results = {
+        path: {
+            mode: {"round_trips": round_trips(user, path, value == "True")}
+            for mode, value in MODES.items()
+        }
+        for path in PATHS
+    }
+    for mode, value in MODES.items():
+        with Server(
+            workers=args.workers, env={"DJANGO_TASKS_NON_ATOMIC_READS": value}
+        ) as server:
+            for path in PATHS:
+                load = hammer(
+                    server.port, path, headers, args.seconds, args.concurrency
+                )
+                results[path][mode].update(
+                    {key: load[key] for key in ("rps", "p50_ms", "p99_ms", "errors")}
+                )
+    print(json.dumps({"tasks": args.tasks, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
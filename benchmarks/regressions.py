@@ -0,0 +1,57 @@
+# * Regression Gate: Runs the hot path benchmarks (`task_manager/tasks/tests/bench_*.py`) and fails when one got
+# * slower than its stored baseline by more than `--threshold`
+# * Baselines live in `benchmarks/baselines/<machine>-<python>/`, they are only comparable on the machine that saved
+# * them: save one on the CI runner (or your machine) from the deployed commit, then gate every change against it
+# * Usage: `python -m benchmarks.regressions --save` on the baseline, `python -m benchmarks.regressions` to gate
+# * Anything after `--` goes to pytest, e.g. `python -m benchmarks.regressions -- -k cascade`
+# ? Refer: https://pytest-benchmark.readthedocs.io/en/v3.4.1/comparing.html
+import argparse
+import subprocess
+import sys
+
+from benchmarks.utils import ROOT_DIR
+
+BENCHMARKS = ROOT_DIR / "task_manager" / "tasks" / "tests"
+STORAGE = ROOT_DIR / "benchmarks" / "baselines"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--save", action="store_true", help="Store this run as the new baseline"
+    )
+    # * The fastest round is the least noisy statistic of a micro benchmark, the mean moves with the machine's load
+    parser.add_argument("--stat", default="min")
+    parser.add_argument("--threshold", default="25%")
+    parser.add_argument("pytest_args", nargs="*")
+    args = parser.parse_args()
+
+    command = [
+        sys.executable,
+        "-m",
+        "pytest",
+        str(BENCHMARKS),
+        "-o",
+        "python_files=bench_*.py",
+        "--benchmark-only",
+        # * Warm the query and serializer caches, keep collections out of the timed rounds
+        "--benchmark-warmup=on",
+        "--benchmark-disable-gc",
+        "--benchmark-min-rounds=20",
+        f"--benchmark-storage=file://{STORAGE}",
+        "--benchmark-columns=min,median,mean,stddev,rounds",
+        "--benchmark-sort=name",
+    ]
+    if args.save:
+        command.append("--benchmark-save=baseline")
+    else:
+        # * Without a name pytest-benchmark compares against the latest saved run
+        command += [
+            "--benchmark-compare",
+            f"--benchmark-compare-fail={args.stat}:{args.threshold}",
+        ]
+    sys.exit(subprocess.call(command + args.pytest_args, cwd=ROOT_DIR))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# * Serialization Benchmark: Task list rendering with `TaskSerializer` + `JSONRenderer` vs the `.values()` read path
+# * Usage: `python -m benchmarks.serialization --tasks 5000 --repeat 5`
+import argparse
+import json
+import time
+
+from benchmarks.utils import seed_user, setup_django
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from task_manager.tasks.apiviews import TaskSerializer, TaskValuesSerializer
+    from task_manager.tasks.models import Task
+    from task_manager.tasks.renderers import FastJSONRenderer
+
+    user = seed_user("benchmark", args.tasks)
+    queryset = Task.objects.live_for(user).select_related("user")
+    values_serializer = TaskValuesSerializer()
+
+    def model_path():
+        return JSONRenderer().render(TaskSerializer(queryset.all(), many=True).data)
+
+    def values_path():
+        rows = queryset.values(*values_serializer.values)
+        return FastJSONRenderer().render(values_serializer.many(rows))
+
+    assert model_path() == values_path()
+    results = {}
+    for name, fn in (("model", model_path), ("values", values_path)):
+        seconds = best_of(args.repeat, fn)
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "tasks_per_second": round(args.tasks / seconds),
+        }
+    results["speedup"] = round(
+        results["model"]["seconds"] / results["values"]["seconds"], 1
+    )
+    print(json.dumps({"tasks": args.tasks, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
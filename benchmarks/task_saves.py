@@ -0,0 +1,95 @@
+# * Task Saves Benchmark: Saves per second of a task whose status changes every time (a `TaskHistory` row and
+# * its log record per save), logging at INFO to a file through each handler setup
+# * "stream": every record formatted and written by the saving thread, as `print()` did before
+# * "queue": every record handed to `QueueStreamHandler`, "queue_sampled": plus the production `SampleFilter`
+# * A save costs milliseconds of queries, so the time the saving thread spends per record is timed on its own too
+# * Usage: `python -m benchmarks.task_saves --saves 2000 --records 100000`
+import argparse
+import json
+import logging.config
+import tempfile
+import time
+
+from benchmarks.utils import seed_user, setup_django
+
+HANDLERS = {
+    "stream": ("logging.StreamHandler", 1.0),
+    "queue": ("task_manager.tasks.logs.QueueStreamHandler", 1.0),
+    "queue_sampled": ("task_manager.tasks.logs.QueueStreamHandler", 0.01),
+}
+
+
+def configure_logging(handler_class, rate, stream):
+    # * `dictConfig()` adds to the filters a logger already has
+    logging.getLogger("task_manager.tasks.models").filters.clear()
+    logging.config.dictConfig(
+        {
+            "version": 1,
+            "disable_existing_loggers": False,
+            "formatters": {"json": {"()": "task_manager.tasks.logs.JSONFormatter"}},
+            "filters": {
+                "sample": {"()": "task_manager.tasks.logs.SampleFilter", "rate": rate}
+            },
+            "handlers": {
+                "file": {"class": handler_class, "formatter": "json", "stream": stream}
+            },
+            "root": {"level": "INFO", "handlers": ["file"]},
+            "loggers": {"task_manager.tasks.models": {"filters": ["sample"]}},
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--saves", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import transaction
+
+    from task_manager.tasks.models import STATUS_CHOICES, Task
+
+    user = seed_user("benchmark", 1)
+    task = Task.objects.filter(user=user).get()
+    statuses = [status for status, _ in STATUS_CHOICES]
+
+    logger = logging.getLogger("task_manager.tasks.models")
+    results = {}
+    for mode, (handler_class, rate) in HANDLERS.items():
+        with tempfile.TemporaryFile("w") as stream:
+            configure_logging(handler_class, rate, stream)
+            start = time.perf_counter()
+            for i in range(args.records):
+                logger.info(
+                    "Created TaskHistory Record!",
+                    extra={"task_id": i, "old_status": "PENDING", "new_status": "DONE"},
+                )
+            record_us = (time.perf_counter() - start) / args.records * 1e6
+            logging.shutdown()
+            logging.root.handlers.clear()
+        best = None
+        for _ in range(args.rounds):
+            with tempfile.TemporaryFile("w") as stream:
+                configure_logging(handler_class, rate, stream)
+                start = time.perf_counter()
+                # * One transaction, or SQLite's commit per save would hide the cost of logging
+                with transaction.atomic():
+                    for i in range(args.saves):
+                        task.status = statuses[i % len(statuses)]
+                        task.save()
+                elapsed = time.perf_counter() - start
+                # * Flushes and stops the queue's thread
+                logging.shutdown()
+                logging.root.handlers.clear()
+            best = elapsed if best is None else min(best, elapsed)
+        results[mode] = {
+            "saves_per_second": round(args.saves / best),
+            "record_us": round(record_us, 2),
+        }
+    print(json.dumps({"saves": args.saves, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
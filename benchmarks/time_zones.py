@@ -0,0 +1,90 @@
+# * Time Zones Benchmark: Import time of `task_manager.tasks.models` (fresh interpreters)
+# * and response time of the mail settings page with its time zone field
+# * Usage: `python -m benchmarks.time_zones --imports 10 --repeat 100`
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import ROOT_DIR, setup_django
+
+MODULE = "task_manager.tasks.models"
+
+
+def import_time_us(imports):
+    """Median time to execute `MODULE` in a fresh process, in microseconds
+
+    `-X importtime` does not see modules loaded through `importlib.import_module()`, as `django.setup()` does,
+    so the module is executed once more after setup with its dependencies already imported.
+    """
+    code = f"""
+import importlib, sys, time
+from benchmarks.utils import setup_django
+setup_django()
+from django.apps import apps
+del sys.modules["{MODULE}"]
+apps.all_models["tasks"].clear()
+start = time.perf_counter()
+importlib.import_module("{MODULE}")
+print(round((time.perf_counter() - start) * 1e6))
+"""
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings.benchmark"}
+    timings = sorted(
+        int(
+            subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=ROOT_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()[-1]
+        )
+        for _ in range(imports)
+    )
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--imports", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+
+    from task_manager.tasks.models import EmailTaskReport, User
+
+    user, _ = User.objects.get_or_create(username="benchmark")
+    report = EmailTaskReport.objects.filter(user=user).first()
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(user)
+    path = f"/mail-settings/{report.pk}/"
+
+    timings = []
+    response = client.get(path)
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(
+        json.dumps(
+            {
+                "models_import_us": import_time_us(args.imports),
+                "mail_settings": {
+                    "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+                    "best_ms": round(timings[0] * 1000, 3),
+                    "bytes": len(response.content),
+                },
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# * Benchmark helpers: Shared by the scripts in `benchmarks/`, run them from the repository root
+# * e.g. `DATABASE_URL=postgres:///task_manager python -m benchmarks.landing_rps`
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve(strict=True).parent.parent
+
+
+def setup_django(settings_module="config.settings.benchmark"):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    sys.path.append(str(ROOT_DIR / "task_manager"))
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+
+# * Seeding: `bulk_create` a user with `size` tasks, a realistic mix of pending and completed
+# * Batches are built one at a time, `bulk_create` would otherwise materialise every instance up front
+def seed_user(username, size, password="benchmark", batch_size=10000):
+    from task_manager.tasks.models import STATUS_CHOICES, Task, User
+
+    user, _ = User.objects.get_or_create(username=username)
+    user.set_password(password)
+    user.save()
+    Task.objects.filter(user=user).delete()
+    for start in range(0, size, batch_size):
+        Task.objects.bulk_create(
+            [
+                Task(
+                    title=f"Benchmark task {i}",
+                    description="Seeded by benchmarks",
+                    completed=i % 3 == 0,
+                    priority=i,
+                    status=STATUS_CHOICES[i % len(STATUS_CHOICES)][0],
+                    user=user,
+                )
+                for i in range(start, min(start + batch_size, size))
+            ],
+            batch_size=1000,
+        )
+    return user
+
+
+# * Session Cookie: Log the user in without going through the login form
+def session_cookie_for(user):
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# * Server: Start `config.wsgi:application` under gunicorn and wait until it accepts connections
+class Server:
+    def __init__(
+        self, app="config.wsgi:application", workers=4, extra_args=(), env=None
+    ):
+        self.port = free_port()
+        self.env = {**os.environ, **(env or {})}
+        self.command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            app,
+            "--workers",
+            str(workers),
+            "--bind",
+            f"127.0.0.1:{self.port}",
+            "--log-level",
+            "warning",
+            *extra_args,
+        ]
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, cwd=ROOT_DIR, env=self.env)
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.1).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.process.kill()
+        raise RuntimeError("Server did not start")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+
+
+# * Load: `concurrency` keep-alive clients hammering `path` for `seconds`, returns requests/second and latencies
+def hammer(port, path, headers, seconds=10, concurrency=8):
+    warm_up(port, path, headers, concurrency)
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            if response.status != 200:
+                failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+# * Warm Up: Let every worker import and connect before the clock starts
+def warm_up(port, path, headers, requests=8):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    for _ in range(requests):
+        connection.request("GET", path, headers=headers)
+        connection.getresponse().read()
+    connection.close()
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
@@ -0,0 +1,28 @@
+"""
+ASGI config for Task Manager project.
+
+Runs alongside `config/wsgi.py`: the same project, with the hot API reads served by
+async views (`TASKS_ASYNC_READS`, see `task_manager.tasks.asyncviews`). Run it with
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
+or `uvicorn config.asgi:application` on its own.
+
+"""
+import os
+import sys
+from pathlib import Path
+
+import django
+
+ROOT_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(ROOT_DIR / "task_manager"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+os.environ.setdefault("DJANGO_TASKS_ASYNC_READS", "True")
+
+django.setup(set_prefix=False)
+
+from task_manager.tasks.asyncviews import ThreadedStreamingASGIHandler  # noqa E402
+
+# * `get_asgi_application()` with streaming responses iterated off the event loop
+application = ThreadedStreamingASGIHandler()
@@ -48,6 +48,14 @@ DATABASES = {
     ),
 }
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Read replicas, e.g. `DATABASE_REPLICA_URLS=postgres://replica-1/task_manager,postgres://replica-2/task_manager`
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), 1):
+    DATABASES[f"replica_{index}"] = env.db_url_config(url)
+    DATABASES[f"replica_{index}"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(f"replica_{index}")
+# https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["task_manager.tasks.routers.ReplicaRouter"]
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -137,6 +145,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "task_manager.tasks.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -144,7 +153,9 @@ MIDDLEWARE = [
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "task_manager.tasks.middleware.CachedAuthenticationMiddleware",
+    "task_manager.tasks.middleware.ProfilingMiddleware",
+    "task_manager.tasks.middleware.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -206,6 +217,20 @@ FORM_RENDERER = "django.forms.renderers.TemplatesSetting"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 
+# CACHES
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#caches
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # `{% cache %}` fragments of the landing pages, keyed on everything they render so they never go stale:
+    # kept in process memory, a page of cards is one dict lookup each instead of a round trip each
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "template_fragments",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
 # FIXTURES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#fixture-dirs
@@ -253,16 +278,30 @@ LOGGING = {
         "verbose": {
             "format": "%(levelname)s %(asctime)s %(module)s "
             "%(process)d %(thread)d %(message)s"
+        },
+        # One JSON object per record, `extra=` fields included
+        "json": {"()": "task_manager.tasks.logs.JSONFormatter"},
+    },
+    "filters": {
+        # Share of the INFO / DEBUG records of hot paths (every task save) that is kept
+        "sample": {
+            "()": "task_manager.tasks.logs.SampleFilter",
+            "rate": env.float("DJANGO_LOG_SAMPLE_RATE", default=0.01),
         }
     },
     "handlers": {
         "console": {
             "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            # Written by a background thread, logging never waits on stderr
+            "class": "task_manager.tasks.logs.QueueStreamHandler",
+            "formatter": "json",
         }
     },
     "root": {"level": "INFO", "handlers": ["console"]},
+    "loggers": {
+        "task_manager": {"level": env("DJANGO_TASK_MANAGER_LOG_LEVEL", default="INFO")},
+        "task_manager.tasks.models": {"filters": ["sample"]},
+    },
 }
 
 # Celery
@@ -274,6 +313,9 @@ if USE_TZ:
 CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://localhost:6379")
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-result_backend
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+# http://docs.celeryproject.org/en/latest/userguide/configuration.html#worker-hijack-root-logger
+# Workers log through `LOGGING` like the web processes
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-accept_content
 CELERY_ACCEPT_CONTENT = ["json"]
 # http://docs.celeryproject.org/en/latest/userguide/configuration.html#std:setting-task_serializer
@@ -312,9 +354,14 @@ SOCIALACCOUNT_FORMS = {"signup": "task_manager.users.forms.UserSocialSignupForm"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        "task_manager.tasks.authentication.CachedTokenAuthentication",
+        "task_manager.tasks.authentication.SignedTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "task_manager.tasks.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -335,3 +382,69 @@ SPECTACULAR_SETTINGS = {
 }
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Seconds a `User` is kept in the cache by `CachedAuthenticationMiddleware`
+USER_CACHE_TIMEOUT = env.int("DJANGO_USER_CACHE_TIMEOUT", default=5 * 60)
+# Seconds a DRF token key -> user mapping is kept by `CachedTokenAuthentication`
+TOKEN_CACHE_TIMEOUT = env.int("DJANGO_TOKEN_CACHE_TIMEOUT", default=5 * 60)
+# Lifetime in seconds of the access tokens checked by `SignedTokenAuthentication`
+SIGNED_TOKEN_MAX_AGE = env.int("DJANGO_SIGNED_TOKEN_MAX_AGE", default=5 * 60)
+# `session_storage_view` writes its counter to the session once every N views
+SESSION_COUNTER_FLUSH_EVERY = env.int("DJANGO_SESSION_COUNTER_FLUSH_EVERY", default=10)
+# Rows fetched per server-side cursor round trip by the task export
+TASK_EXPORT_CHUNK_SIZE = env.int("DJANGO_TASK_EXPORT_CHUNK_SIZE", default=2000)
+# Bytes buffered before the task export hands a chunk to the WSGI server
+TASK_EXPORT_BUFFER_SIZE = env.int("DJANGO_TASK_EXPORT_BUFFER_SIZE", default=64 * 1024)
+# Rows validated (and reported as progress) / inserted per batch by the task import
+TASK_IMPORT_CHUNK_SIZE = env.int("DJANGO_TASK_IMPORT_CHUNK_SIZE", default=1000)
+# Per-row errors kept on a `TaskImport`, the rest are only counted
+TASK_IMPORT_MAX_ERRORS = env.int("DJANGO_TASK_IMPORT_MAX_ERRORS", default=1000)
+# Seconds before the `import_tasks` Celery task is soft time limited
+TASK_IMPORT_TIME_LIMIT = env.int("DJANGO_TASK_IMPORT_TIME_LIMIT", default=10 * 60)
+# Tasks per page of the delta sync (`/api/v1/task/sync/`)
+TASK_SYNC_PAGE_SIZE = env.int("DJANGO_TASK_SYNC_PAGE_SIZE", default=500)
+# "optimistic" shifts priorities with version checked UPDATEs and falls back to "locking" (`select_for_update`)
+TASKS_PRIORITY_CASCADE_MODE = env("DJANGO_TASKS_PRIORITY_CASCADE_MODE", default="optimistic")
+# Optimistic cascade attempts before falling back to locking
+TASKS_PRIORITY_CASCADE_RETRIES = env.int("DJANGO_TASKS_PRIORITY_CASCADE_RETRIES", default=3)
+# Views using `atomic_writes` serve GET / HEAD / OPTIONS outside of a transaction
+TASKS_NON_ATOMIC_READS = env.bool("DJANGO_TASKS_NON_ATOMIC_READS", default=True)
+# Seconds a user reads from the primary after writing, covers the replication lag
+REPLICA_PIN_SECONDS = env.int("DJANGO_REPLICA_PIN_SECONDS", default=5)
+# Seconds before a persistent database connection is pinged again prior to reuse, unset to disable
+DATABASE_HEALTH_CHECK_INTERVAL = env.int("DATABASE_HEALTH_CHECK_INTERVAL", default=10)
+# Task event streams: fan-out between writers and open streams (see `task_manager.tasks.events`)
+TASK_EVENTS_BUS = {"BACKEND": "task_manager.tasks.events.LocalEventBus"}
+# Seconds between heartbeats, before a stream is closed and before the client reconnects
+TASK_EVENTS_HEARTBEAT = env.int("DJANGO_TASK_EVENTS_HEARTBEAT", default=15)
+TASK_EVENTS_MAX_AGE = env.int("DJANGO_TASK_EVENTS_MAX_AGE", default=300)
+TASK_EVENTS_RETRY = env.int("DJANGO_TASK_EVENTS_RETRY", default=3)
+# Hot API reads are served by async views, turned on by `config/asgi.py`
+TASKS_ASYNC_READS = env.bool("DJANGO_TASKS_ASYNC_READS", default=False)
+if TASKS_ASYNC_READS:
+    # WhiteNoise 6.0 is sync-only, it would put every request on Django's one sync thread,
+    # serve static files from the reverse proxy / CDN in front of the ASGI server instead
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+# Share of requests `PerformanceMiddleware` accounts queries and cache reads for, the others are only timed
+PERF_SAMPLE_RATE = env.float("DJANGO_PERF_SAMPLE_RATE", default=0.05)
+# Sampled responses carry a `Server-Timing` header, it shows clients how long the database took
+PERF_SERVER_TIMING = env.bool("DJANGO_PERF_SERVER_TIMING", default=False)
+# Executions of one SQL statement (with any parameters) in a request reported as a similar (N+1) query
+PERF_SIMILAR_QUERIES_THRESHOLD = env.int("DJANGO_PERF_SIMILAR_QUERIES_THRESHOLD", default=5)
+# Addresses `/metrics/` answers, anyone else gets a 404
+METRICS_ALLOWED_IPS = env.list("DJANGO_METRICS_ALLOWED_IPS", default=["127.0.0.1", "::1"])
+# Port the Celery worker's main process serves its Prometheus metrics on, unset for none
+WORKER_METRICS_PORT = env.int("CELERY_WORKER_METRICS_PORT", default=None)
+# Days of `EmailReportRun` rows kept, older runs are deleted by the daily `prune_email_report_runs`
+EMAIL_REPORT_RUNS_MAX_AGE = env.int("DJANGO_EMAIL_REPORT_RUNS_MAX_AGE", default=7)
+# Threads pulling streaming responses (event streams, exports) under ASGI, i.e. concurrent streams per process
+ASGI_STREAMING_THREADS = env.int("DJANGO_ASGI_STREAMING_THREADS", default=100)
+# Sampling profiler, see `task_manager.tasks.profiling`: a staff user's request with this header is profiled
+PROFILING_HEADER = "HTTP_X_PROFILE"
+# Seconds between two stack samples of the profiled thread, and the most seconds one capture samples for
+PROFILING_INTERVAL = env.float("DJANGO_PROFILING_INTERVAL", default=0.005)
+PROFILING_MAX_SECONDS = env.float("DJANGO_PROFILING_MAX_SECONDS", default=60)
+# Seconds a process goes without rereading the armed `ProfileTrigger`s from the cache
+PROFILING_POLL_SECONDS = env.float("DJANGO_PROFILING_POLL_SECONDS", default=5)
+# Speedscope files of the captures, on the local disk of each web / worker host, the oldest go past the maximum
+PROFILE_CAPTURES_DIR = env("DJANGO_PROFILE_CAPTURES_DIR", default=str(ROOT_DIR / "profiles"))
+PROFILING_MAX_CAPTURES = env.int("DJANGO_PROFILING_MAX_CAPTURES", default=200)
@@ -0,0 +1,21 @@
+"""
+With these settings, benchmarks run against a production-like (DEBUG=False) server
+on the local machine.
+"""
+
+from .test import *  # noqa
+from .test import env
+
+# GENERAL
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#debug
+DEBUG = False
+# https://docs.djangoproject.com/en/dev/ref/settings/#allowed-hosts
+ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["localhost", "127.0.0.1"])
+
+# DATABASES
+# ------------------------------------------------------------------------------
+DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=0)  # noqa F405
+
+# Your stuff...
+# ------------------------------------------------------------------------------
@@ -20,7 +20,8 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "",
-    }
+    },
+    "template_fragments": CACHES["template_fragments"],  # noqa F405
 }
 
 # EMAIL
@@ -63,3 +64,10 @@ CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Every request is accounted for and shows its `Server-Timing` in the browser's network panel
+PERF_SAMPLE_RATE = 1.0
+PERF_SERVER_TIMING = True
+
+# Plain text logs in the terminal, and every record of the hot paths
+LOGGING["handlers"]["console"]["formatter"] = "verbose"  # noqa F405
+LOGGING["filters"]["sample"]["rate"] = 1.0  # noqa F405
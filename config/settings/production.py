@@ -12,7 +12,20 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["example.com"])
 # ------------------------------------------------------------------------------
 DATABASES["default"] = env.db("DATABASE_URL")  # noqa F405
 DATABASES["default"]["ATOMIC_REQUESTS"] = True  # noqa F405
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa F405
+# Connection pooling, one of
+# "": straight to Postgres, each web / worker process keeps its connection for `CONN_MAX_AGE` seconds
+# "session": `DATABASE_URL` points at PgBouncer in session mode, connections go back to its pool after every request
+# "transaction": PgBouncer in transaction mode, server-side cursors are disabled as they cannot outlive a
+#   transaction there (`.iterator()` then fetches the whole result at once, exports switch to keyset pages)
+# https://www.pgbouncer.org/features.html
+DATABASE_POOL_MODE = env("DATABASE_POOL_MODE", default="")
+for alias in ["default", *DATABASE_REPLICAS]:  # noqa F405
+    DATABASES[alias]["CONN_MAX_AGE"] = env.int(  # noqa F405
+        "CONN_MAX_AGE", default=0 if DATABASE_POOL_MODE == "session" else 60
+    )
+    DATABASES[alias]["DISABLE_SERVER_SIDE_CURSORS"] = (  # noqa F405
+        DATABASE_POOL_MODE == "transaction"
+    )
 
 # CACHES
 # ------------------------------------------------------------------------------
@@ -26,9 +39,23 @@ CACHES = {
             # https://github.com/jazzband/django-redis#memcached-exceptions-behavior
             "IGNORE_EXCEPTIONS": True,
         },
-    }
+    },
+    "template_fragments": CACHES["template_fragments"],  # noqa F405
 }
 
+# SESSIONS
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/topics/http/sessions/#configuring-the-session-engine
+# "cached_db": read through Redis, write through to Postgres (sessions survive a Redis flush)
+# "cache": Redis only (no session queries at all, sessions are lost with the cache)
+# "db": the default database backend
+SESSION_ENGINES = {
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "db": "django.contrib.sessions.backends.db",
+}
+SESSION_ENGINE = SESSION_ENGINES[env("DJANGO_SESSION_MODE", default="cached_db")]
+
 # SECURITY
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#secure-proxy-ssl-header
@@ -75,6 +102,21 @@ EMAIL_SUBJECT_PREFIX = env(
     default="[Task Manager]",
 )
 
+# TEMPLATES
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#templates
+# Compile every template once per process, also serves the widget templates behind `addclass` (`FORM_RENDERER`)
+TEMPLATES[-1]["APP_DIRS"] = False  # noqa F405
+TEMPLATES[-1]["OPTIONS"]["loaders"] = [  # type: ignore[index] # noqa F405
+    (
+        "django.template.loaders.cached.Loader",
+        [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    )
+]
+
 # ADMIN
 # ------------------------------------------------------------------------------
 # Django Admin URL regex.
@@ -106,12 +148,19 @@ ANYMAIL = {
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
-    "filters": {"require_debug_false": {"()": "django.utils.log.RequireDebugFalse"}},
+    "filters": {
+        "require_debug_false": {"()": "django.utils.log.RequireDebugFalse"},
+        "sample": {
+            "()": "task_manager.tasks.logs.SampleFilter",
+            "rate": env.float("DJANGO_LOG_SAMPLE_RATE", default=0.01),
+        },
+    },
     "formatters": {
         "verbose": {
             "format": "%(levelname)s %(asctime)s %(module)s "
             "%(process)d %(thread)d %(message)s"
-        }
+        },
+        "json": {"()": "task_manager.tasks.logs.JSONFormatter"},
     },
     "handlers": {
         "mail_admins": {
@@ -121,8 +170,8 @@ LOGGING = {
         },
         "console": {
             "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            "class": "task_manager.tasks.logs.QueueStreamHandler",
+            "formatter": "json",
         },
     },
     "root": {"level": "INFO", "handlers": ["console"]},
@@ -137,8 +186,15 @@ LOGGING = {
             "handlers": ["console", "mail_admins"],
             "propagate": True,
         },
+        "task_manager": {"level": env("DJANGO_TASK_MANAGER_LOG_LEVEL", default="INFO")},
+        "task_manager.tasks.models": {"filters": ["sample"]},
     },
 }
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Task event streams fan out through Redis pub/sub, every web process sees every write
+TASK_EVENTS_BUS = {
+    "BACKEND": "task_manager.tasks.events.RedisEventBus",
+    "OPTIONS": {"location": env("REDIS_URL")},
+}
@@ -27,3 +27,12 @@ EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# A second database standing in for a lagging read replica, tests opt in with
+# `override_settings(DATABASE_REPLICAS=["replica"])`
+DATABASES["replica"] = {  # noqa F405
+    **DATABASES["default"],  # noqa F405
+    "ATOMIC_REQUESTS": False,
+    "TEST": {"NAME": None}
+    if "sqlite" in DATABASES["default"]["ENGINE"]  # noqa F405
+    else {"NAME": f"test_{DATABASES['default']['NAME']}_replica"},  # noqa F405
+}
@@ -0,0 +1,30 @@
+"""
+With these settings, Celery workers load only the apps `task_manager.tasks.tasks` needs.
+Usage: `DJANGO_SETTINGS_MODULE=config.settings.worker celery -A config.celery_app worker`,
+compare with `python manage.py importtime worker --settings=config.settings.worker`
+"""
+
+from .production import *  # noqa
+
+# APPS
+# ------------------------------------------------------------------------------
+# No admin, allauth, crispy forms, DRF browsable API or django_celery_beat (and the pytz catalogue it builds):
+# beat keeps the full production settings, `worker -B` too
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    # `Token` is imported by `task_manager.tasks.models`
+    "rest_framework.authtoken",
+    "anymail",
+    "task_manager.users",
+    "task_manager.tasks",
+]
+
+# MIDDLEWARE
+# ------------------------------------------------------------------------------
+# Workers serve no requests, see `config/worker_urls.py`
+MIDDLEWARE = []
+
+# URLS
+# ------------------------------------------------------------------------------
+ROOT_URLCONF = "config.worker_urls"
@@ -1,7 +1,7 @@
 from django.conf import settings
 # from django.conf.urls.static import static
 # from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.views import defaults as default_views
 # from django.views.generic import TemplateView
 # from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
@@ -42,7 +42,15 @@ from django.shortcuts import redirect
 
 # * Django Rest Framework
 from rest_framework_nested import routers
-from task_manager.tasks.apiviews import TaskHistoryViewSet, TaskViewSet
+from task_manager.tasks.apiviews import (
+    AccessTokenView,
+    TaskEventStreamView,
+    TaskHistoryViewSet,
+    TaskImportViewSet,
+    TaskViewSet,
+    TimeZoneSearchView,
+)
+from task_manager.tasks.asyncviews import async_reads
 from task_manager.tasks.views import (
     GenericAllTaskView,
     GenericCompletedTaskView,
@@ -54,6 +62,8 @@ from task_manager.tasks.views import (
     GenericTaskUpdateView,
     UserCreateView,
     UserLoginView,
+    database_health_view,
+    metrics_view,
     session_storage_view,
 )
 
@@ -63,6 +73,7 @@ def redirect_view(request):
 
 router = routers.SimpleRouter()
 router.register("api/v1/task", TaskViewSet)
+router.register("api/v1/task-import", TaskImportViewSet)
 
 task_router = routers.NestedSimpleRouter(router, "api/v1/task", lookup="task")
 task_router.register("history", TaskHistoryViewSet)
@@ -87,9 +98,41 @@ urlpatterns = [
     path("user/logout/", LogoutView.as_view()),
     # ! Additional
     path("sessiontest/", session_storage_view),
+    path("health/db/", database_health_view),
+    path("metrics/", metrics_view),
     path("mail-settings/<pk>/", GenericEmailTaskReportUpdateView.as_view()),
+    # ! API
+    path("api/v1/token/access/", AccessTokenView.as_view()),
+    path("api/v1/task/events/", TaskEventStreamView.as_view()),
+    path("api/v1/time-zones/", TimeZoneSearchView.as_view()),
 ] + router.urls + task_router.urls
 
+# ! ASGI: Async reads for the hot API endpoints, matched before the router's routes
+# * Numeric lookups only, `/api/v1/task/export/` etc. still reach the router
+if settings.TASKS_ASYNC_READS:
+    urlpatterns = [
+        re_path(
+            r"^api/v1/task/$",
+            async_reads(TaskViewSet, {"get": "list", "post": "create"}),
+        ),
+        re_path(
+            r"^api/v1/task/(?P<pk>[0-9]+)/$",
+            async_reads(
+                TaskViewSet,
+                {
+                    "get": "retrieve",
+                    "put": "update",
+                    "patch": "partial_update",
+                    "delete": "destroy",
+                },
+            ),
+        ),
+        re_path(
+            r"^api/v1/task/(?P<task_pk>[0-9]+)/history/$",
+            async_reads(TaskHistoryViewSet, {"get": "list"}),
+        ),
+    ] + urlpatterns
+
 
 if settings.DEBUG:
     # This allows the error pages to be debugged during development, just visit
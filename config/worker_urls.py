@@ -0,0 +1,3 @@
+# * Worker URLconf: Celery runs the system checks when a worker starts, which import `ROOT_URLCONF`.
+# * Workers serve no requests, so they skip the views, admin and API of `config/urls.py`
+urlpatterns = []
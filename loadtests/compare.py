@@ -0,0 +1,47 @@
+# * Load Test Comparison: Throughput and latency percentiles of two `--report-json` reports, per endpoint
+# * Usage: `python -m loadtests.compare loadtests/reports/before.json loadtests/reports/after.json`
+import argparse
+import json
+
+COLUMNS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before:+.1%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares the throughput and latency percentiles of two Locust "
+        "`--report-json` reports, per endpoint"
+    )
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    if before["dataset"] != after["dataset"]:
+        print(f"! Different datasets: {before['dataset']} vs {after['dataset']}")
+    print(f"{(before['commit'] or '?')[:10]} -> {(after['commit'] or '?')[:10]}")
+
+    rows = [("total", before["total"], after["total"])]
+    rows += [
+        (name, before["endpoints"][name], stats)
+        for name, stats in after["endpoints"].items()
+        if name in before["endpoints"]
+    ]
+    width = max(len(name) for name, _, _ in rows)
+    print(f"{'endpoint':<{width}} " + " ".join(f"{column:>22}" for column in COLUMNS))
+    for name, old, new in rows:
+        cells = (
+            f"{old[column]:>7} {new[column]:>7} {change(old[column], new[column]):>6}"
+            for column in COLUMNS
+        )
+        print(f"{name:<{width}} " + " ".join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
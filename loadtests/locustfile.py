@@ -0,0 +1,301 @@
+# * Load Tests: Locust scenarios for the HTML pages and the API, against users seeded by `seed_load_test`
+# * 1. `python manage.py seed_load_test --users 100 --tasks 1000000 --reset` (writes `loadtests/dataset.json`)
+# * 2. `locust -f loadtests/locustfile.py --host http://127.0.0.1:8000 --headless -u 50 -r 10 -t 2m \
+# *     --report-json loadtests/reports/$(git rev-parse --short HEAD).json`
+# *    (only some scenarios: name the classes at the end, e.g. `... ApiUser`)
+# * 3. `python -m loadtests.compare loadtests/reports/<before>.json loadtests/reports/<after>.json`
+# ? Refer: https://docs.locust.io/en/2.8.6/writing-a-locustfile.html
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import time
+import uuid
+from pathlib import Path
+
+from locust import HttpUser, between, events, task
+
+MANIFEST = Path(
+    os.environ.get("LOADTEST_MANIFEST", Path(__file__).with_name("dataset.json"))
+)
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+VERSION = re.compile(r'name="version" value="(\d+)"')
+STATUSES = ["PENDING", "IN_PROGRESS", "COMPLETED", "CANCELLED"]
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def load_manifest():
+    with open(MANIFEST) as manifest:
+        return json.load(manifest)
+
+
+dataset = load_manifest()
+# * Every simulated user logs in as the next seeded account
+accounts = itertools.cycle(dataset["users"])
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    parser.add_argument(
+        "--report-json",
+        default="",
+        help="Write throughput and latency percentiles to this file when the run ends",
+    )
+
+
+# * Report: Per endpoint and in total, with the commit and dataset size, for `loadtests/compare.py`
+@events.quitting.add_listener
+def write_report(environment, **kwargs):
+    path = environment.parsed_options.report_json
+    if not path:
+        return
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    def entry_report(entry):
+        return {
+            "requests": entry.num_requests,
+            "failures": entry.num_failures,
+            "rps": round(entry.total_rps, 2),
+            "avg_ms": round(entry.avg_response_time, 2),
+            **{
+                f"p{int(q * 100)}_ms": entry.get_response_time_percentile(q)
+                for q in PERCENTILES
+            },
+        }
+
+    stats = environment.stats
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": environment.host,
+        "users": environment.parsed_options.num_users,
+        "dataset": {"users": len(dataset["users"]), "tasks": dataset["tasks"]},
+        "total": entry_report(stats.total),
+        "endpoints": {
+            f"{entry.method} {entry.name}": entry_report(entry)
+            for entry in sorted(stats.entries.values(), key=lambda e: e.name)
+        },
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(report, indent=2))
+
+
+class FormMixin:
+    def csrf_token(self, path, name):
+        with self.client.get(path, name=name, catch_response=True) as response:
+            match = CSRF_TOKEN.search(response.text)
+            if not match:
+                response.failure("No CSRF token")
+                return None, response
+            return match.group(1), response
+
+    def post_form(self, path, name, data):
+        token, _ = self.csrf_token(path, name)
+        if token is None:
+            return None
+        return self.client.post(
+            path,
+            {"csrfmiddlewaretoken": token, **data},
+            headers={"Referer": f"{self.host}{path}"},
+            name=name,
+        )
+
+
+# * Browser: Logs in once, then mostly reads the landing pages and sometimes creates or edits a task
+# * A new task takes a random existing priority, which shifts the priorities below it (the cascade)
+class BrowserUser(FormMixin, HttpUser):
+    weight = 3
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.account = next(accounts)
+        self.post_form(
+            "/user/login/",
+            "/user/login/",
+            {"username": self.account["username"], "password": dataset["password"]},
+        )
+        self.task_ids = []
+
+    @task(6)
+    def pending_tasks(self):
+        self.client.get("/tasks/")
+
+    @task(3)
+    def all_tasks(self):
+        page = random.randint(1, 5)
+        self.client.get(f"/all-tasks/?page={page}", name="/all-tasks/?page=[n]")
+
+    @task(2)
+    def completed_tasks(self):
+        self.client.get("/completed-tasks/")
+
+    @task(1)
+    def create_task(self):
+        self.post_form(
+            "/create-task/",
+            "/create-task/",
+            {
+                "title": f"Load test {uuid.uuid4().hex[:8]}",
+                "description": "Created by Locust",
+                "priority": random.randint(1, 50),
+                "status": "PENDING",
+            },
+        )
+
+    @task(1)
+    def update_task(self):
+        if not self.task_ids:
+            self.task_ids = self.api_task_ids()
+            if not self.task_ids:
+                return
+        pk = random.choice(self.task_ids)
+        path = f"/update-task/{pk}/"
+        with self.client.get(
+            path, name="/update-task/[id]/", catch_response=True
+        ) as page:
+            token, version = CSRF_TOKEN.search(page.text), VERSION.search(page.text)
+            if not token:
+                page.failure("No CSRF token")
+                return
+        self.client.post(
+            path,
+            {
+                "csrfmiddlewaretoken": token.group(1),
+                "title": f"Edited {uuid.uuid4().hex[:8]}",
+                "description": "Edited by Locust",
+                "priority": random.randint(1, 50),
+                "status": random.choice(STATUSES),
+                **({"version": version.group(1)} if version else {}),
+            },
+            headers={"Referer": f"{self.host}{path}"},
+            name="/update-task/[id]/ (POST)",
+        )
+
+    @task(1)
+    def task_detail(self):
+        if self.task_ids:
+            pk = random.choice(self.task_ids)
+            self.client.get(f"/detail-task/{pk}/", name="/detail-task/[id]/")
+
+    def api_task_ids(self):
+        # * The HTML pages do not list ids in a parseable way, the sync feed does
+        response = self.client.get(
+            "/api/v1/task/sync/",
+            headers={"Authorization": f"Token {self.account['token']}"},
+            name="/api/v1/task/sync/",
+        )
+        if response.ok:
+            return [change["id"] for change in response.json()["changes"]][:200]
+        return []
+
+
+# * Sign Up: New accounts, rare next to the logged in traffic
+class SignupUser(FormMixin, HttpUser):
+    weight = 1
+    wait_time = between(5, 15)
+
+    @task
+    def signup_and_login(self):
+        username = f"locust-{uuid.uuid4().hex[:12]}"
+        password = f"Pw-{uuid.uuid4().hex}"
+        self.post_form(
+            "/user/signup/",
+            "/user/signup/",
+            {
+                "username": username,
+                "email": f"{username}@example.com",
+                "password1": password,
+                "password2": password,
+            },
+        )
+        self.post_form(
+            "/user/login/",
+            "/user/login/",
+            {"username": username, "password": password},
+        )
+        self.client.get("/user/logout/")
+        self.client.cookies.clear()
+
+
+# * API Client: Token authenticated CRUD and history, learns its task ids from the delta sync like an offline client
+class ApiUser(HttpUser):
+    weight = 3
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.account = next(accounts)
+        self.client.headers["Authorization"] = f"Token {self.account['token']}"
+        self.task_ids, self.sync_token = [], None
+        self.sync()
+
+    # * A fresh client pages through the seeded tasks first, every call fetches the next page of changes
+    def sync(self):
+        params = {"since": self.sync_token} if self.sync_token else {}
+        response = self.client.get(
+            "/api/v1/task/sync/", params=params, name="/api/v1/task/sync/"
+        )
+        if not response.ok:
+            return []
+        body = response.json()
+        self.sync_token = body["next_token"] or self.sync_token
+        ids = [change["id"] for change in body["changes"] if not change["deleted"]]
+        self.task_ids = (self.task_ids + ids)[-500:]
+
+    @task(5)
+    def list_tasks(self):
+        self.client.get("/api/v1/task/")
+
+    @task(3)
+    def retrieve_task(self):
+        if self.task_ids:
+            pk = random.choice(self.task_ids)
+            self.client.get(f"/api/v1/task/{pk}/", name="/api/v1/task/[id]/")
+
+    @task(2)
+    def task_history(self):
+        if self.task_ids:
+            pk = random.choice(self.task_ids)
+            self.client.get(
+                f"/api/v1/task/{pk}/history/", name="/api/v1/task/[id]/history/"
+            )
+
+    @task(2)
+    def update_task(self):
+        if self.task_ids:
+            pk = random.choice(self.task_ids)
+            self.client.patch(
+                f"/api/v1/task/{pk}/",
+                json={"status": random.choice(STATUSES)},
+                name="/api/v1/task/[id]/ (PATCH)",
+            )
+
+    @task(1)
+    def create_task(self):
+        self.client.post(
+            "/api/v1/task/",
+            json={
+                "title": f"Load test {uuid.uuid4().hex[:8]}",
+                "description": "Created by Locust",
+                "status": "PENDING",
+            },
+        )
+
+    # * Deletes are soft but still change the dataset, reseed with `--reset` before runs that get compared
+    @task(1)
+    def delete_task(self):
+        if self.task_ids:
+            pk = self.task_ids.pop(random.randrange(len(self.task_ids)))
+            self.client.delete(
+                f"/api/v1/task/{pk}/", name="/api/v1/task/[id]/ (DELETE)"
+            )
+
+    @task(1)
+    def sync_changes(self):
+        self.sync()
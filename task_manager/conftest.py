@@ -1,7 +1,18 @@
+from collections import defaultdict
+from contextlib import ExitStack
+
 import pytest
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test.client import Client
+from django.urls import Resolver404
+
+from task_manager.tasks.budgets import REPEATED_STATEMENT_LIMIT, get_query_budget
+from task_manager.tasks.metrics import RequestStats
 
-from task_manager.users.models import User
-from task_manager.users.tests.factories import UserFactory
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+# * Most queries of a single request per view over the session, for the summary of `pytest -v`
+VIEW_QUERIES = defaultdict(int)
 
 
 @pytest.fixture(autouse=True)
@@ -9,6 +20,84 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+# * `AUTH_USER_MODEL` is `auth.User`, `UserFactory` targets the custom user model of the project template
 @pytest.fixture
 def user() -> User:
-    return UserFactory()
+    return User.objects.create_user(
+        username="pytest", email="pytest@example.com", password="pytest"
+    )
+
+
+# * Query Recorder: Execute wrapper counting every statement, the same accounting as the performance middleware
+class QueryRecorder:
+    def __init__(self):
+        self.stats = RequestStats()
+
+    def __call__(self, execute, sql, params, many, context):
+        # * Savepoints come from the transaction every test runs in, not from the view
+        if sql.startswith(SAVEPOINT_STATEMENTS):
+            return execute(sql, params, many, context)
+        self.stats.queries += 1
+        self.stats.statements[sql] += 1
+        self.stats.executions[sql, repr(params)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+
+
+def budget_overruns(response, stats):
+    method, path = response.request["REQUEST_METHOD"], response.request["PATH_INFO"]
+    try:
+        match = response.resolver_match
+        view = match.view_name or match._func_path
+    except Resolver404:
+        return
+    VIEW_QUERIES[method, view] = max(VIEW_QUERIES[method, view], stats.queries)
+    budget = get_query_budget(match, method)
+    if budget is None:
+        return
+    if budget.max_queries is not None and stats.queries > budget.max_queries:
+        yield f"{method} {path} ({view}) ran {stats.queries} queries, its budget is {budget.max_queries}"
+    if budget.constant:
+        for kind, count, sql in stats.repeated_queries(REPEATED_STATEMENT_LIMIT):
+            if kind == "similar":
+                yield f"{method} {path} ({view}) ran {count} times, once per row: {sql}"
+
+
+# * Query Budgets: Every request of the test client is held to the budget of its view (`task_manager.tasks.budgets`)
+# * and fails the test on the spot, `@pytest.mark.ignore_query_budget` opts a test out
+# * The queries of the whole test end up in its `user_properties` (`--junitxml`)
+@pytest.fixture(autouse=True)
+def query_budgets(request, monkeypatch):
+    enforced = request.node.get_closest_marker("ignore_query_budget") is None
+    client_request = Client.request
+
+    def budgeted_request(client, **kwargs):
+        with QueryRecorder() as recorder:
+            response = client_request(client, **kwargs)
+        overruns = list(budget_overruns(response, recorder.stats))
+        if overruns and enforced:
+            pytest.fail("Query budget exceeded:\n" + "\n".join(overruns))
+        return response
+
+    monkeypatch.setattr(Client, "request", budgeted_request)
+    with QueryRecorder() as recorder:
+        yield
+    request.node.user_properties.append(("queries", recorder.stats.queries))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not VIEW_QUERIES or config.option.verbose < 1:
+        return
+    terminalreporter.section("queries per request (most of any single request)")
+    for (method, view), queries in sorted(
+        VIEW_QUERIES.items(), key=lambda item: (-item[1], item[0])
+    ):
+        terminalreporter.write_line(f"{queries:>5}  {method:<7} {view}")
@@ -1,7 +1,127 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
 # Register your models here.
 # * Registering `Task` model to acces from `admin.sites.site`
-from task_manager.tasks.models import Task
+from task_manager.tasks.models import (
+    EmailReportRun,
+    ProfileCapture,
+    ProfileTrigger,
+    StaleTaskError,
+    Task,
+)
 
-admin.sites.site.register(Task)
+
+# * Tasks: The form posts the `version` it was opened at, a save racing it (`StaleTaskError`) re-renders the
+# * latest row with a 409 instead of a 500
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except StaleTaskError:
+            self.message_user(
+                request,
+                "This task was changed by someone else while you were editing it. "
+                "Review their changes and save again.",
+                messages.ERROR,
+            )
+            request.method = "GET"
+            response = super().changeform_view(
+                request, object_id, form_url, extra_context
+            )
+            response.status_code = 409
+            return response
+
+
+# * Email Report Runs: Read-only history of `send_email_reminder`, to size the worker pool and spot a backlog (lag)
+@admin.register(EmailReportRun)
+class EmailReportRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "started_at",
+        "duration",
+        "reports_due",
+        "emails_sent",
+        "emails_failed",
+        "queries",
+        "smtp_seconds",
+        "mean_lag",
+        "max_lag",
+    )
+    list_filter = ("started_at",)
+    date_hierarchy = "started_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# * Profile Triggers: Arm the sampling profiler for the next requests to a view or runs of a Celery task
+@admin.register(ProfileTrigger)
+class ProfileTriggerAdmin(admin.ModelAdmin):
+    list_display = ("kind", "target", "remaining", "expires_at", "created_by")
+    list_filter = ("kind",)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+
+# * Profile Captures: Read-only list of the recent profiles, each downloads as a speedscope file
+# ? Refer: https://www.speedscope.app
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "kind",
+        "name",
+        "label",
+        "source",
+        "user",
+        "duration",
+        "samples",
+        "download",
+    )
+    list_filter = ("kind", "source", "created_at")
+    date_hierarchy = "created_at"
+    list_select_related = ("user",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="tasks_profilecapture_download",
+            )
+        ] + super().get_urls()
+
+    @admin.display(description="Profile")
+    def download(self, obj):
+        url = reverse("admin:tasks_profilecapture_download", args=[obj.pk])
+        return format_html('<a href="{}">speedscope.json</a>', url)
+
+    def download_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        capture = get_object_or_404(ProfileCapture, pk=pk)
+        try:
+            file = capture.file.open("rb")
+        except FileNotFoundError:
+            # * Captured on another host, the files stay on the disk of the process that profiled
+            raise Http404("The profile is on another host") from None
+        return FileResponse(
+            file, as_attachment=True, filename=capture.file.name.rsplit("/", 1)[-1]
+        )
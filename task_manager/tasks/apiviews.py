@@ -1,4 +1,13 @@
+from pathlib import Path
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
 from django_filters.rest_framework import (
     BooleanFilter,
     CharFilter,
@@ -7,12 +16,40 @@ from django_filters.rest_framework import (
     DjangoFilterBackend,
     FilterSet,
 )
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-from task_manager.tasks.models import STATUS_CHOICES, Task, TaskHistory
+from task_manager.tasks.authentication import SignedTokenAuthentication
+from task_manager.tasks.budgets import query_budget
+from task_manager.tasks.events import event_stream
+from task_manager.tasks.exports import (
+    EXPORT_CONTENT_TYPES,
+    EXPORT_WRITERS,
+    export_rows,
+    export_stream,
+)
+from task_manager.tasks.imports import IMPORT_READERS
+from task_manager.tasks.models import (
+    STATUS_CHOICES,
+    StaleTaskError,
+    Task,
+    TaskHistory,
+    TaskImport,
+)
+from task_manager.tasks.renderers import EventStreamRenderer, FastJSONRenderer
+from task_manager.tasks.routers import ReplicaReadsMixin
+from task_manager.tasks.tasks import import_tasks
+from task_manager.tasks.timezones import search_time_zones, time_zone_groups
+from task_manager.tasks.transactions import AtomicWritesMixin
 
 
 class UserSerializer(ModelSerializer):
@@ -29,6 +66,44 @@ class TaskSerializer(ModelSerializer):
         fields = ["title", "description", "completed", "status", "user"]
 
 
+# * Task Values Serializer: Renders `.values()` rows into the exact `TaskSerializer` shape
+# * Skips the field-by-field machinery on read paths, writes keep the full `TaskSerializer` validation
+class TaskValuesSerializer:
+    fields = ("title", "description", "completed", "status")
+    user_fields = ("first_name", "last_name", "username")
+    # * Precompiled `(key, column)` pairs for the nested user
+    user_columns = tuple((field, f"user__{field}") for field in user_fields)
+    values = (*fields, "user", *(column for _, column in user_columns))
+
+    def to_representation(self, row):
+        data = {field: row[field] for field in self.fields}
+        data["user"] = (
+            None
+            if row["user"] is None
+            else {field: row[column] for field, column in self.user_columns}
+        )
+        return data
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class TaskImportSerializer(ModelSerializer):
+    class Meta:
+        model = TaskImport
+        fields = [
+            "id",
+            "file_format",
+            "status",
+            "rows_processed",
+            "rows_imported",
+            "rows_failed",
+            "errors",
+            "created_date",
+            "completed_date",
+        ]
+
+
 class TaskFilter(FilterSet):
     title = CharFilter(lookup_expr="icontains")
     status = ChoiceFilter(choices=STATUS_CHOICES)
@@ -36,9 +111,82 @@ class TaskFilter(FilterSet):
     completed = BooleanFilter()
 
 
-class TaskViewSet(ModelViewSet):
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The task changed since it was read, fetch it again."
+    default_code = "precondition_failed"
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The task was changed by another request, fetch it again."
+    default_code = "conflict"
+
+
+# * Values Read Mixin: `list` and `retrieve` through `values_serializer_class` instead of model instances
+# * `etag_field`: Column sent as the `ETag` of `retrieve`
+class ValuesReadMixin:
+    values_serializer_class = None
+    etag_field = None
+
+    def get_values_serializer(self):
+        return self.values_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        rows = self.filter_queryset(self.get_queryset()).values(*serializer.values)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.many(page))
+        return Response(serializer.many(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        fields = serializer.values + ((self.etag_field,) if self.etag_field else ())
+        rows = self.filter_queryset(self.get_queryset()).values(*fields)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        response = Response(serializer.to_representation(row))
+        if self.etag_field:
+            response["ETag"] = self.get_etag(row[self.etag_field])
+        return response
+
+    def get_etag(self, value):
+        return f'"{value}"'
+
+
+@query_budget(4, constant=True)
+class TaskViewSet(AtomicWritesMixin, ReplicaReadsMixin, ValuesReadMixin, ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    values_serializer_class = TaskValuesSerializer
+    etag_field = "version"
+    export_datasets = {
+        "tasks": (
+            "id",
+            "title",
+            "description",
+            "completed",
+            "status",
+            "priority",
+            "created_date",
+        ),
+        "history": ("id", "task", "old_status", "new_status", "updated_date"),
+    }
+    sync_fields = (
+        "id",
+        "title",
+        "description",
+        "completed",
+        "priority",
+        "status",
+        "version",
+        "deleted",
+    )
+    sync_salt = "task_manager.tasks.sync-token"
 
     permission_classes = (IsAuthenticated,)
 
@@ -46,11 +194,151 @@ class TaskViewSet(ModelViewSet):
     filterset_class = TaskFilter
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user, deleted=False)
+        return Task.objects.live_for(self.request.user).select_related("user")
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    # * Soft Delete: The row stays behind as the tombstone of the delta sync
+    # * Conditional like `update`: `If-Match` has to carry the current `ETag` (412), a save racing this one is a 409
+    def perform_destroy(self, instance):
+        self.check_if_match(instance)
+        try:
+            with transaction.atomic():
+                instance.soft_delete()
+        except StaleTaskError:
+            raise Conflict()
+
+    # ? Refer: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/If-Match
+    def check_if_match(self, instance):
+        if_match = self.request.headers.get("If-Match")
+        if if_match and if_match.strip() != "*":
+            if self.get_etag(instance.version) not in (
+                tag.strip() for tag in if_match.split(",")
+            ):
+                raise PreconditionFailed()
+
+    # * Conditional Update: `If-Match` has to carry the current `ETag` (412), a save racing this one is a 409
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        self.check_if_match(instance)
+
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                self.perform_update(serializer)
+        except StaleTaskError:
+            raise Conflict()
+        response = Response(serializer.data)
+        response["ETag"] = self.get_etag(serializer.instance.version)
+        return response
+
+    # * Export: Streams the (filtered) tasks or their history through a server-side cursor
+    # * e.g. `/api/v1/task/export/?dataset=history&filetype=jsonl&compress=gzip`
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        dataset = request.query_params.get("dataset", "tasks")
+        export_format = request.query_params.get("filetype", "csv")
+        compress = request.query_params.get("compress") == "gzip"
+        if dataset not in self.export_datasets:
+            raise ValidationError({"dataset": list(self.export_datasets)})
+        if export_format not in EXPORT_WRITERS:
+            raise ValidationError({"filetype": list(EXPORT_WRITERS)})
+
+        tasks = self.filter_queryset(self.get_queryset())
+        if dataset == "history":
+            queryset = TaskHistory.objects.filter(task__in=tasks.values("pk"))
+        else:
+            queryset = tasks
+        columns = self.export_datasets[dataset]
+        # * The rows are read while the response streams, after `replica_reads()` has ended: route them now
+        queryset = queryset.using(queryset.db)
+        rows = export_rows(queryset, columns, settings.TASK_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(
+            export_stream(
+                export_format,
+                columns,
+                rows,
+                settings.TASK_EXPORT_BUFFER_SIZE,
+                compress,
+            ),
+            content_type="application/gzip"
+            if compress
+            else EXPORT_CONTENT_TYPES[export_format],
+        )
+        filename = f"{dataset}.{export_format}" + (".gz" if compress else "")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    # * Delta Sync: Tasks created, changed or soft-deleted (`"deleted": true` tombstones) since the `next_token`
+    # * passed as `since`, without `since` a full sync of the live tasks. Pages of `TASK_SYNC_PAGE_SIZE` along
+    # * the `(change_seq, id)` cursor of `task_sync_idx`, fetch again with `next_token` while `has_more`
+    # * e.g. `/api/v1/task/sync/?since=<next_token>`
+    @action(detail=False, methods=["get"])
+    def sync(self, request):
+        tasks = Task.objects.filter(user=request.user)
+        since = request.query_params.get("since")
+        if since:
+            try:
+                token = signing.loads(since, salt=self.sync_salt)
+            except signing.BadSignature:
+                raise ValidationError({"since": ["Invalid sync token."]})
+            if token["u"] != request.user.pk:
+                raise ValidationError({"since": ["Invalid sync token."]})
+            change_seq, pk = token["s"], token["p"]
+            tasks = tasks.filter(
+                Q(change_seq__gt=change_seq) | Q(change_seq=change_seq, pk__gt=pk)
+            )
+        else:
+            change_seq, pk = 0, 0
+            tasks = tasks.live()
+
+        page_size = settings.TASK_SYNC_PAGE_SIZE
+        changes = list(
+            tasks.order_by("change_seq", "pk").values(*self.sync_fields, "change_seq")[
+                : page_size + 1
+            ]
+        )
+        has_more = len(changes) > page_size
+        changes = changes[:page_size]
+        if changes:
+            change_seq, pk = changes[-1]["change_seq"], changes[-1]["id"]
+        for change in changes:
+            del change["change_seq"]
+        next_token = signing.dumps(
+            {"u": request.user.pk, "s": change_seq, "p": pk}, salt=self.sync_salt
+        )
+        return Response(
+            {"changes": changes, "next_token": next_token, "has_more": has_more}
+        )
+
+    # * Import: Queues an uploaded CSV / JSON Lines `file`, progress is polled on `/api/v1/task-import/<id>/`
+    # * `filetype` defaults to the file extension, e.g. an export saved as `tasks.jsonl`
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=(MultiPartParser,),
+    )
+    def import_file(self, request):
+        file = request.FILES.get("file")
+        if file is None:
+            raise ValidationError({"file": ["No file was submitted."]})
+        file_format = request.data.get("filetype") or Path(file.name).suffix[1:]
+        if file_format not in IMPORT_READERS:
+            raise ValidationError({"filetype": list(IMPORT_READERS)})
+
+        task_import = TaskImport.objects.create(
+            user=request.user, file=file, file_format=file_format
+        )
+        # * `ATOMIC_REQUESTS`: The worker must not look for the row before it is committed
+        transaction.on_commit(lambda: import_tasks.delay(task_import.pk))
+        return Response(
+            TaskImportSerializer(task_import).data, status=status.HTTP_202_ACCEPTED
+        )
+
 
 class TaskHistorySerializer(ModelSerializer):
     task = TaskSerializer(read_only=True)
@@ -74,7 +362,14 @@ class TaskHistoryFilter(FilterSet):
         )
 
 
-class TaskHistoryViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
+@query_budget(5, constant=True)
+class TaskHistoryViewSet(
+    AtomicWritesMixin,
+    ReplicaReadsMixin,
+    RetrieveModelMixin,
+    ListModelMixin,
+    GenericViewSet,
+):
     queryset = TaskHistory.objects.all()
     serializer_class = TaskHistorySerializer
 
@@ -85,7 +380,65 @@ class TaskHistoryViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
 
     def get_queryset(self):
         # append .query to view RAW SQL
+        # * `select_related`: Every row nests its task and the task's user, one query instead of two per row
         return TaskHistory.objects.filter(
             task__pk=self.kwargs["task_pk"],
             task__user=self.request.user,
+        ).select_related("task__user")
+
+
+class TaskImportViewSet(
+    AtomicWritesMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet
+):
+    queryset = TaskImport.objects.all()
+    serializer_class = TaskImportSerializer
+
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return TaskImport.objects.filter(user=self.request.user).order_by("-pk")
+
+
+# * Access Token: Issues a short lived `SignedTokenAuthentication` token for the authenticated user
+class AccessTokenView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        return Response(
+            {
+                "access_token": SignedTokenAuthentication.issue_token(request.user),
+                "token_type": SignedTokenAuthentication.keyword,
+                "expires_in": settings.SIGNED_TOKEN_MAX_AGE,
+            }
+        )
+
+
+# * Task Event Stream: Server-Sent Events for the user's task changes instead of polling the task list
+# * Each open stream holds a worker thread, serve it from threaded (`gunicorn --threads`) or ASGI workers
+# ? Refer: https://html.spec.whatwg.org/multipage/server-sent-events.html
+class TaskEventStreamView(AtomicWritesMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (EventStreamRenderer, FastJSONRenderer)
+
+    def get(self, request):
+        response = StreamingHttpResponse(
+            event_stream(request.user.pk), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # * nginx: pass events through as they are written
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+# * Time Zones: The time zone picker's suggestions, grouped by region, e.g. `/api/v1/time-zones/?search=new york`
+# * Without `search` every zone, the catalogue only changes with a deploy so browsers keep it for a day
+@method_decorator(cache_control(public=True, max_age=24 * 60 * 60), name="get")
+class TimeZoneSearchView(APIView):
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        search = request.query_params.get("search", "")
+        groups = search_time_zones(search) if search else time_zone_groups()
+        return Response(
+            [{"region": region, "zones": zones} for region, zones in groups.items()]
         )
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_manager.tasks'
+
+    def ready(self):
+        # * Connection health checks and stats, see `task_manager.tasks.pooling`
+        # * Celery signals of the sampling profiler, see `task_manager.tasks.profiling`
+        from task_manager.tasks import pooling, profiling  # noqa F401
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from task_manager.tasks.pooling import check_connections
+from task_manager.tasks.routers import replica_reads
+
+# * Async Reads: ASGI versions of the hot API read endpoints, routed in `config/urls.py` when `TASKS_ASYNC_READS` is on
+# * Django 3.2 has no async ORM and runs every sync view on one shared thread per process, so GET runs the viewset
+# * action (authentication, permissions, queries, serialization) in the thread pool instead and renders JSON on the
+# * event loop. Any other method goes through the sync viewset unchanged.
+# ? Refer: https://docs.djangoproject.com/en/3.2/topics/async/
+
+
+def run_action(viewset_class, action, request, kwargs):
+    """`viewset_class.dispatch()` for a single read `action`, JSON responses are left for the event loop to render"""
+    # * Pool threads never see `request_started` / `request_finished`, recycle their connections like Celery does
+    close_old_connections()
+    check_connections()
+    viewset = viewset_class(
+        action_map={"get": action}, args=(), kwargs=kwargs, format_kwarg=None
+    )
+    request = viewset.initialize_request(request, **kwargs)
+    viewset.request, viewset.headers = request, viewset.default_response_headers
+    atomic = nullcontext() if settings.TASKS_NON_ATOMIC_READS else transaction.atomic()
+    try:
+        with atomic:
+            viewset.initial(request)
+            with replica_reads(request):
+                response = getattr(viewset, action)(request, **kwargs)
+    except Exception as exc:
+        response = viewset.handle_exception(exc)
+    finally:
+        close_old_connections()
+    response = viewset.finalize_response(request, response)
+    # * e.g. the browsable API renders forms from the database, keep it off the event loop
+    if not isinstance(response.accepted_renderer, JSONRenderer):
+        response.render()
+    return response
+
+
+def render(response):
+    # * A plain `HttpResponse` skips Django's trip to the sync thread for `SimpleTemplateResponse.render()`
+    if not response.is_rendered:
+        response.render()
+    return HttpResponse(
+        response.content, status=response.status_code, headers=dict(response.items())
+    )
+
+
+def async_reads(viewset_class, actions):
+    """ASGI view for a viewset route: GET runs `actions["get"]` in the thread pool, other methods the sync view"""
+    sync_view = viewset_class.as_view(actions)
+
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        response = await sync_to_async(run_action, thread_sensitive=False)(
+            viewset_class, actions["get"], request, kwargs
+        )
+        return render(response)
+
+    # * Same opt-outs as DRF's views, `ATOMIC_REQUESTS` cannot wrap a coroutine
+    view.csrf_exempt = True
+    # * What DRF's `as_view()` sets too, `get_query_budget` finds the viewset's budget through it
+    view.cls, view.actions = viewset_class, actions
+    return transaction.non_atomic_requests(view)
+
+
+# * Threaded Streaming (ASGI Handler): Django 3.2 iterates streaming responses on the event loop, a blocking
+# * iterator (event streams, exports) would stall every other request of the process. Each chunk is pulled
+# * in a dedicated pool instead, long lived streams never starve the reads above of threads.
+class ThreadedStreamingASGIHandler(ASGIHandler):
+    def __init__(self):
+        super().__init__()
+        self.streaming_executor = ThreadPoolExecutor(
+            settings.ASGI_STREAMING_THREADS, thread_name_prefix="asgi-streaming"
+        )
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [
+            (header.encode("ascii"), value.encode("latin1"))
+            for header, value in response.items()
+        ]
+        headers += [
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+            for cookie in response.cookies.values()
+        ]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": headers,
+            }
+        )
+        chunks = iter(response)
+        next_chunk = sync_to_async(
+            next, thread_sensitive=False, executor=self.streaming_executor
+        )
+        try:
+            while (chunk := await next_chunk(chunks, None)) is not None:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body"})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
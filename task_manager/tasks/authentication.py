@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from task_manager.tasks.caching import cache_user, get_cached_user, token_cache_key
+
+
+# * Cached Token (Authentication): `TokenAuthentication` without the `Token` + `User` join on every request
+# * Cache entries are dropped when the token is deleted (rotation) or the user changes, see `task_manager.tasks.models`
+# ? Refer: https://www.django-rest-framework.org/api-guide/authentication/#custom-authentication
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user_id = cache.get(token_cache_key(key))
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(token_cache_key(key), user.pk, settings.TOKEN_CACHE_TIMEOUT)
+            cache_user(user)
+            return (user, token)
+
+        user = get_cached_user(user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return (user, self.get_model()(key=key, user=user))
+
+
+# * Signed Access Token (Authentication): Stateless, short lived tokens for high frequency API clients
+# * The token carries the user id and is signed with `SECRET_KEY`, nothing is stored server side.
+# * Part of the password hash is signed in, so changing the password revokes every issued token.
+# * Usage: `POST /api/v1/token/access/` and then send `Authorization: Signed <access_token>`
+# ? Refer: https://docs.djangoproject.com/en/4.0/topics/signing/#verifying-timestamped-values
+class SignedTokenAuthentication(TokenAuthentication):
+    keyword = "Signed"
+    salt = "task_manager.tasks.access-token"
+
+    @classmethod
+    def issue_token(cls, user):
+        return signing.dumps(
+            {"user": user.pk, "hash": user.get_session_auth_hash()[:12]},
+            salt=cls.salt,
+            compress=True,
+        )
+
+    def authenticate_credentials(self, key):
+        try:
+            payload = signing.loads(
+                key, salt=self.salt, max_age=settings.SIGNED_TOKEN_MAX_AGE
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(_("Token expired."))
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        user = get_cached_user(payload["user"])
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        if user.get_session_auth_hash()[:12] != payload["hash"]:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        return (user, None)
@@ -0,0 +1,43 @@
+from typing import NamedTuple
+
+from task_manager.tasks.transactions import SAFE_METHODS
+
+# * Query Budgets: The most SQL queries a view may run per request, declared next to the view and enforced on
+# * every test client request by `task_manager/conftest.py`
+# * `constant=True`: The count must not grow with the number of rows, a statement that runs
+# * `REPEATED_STATEMENT_LIMIT` times or more in one request (an N+1) fails the test whatever the total
+# * Reads by default, writes legitimately scale with what they change (e.g. the priority cascade)
+REPEATED_STATEMENT_LIMIT = 3
+
+
+class QueryBudget(NamedTuple):
+    max_queries: int = None
+    constant: bool = False
+    methods: tuple = SAFE_METHODS
+
+
+# * Declaring: On a view class (`View`, `APIView`, `ViewSet`) for all of its handlers, or on one handler method
+# * (`get`, a viewset action) which then wins over the class
+def query_budget(max_queries=None, constant=False, methods=SAFE_METHODS):
+    def decorator(view):
+        view.query_budget = QueryBudget(max_queries, constant, tuple(methods))
+        return view
+
+    return decorator
+
+
+# * Lookup: The budget of the view a `ResolverMatch` points to, for the handler `method` runs
+def get_query_budget(match, method):
+    view = match.func
+    view_class = getattr(view, "view_class", None) or getattr(view, "cls", None)
+    if view_class is None:
+        budget = getattr(view, "query_budget", None)
+    else:
+        actions = getattr(view, "actions", None) or {}
+        handler = getattr(view_class, actions.get(method.lower(), method.lower()), None)
+        budget = getattr(handler, "query_budget", None) or getattr(
+            view_class, "query_budget", None
+        )
+    if budget is not None and method in budget.methods:
+        return budget
+    return None
@@ -0,0 +1,72 @@
+# * User Cache: Keeps `auth_user` rows in the cache so hot paths (session and token authentication) skip the lookup
+# * Entries are dropped whenever the `User` is saved or deleted, see the receivers in `task_manager.tasks.models`
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+
+def user_cache_key(user_id):
+    return f"tasks:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User._default_manager.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def cache_user(user):
+    cache.set(user_cache_key(user.pk), user, settings.USER_CACHE_TIMEOUT)
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+# * Token Cache: DRF token key -> user id, the `User` itself comes from the user cache
+def token_cache_key(key):
+    return f"tasks:token:{key}"
+
+
+def invalidate_cached_token(key):
+    cache.delete(token_cache_key(key))
+
+
+# * Session User: Same checks as `django.contrib.auth.get_user`, minus the `auth_user` query on a cache hit
+# ? Refer: https://docs.djangoproject.com/en/4.0/topics/auth/default/#session-invalidation-on-password-change
+def get_session_user(request):
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    user = cache.get(user_cache_key(user_id))
+    if user is None:
+        # * Cache miss: Let Django load and verify the user, then keep it for the next requests
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache_user(user)
+        return user
+
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (
+        session_hash
+        and constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        request.session.flush()
+        return AnonymousUser()
+    if not user.is_active:
+        return AnonymousUser()
+    user.backend = backend_path
+    return user
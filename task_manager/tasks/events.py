@@ -0,0 +1,158 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# * Task Events: Per-user change notifications pushed to `TaskEventStreamView` instead of clients polling the task list
+# * Published from the model signals (and bulk writes) once the writing transaction commits
+# * Fan-out is pluggable like `CACHES`: `LocalEventBus` within one process (development, tests),
+# * `RedisEventBus` across web processes through Redis pub/sub
+# ? Refer: https://developer.mozilla.org/en-US/docs/Web/API/Server-sent_events/Using_server-sent_events
+logger = logging.getLogger(__name__)
+TASK_EVENT_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "completed",
+    "priority",
+    "status",
+    "version",
+)
+
+
+class LocalEventBus:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers[user_id])
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # * A stalled stream misses events rather than holding up the writer
+                pass
+
+    @contextmanager
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(self.queue_size)
+        with self.lock:
+            self.subscribers[user_id].add(subscriber)
+        try:
+            yield LocalSubscription(subscriber)
+        finally:
+            with self.lock:
+                self.subscribers[user_id].discard(subscriber)
+
+
+class LocalSubscription:
+    def __init__(self, queue):
+        self.queue = queue
+
+    def get(self, timeout):
+        """The next event, `None` if there was none within `timeout` seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class RedisEventBus:
+    def __init__(self, location, prefix="tasks:events"):
+        import redis
+
+        self.client = redis.Redis.from_url(location)
+        self.prefix = prefix
+
+    def channel(self, user_id):
+        return f"{self.prefix}:{user_id}"
+
+    def publish(self, user_id, event):
+        self.client.publish(
+            self.channel(user_id), json.dumps(event, cls=DjangoJSONEncoder)
+        )
+
+    @contextmanager
+    def subscribe(self, user_id):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel(user_id))
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            pubsub.close()
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    def get(self, timeout):
+        message = self.pubsub.get_message(timeout=timeout)
+        return json.loads(message["data"]) if message else None
+
+
+@lru_cache(maxsize=None)
+def get_event_bus():
+    config = settings.TASK_EVENTS_BUS
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+@receiver(setting_changed)
+def reset_event_bus(setting, **kwargs):
+    if setting == "TASK_EVENTS_BUS":
+        get_event_bus.cache_clear()
+
+
+def publish_event(user_id, event_type, **data):
+    """Sends the event once the current transaction commits, rolled back writes are never announced"""
+    event = {"type": event_type, **data}
+
+    def publish():
+        # * The write already committed, a fan-out outage must not turn it into an error response
+        try:
+            get_event_bus().publish(user_id, event)
+        except Exception:
+            logger.exception("Could not publish %s for user %s", event_type, user_id)
+
+    transaction.on_commit(publish)
+
+
+def task_event_data(task):
+    return {field: getattr(task, field) for field in TASK_EVENT_FIELDS}
+
+
+def format_event(event_type, data=None, retry=None):
+    lines = [f"event: {event_type}"]
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    lines.append(f"data: {json.dumps(data or {}, cls=DjangoJSONEncoder)}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def event_stream(user_id):
+    """Server-Sent Events for `user_id` until `TASK_EVENTS_MAX_AGE`, with a comment line as heartbeat"""
+    with get_event_bus().subscribe(user_id) as subscription:
+        # * Subscribed before the first byte: a client (re)syncs once on "ready" and misses nothing after it
+        yield format_event("ready", retry=settings.TASK_EVENTS_RETRY * 1000)
+        # * An open stream needs no database connection, hand it back instead of holding it idle
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close()
+        deadline = time.monotonic() + settings.TASK_EVENTS_MAX_AGE
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = subscription.get(min(settings.TASK_EVENTS_HEARTBEAT, remaining))
+            yield format_event(event["type"], event) if event else b": keep-alive\n\n"
@@ -0,0 +1,82 @@
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+# * Exports: Generators feeding a `StreamingHttpResponse`, nothing is held beyond one buffered chunk
+# ? Refer: https://docs.djangoproject.com/en/3.2/howto/outputting-csv/#streaming-large-csv-files
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/jsonl; charset=utf-8",
+}
+
+
+class Echo:
+    """File-like object handing each row written by `csv.writer` straight back"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+EXPORT_WRITERS = {"csv": csv_lines, "jsonl": jsonl_lines}
+
+
+# * Rows: A server-side cursor streams the whole queryset out of one statement, but behind PgBouncer in transaction
+# * mode (`DISABLE_SERVER_SIDE_CURSORS`) psycopg2 would fetch every row up front. There the rows come in keyset
+# * pages instead, `WHERE id > <last id> ORDER BY id LIMIT chunk_size`, one statement per page
+# * `columns` starts with the primary key
+def export_rows(queryset, columns, chunk_size):
+    rows = queryset.order_by("pk").values_list(*columns)
+    if not connections[queryset.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        yield from rows.iterator(chunk_size=chunk_size)
+        return
+    last = None
+    while True:
+        page = list((rows if last is None else rows.filter(pk__gt=last))[:chunk_size])
+        yield from page
+        if len(page) < chunk_size:
+            return
+        last = page[-1][0]
+
+
+# * Buffering: One write per ~`size` bytes instead of one per row
+def buffered(lines, size):
+    buffer, length = [], 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(buffer).encode()
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+# * Gzip: `wbits=31` writes the gzip header and trailer around the deflate stream
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(export_format, columns, rows, chunk_size, compress=False):
+    chunks = buffered(EXPORT_WRITERS[export_format](columns, rows), chunk_size)
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,207 @@
+import codecs
+import csv
+import json
+from bisect import bisect_right
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ModelSerializer
+
+from task_manager.tasks.events import publish_event
+from task_manager.tasks.models import Task, TaskImport, next_change_seq
+
+# * Imports: Streams an uploaded file, validates it chunk by chunk and writes it in one transaction
+# * Columns / keys not listed in `TaskImportRowSerializer` (e.g. `id` from an export) are ignored
+
+
+ROW_FIELDS = ("title", "description", "completed", "priority", "status")
+
+
+class TaskImportRowSerializer(ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ROW_FIELDS
+
+
+# * Optional CSV columns: An empty cell falls back to the model default instead of failing validation
+CSV_OPTIONAL_COLUMNS = ("completed", "priority", "status")
+
+
+def csv_records(file):
+    for record in csv.DictReader(codecs.iterdecode(file, "utf-8-sig")):
+        yield {
+            key: value
+            for key, value in record.items()
+            if not (key in CSV_OPTIONAL_COLUMNS and value == "")
+        }
+
+
+def jsonl_records(file):
+    """Malformed lines are yielded as the `ValueError` they raised, reported later as row errors"""
+    for line in codecs.iterdecode(file, "utf-8-sig"):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield error
+            continue
+        yield record if isinstance(record, dict) else ValueError(
+            "Expected a JSON object"
+        )
+
+
+IMPORT_READERS = {"csv": csv_records, "jsonl": jsonl_records}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# * Priority Blocks: `priority_cascade_logic` for a whole batch, resolved in memory
+# * Pending priorities are kept as contiguous runs, inserting into a run shifts everything above it by one
+# * just like the row-by-row cascade, so the final priorities are known before touching the database
+class PriorityBlocks:
+    def __init__(self, items):
+        """`items`: `(priority, key)` pairs ordered by priority"""
+        self.starts = []
+        self.runs = []
+        for priority, key in items:
+            if self.runs and priority == self.end(-1):
+                self.runs[-1].append(key)
+            elif self.runs and priority < self.end(-1):
+                # * Duplicate priority: Never picked by the cascade's `.get()`, left untouched
+                continue
+            else:
+                self.starts.append(priority)
+                self.runs.append([key])
+
+    def end(self, index):
+        return self.starts[index] + len(self.runs[index])
+
+    def insert(self, priority, key):
+        index = bisect_right(self.starts, priority) - 1
+        if index >= 0 and priority <= self.end(index):
+            self.runs[index].insert(priority - self.starts[index], key)
+        else:
+            index += 1
+            self.starts.insert(index, priority)
+            self.runs.insert(index, [key])
+        # * The run grew into the next one: they cascade together from now on
+        if index + 1 < len(self.starts) and self.starts[index + 1] == self.end(index):
+            self.starts.pop(index + 1)
+            self.runs[index].extend(self.runs.pop(index + 1))
+
+    def __iter__(self):
+        for start, run in zip(self.starts, self.runs):
+            for offset, key in enumerate(run):
+                yield key, start + offset
+
+
+def validate_records(task_import, records):
+    """Returns the valid rows as tuples of `ROW_FIELDS`, defaults filled in"""
+    child = TaskImportRowSerializer()
+    defaults = [Task._meta.get_field(field).get_default() for field in ROW_FIELDS]
+    rows, errors, failed, processed = [], [], 0, 0
+    for chunk in chunked(records, settings.TASK_IMPORT_CHUNK_SIZE):
+        for record in chunk:
+            processed += 1
+            try:
+                if isinstance(record, ValueError):
+                    raise ValidationError({"non_field_errors": [str(record)]})
+                data = child.run_validation(record)
+            except ValidationError as error:
+                failed += 1
+                if len(errors) < settings.TASK_IMPORT_MAX_ERRORS:
+                    errors.append({"row": processed, "errors": error.detail})
+                continue
+            rows.append(
+                tuple(
+                    data.get(field, default)
+                    for field, default in zip(ROW_FIELDS, defaults)
+                )
+            )
+        # * Progress: Outside of any transaction, pollers see it straight away
+        TaskImport.objects.filter(pk=task_import.pk).update(
+            rows_processed=processed, rows_failed=failed
+        )
+    task_import.rows_processed, task_import.rows_failed = processed, failed
+    task_import.errors = errors
+    return rows
+
+
+def write_rows(user, rows):
+    """Cascades the existing pending tasks once and inserts `rows` with their final priorities"""
+    batch_size = settings.TASK_IMPORT_CHUNK_SIZE
+    with transaction.atomic():
+        # * Change Sequence: One `change_seq` for every task the import shifts or inserts
+        # * Taken before the pending tasks are locked, the lock order of `Task.save()` (see `TaskChangeSequence`)
+        change_seq = next_change_seq(user.pk)
+        pending = (
+            Task.objects.live_for(user)
+            .pending()
+            .select_for_update()
+            .order_by("priority", "pk")
+            .values_list("priority", "pk")
+        )
+        existing = {pk: priority for priority, pk in pending}
+        blocks = PriorityBlocks(
+            (priority, ("task", pk)) for pk, priority in existing.items()
+        )
+        for index, row in enumerate(rows):
+            task = dict(zip(ROW_FIELDS, row))
+            if not task["completed"]:
+                blocks.insert(task["priority"], ("row", index))
+
+        priorities = {}
+        shifted = []
+        for (kind, key), priority in blocks:
+            if kind == "row":
+                priorities[key] = priority
+            elif existing[key] != priority:
+                shifted.append(
+                    Task(pk=key, priority=priority, version=F("version") + 1)
+                )
+        for task in shifted:
+            task.change_seq = change_seq
+        Task.objects.bulk_update(
+            shifted, ["priority", "version", "change_seq"], batch_size=batch_size
+        )
+
+        for start in range(0, len(rows), batch_size):
+            tasks = []
+            end = start + batch_size
+            for index, row in enumerate(rows[start:end], start):
+                task = Task(user=user, **dict(zip(ROW_FIELDS, row)))
+                task.priority = priorities.get(index, task.priority)
+                task.change_seq = change_seq
+                tasks.append(task)
+            Task.objects.bulk_create(tasks, batch_size=batch_size)
+        publish_event(user.pk, "tasks.changed", reason="import")
+
+
+def run_import(task_import):
+    TaskImport.objects.filter(pk=task_import.pk).update(status="PROCESSING")
+    try:
+        with task_import.file.open("rb") as file:
+            rows = validate_records(
+                task_import, IMPORT_READERS[task_import.file_format](file)
+            )
+        write_rows(task_import.user, rows)
+    except Exception as error:
+        task_import.status = "FAILED"
+        task_import.errors = task_import.errors + [{"row": None, "errors": str(error)}]
+        task_import.completed_date = timezone.now()
+        task_import.save()
+        raise
+    task_import.status = "COMPLETED"
+    task_import.rows_imported = len(rows)
+    task_import.completed_date = timezone.now()
+    task_import.save()
+    return task_import
@@ -0,0 +1,93 @@
+import copy
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+# * Structured Logging: Building blocks for `LOGGING`, one JSON object per line on stdout
+# * `JSONFormatter` writes the record and whatever was passed as `extra=`, `SampleFilter` thins out
+# * high-frequency records and `QueueStreamHandler` keeps the write off the logging thread
+# ? Refer: https://docs.python.org/3/howto/logging-cookbook.html#dealing-with-handlers-that-block
+# * Attributes every `LogRecord` has, anything else came in through `extra=`
+RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.thread,
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+# * Sampling: Keeps `rate` of the records below WARNING, each kept record carries its `sample_rate`
+# * so counts can be scaled back up. Attach it to the loggers of hot paths, not to a handler.
+class SampleFilter(logging.Filter):
+    def __init__(self, rate=1.0, name=""):
+        super().__init__(name)
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+# * Non-blocking Stream: Logging calls only put the record on a queue, a background thread formats it and writes
+# * to `stream`. A stalled stdout pipe (log shipper, container runtime) then never holds up a request or task.
+# * Messages and tracebacks are resolved in the logging thread, the objects they refer to may change afterwards.
+class QueueStreamHandler(QueueHandler):
+    def __init__(self, stream=None):
+        self.target = logging.StreamHandler(stream)
+        self.closed = False
+        super().__init__(None)
+        self.start()
+        # * Gunicorn / Celery prefork: The thread does not survive `fork()`, children start their own
+        os.register_at_fork(after_in_child=self.start)
+
+    def start(self):
+        if self.closed:
+            return
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def close(self):
+        # * `logging.shutdown()` at exit: writes out whatever is still queued
+        if not self.closed:
+            self.closed = True
+            self.listener.stop()
+        self.target.close()
+        super().close()
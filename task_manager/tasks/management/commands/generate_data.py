@@ -0,0 +1,362 @@
+import io
+import itertools
+import multiprocessing
+import random
+from bisect import bisect_right
+from datetime import timedelta
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from task_manager.tasks.models import (
+    EmailTaskReport,
+    Task,
+    TaskChangeSequence,
+    TaskHistory,
+    User,
+)
+
+# * Synthetic Data: Millions of users, their tasks, the `TaskHistory` chain behind every task's status and an
+# * `EmailTaskReport` schedule, to reproduce production sized problems locally
+# * e.g. `python manage.py generate_data --users 1000000 --tasks 10000000 --workers 8`
+# * Rows are written with `COPY` on PostgreSQL (`executemany` elsewhere) by `--workers` processes. Users and tasks
+# * get their ids up front so no process waits for another, and every chunk has its own random generator seeded
+# * from `--seed` and the chunk number: the same arguments produce the same rows whatever `--workers` is.
+# * Timestamps are relative to midnight (UTC) of the day the command runs.
+# * Bypasses `save()` and signals: no events are published and caches are not invalidated.
+# ? Refer: https://www.postgresql.org/docs/current/populate.html
+
+# * Mostly finished work, as in an account that has been used for a while
+STATUS_WEIGHTS = {"COMPLETED": 55, "PENDING": 25, "IN_PROGRESS": 12, "CANCELLED": 8}
+# * Transitions that lead to each status, weighted: `TaskHistory` rows of a task end in its current status
+HISTORY_CHAINS = {
+    "PENDING": [
+        ((), 90),
+        ((("PENDING", "IN_PROGRESS"), ("IN_PROGRESS", "PENDING")), 10),
+    ],
+    "IN_PROGRESS": [((("PENDING", "IN_PROGRESS"),), 100)],
+    "COMPLETED": [
+        ((("PENDING", "IN_PROGRESS"), ("IN_PROGRESS", "COMPLETED")), 70),
+        ((("PENDING", "COMPLETED"),), 30),
+    ],
+    "CANCELLED": [
+        ((("PENDING", "CANCELLED"),), 60),
+        ((("PENDING", "IN_PROGRESS"), ("IN_PROGRESS", "CANCELLED")), 40),
+    ],
+}
+TIME_ZONES = {
+    "UTC": 30,
+    "Asia/Kolkata": 25,
+    "America/New_York": 15,
+    "Europe/London": 10,
+    "Europe/Berlin": 10,
+    "America/Los_Angeles": 5,
+    "Asia/Tokyo": 5,
+}
+VERBS = "Write Review Fix Plan Call Update Send Book Clean Read".split()
+NOUNS = "report invoice slides bug meeting newsletter budget garage notes flights"
+TITLES = [f"{verb} {noun}" for verb in VERBS for noun in NOUNS.split()]
+# * Share of tasks that are soft deleted, sync tombstones
+DELETED_RATE = 0.02
+# * Task counts per user follow a Pareto distribution, a few users own most tasks (80/20 at `alpha` 1.16)
+PARETO_ALPHA = 1.16
+
+USER_COLUMNS = (
+    "id",
+    "password",
+    "last_login",
+    "is_superuser",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "is_staff",
+    "is_active",
+    "date_joined",
+)
+REPORT_COLUMNS = ("user", "send_time", "time_zone")
+SEQUENCE_COLUMNS = ("user", "value")
+TASK_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "completed",
+    "created_date",
+    "deleted",
+    "user",
+    "priority",
+    "status",
+    "version",
+    "change_seq",
+)
+HISTORY_COLUMNS = ("old_status", "new_status", "updated_date", "task")
+
+# * Plan: Set by the parent before the pool forks, inherited by the workers instead of pickled into every chunk
+PLAN = {}
+
+
+def copy_value(value):
+    if value is None:
+        return "\\N"
+    if value is True or value is False:
+        return "t" if value else "f"
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    return str(value)
+
+
+# * Writing: `COPY ... FROM STDIN` (text format) on PostgreSQL, one `executemany` INSERT on other backends
+def write_rows(model, fields, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [model._meta.get_field(field) for field in fields]
+    names = ", ".join(connection.ops.quote_name(column.column) for column in columns)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(map(copy_value, row)))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({names}) FROM STDIN", buffer)
+        else:
+            adapt = connection.ops.adapt_datetimefield_value
+            datetimes = [
+                index
+                for index, column in enumerate(columns)
+                if column.get_internal_type() == "DateTimeField"
+            ]
+            if datetimes:
+                rows = [list(row) for row in rows]
+                for row in rows:
+                    for index in datetimes:
+                        row[index] = adapt(row[index])
+            placeholders = ", ".join(["%s"] * len(columns))
+            cursor.executemany(
+                f"INSERT INTO {table} ({names}) VALUES ({placeholders})", rows
+            )
+
+
+def weighted(options):
+    population = list(options)
+    return population, list(itertools.accumulate(options.values()))
+
+
+def chunk_random(kind, number):
+    return random.Random(f"{PLAN['seed']}:{kind}:{number}")
+
+
+# * Users: `EmailTaskReport` at a random quarter hour of the next day and `TaskChangeSequence` at their task count
+def generate_users(number):
+    rng = chunk_random("users", number)
+    first = number * PLAN["user_chunk"]
+    last = min(first + PLAN["user_chunk"], PLAN["users"])
+    now, prefix = PLAN["now"], PLAN["prefix"]
+    zones, zone_weights = weighted(TIME_ZONES)
+    users, reports, sequences = [], [], []
+    for n in range(first, last):
+        user_id = PLAN["first_user_id"] + n
+        joined = now - timedelta(seconds=rng.random() * PLAN["days"] * 86400)
+        users.append(
+            (
+                user_id,
+                PLAN["password"],
+                None,
+                False,
+                f"{prefix}-{n}",
+                "",
+                "",
+                f"{prefix}-{n}@example.com",
+                False,
+                True,
+                joined,
+            )
+        )
+        (zone,) = rng.choices(zones, cum_weights=zone_weights)
+        send_time = now + timedelta(days=1, minutes=15 * rng.randrange(96))
+        reports.append((user_id, send_time, zone))
+        sequences.append((user_id, PLAN["counts"][n]))
+    with transaction.atomic():
+        write_rows(User, USER_COLUMNS, users)
+        write_rows(EmailTaskReport, REPORT_COLUMNS, reports)
+        write_rows(TaskChangeSequence, SEQUENCE_COLUMNS, sequences)
+    return len(users), 0, 0
+
+
+# * Tasks: A chunk is a range of the global task numbering, it may start and end inside a user's tasks.
+# * Priority and `change_seq` are the position in the user's list, so pending priorities are unique with gaps
+# * where finished tasks sit, and the history moves forward in time from the task's creation
+def generate_tasks(number):
+    rng = chunk_random("tasks", number)
+    first = number * PLAN["task_chunk"]
+    last = min(first + PLAN["task_chunk"], PLAN["tasks"])
+    now, days, starts = PLAN["now"], PLAN["days"], PLAN["starts"]
+    statuses, status_weights = weighted(STATUS_WEIGHTS)
+    chains = {
+        status: weighted(dict(options)) for status, options in HISTORY_CHAINS.items()
+    }
+    tasks, history = [], []
+    user = bisect_right(starts, first) - 1
+    for n, status in zip(
+        range(first, last),
+        rng.choices(statuses, cum_weights=status_weights, k=last - first),
+    ):
+        while starts[user + 1] <= n:
+            user += 1
+        position = n - starts[user] + 1
+        task_id = PLAN["first_task_id"] + n
+        # * `bisect` on the cumulative weights, what `rng.choices()` does without its per call set up
+        chain_options, chain_weights = chains[status]
+        chain = chain_options[
+            bisect_right(chain_weights, rng.random() * chain_weights[-1])
+        ]
+        description = f"Generated task {position} of {PLAN['prefix']}-{user}"
+        changed = now - timedelta(seconds=rng.random() * days * 86400)
+        for old_status, new_status in chain:
+            changed = min(now, changed + timedelta(seconds=rng.expovariate(1 / 172800)))
+            history.append((old_status, new_status, changed, task_id))
+        tasks.append(
+            (
+                task_id,
+                f"{TITLES[rng.randrange(len(TITLES))]} #{position}",
+                "" if rng.random() < 0.3 else description,
+                status == "COMPLETED",
+                changed,
+                rng.random() < DELETED_RATE,
+                PLAN["first_user_id"] + user,
+                position,
+                status,
+                1 + len(chain),
+                position,
+            )
+        )
+    with transaction.atomic():
+        write_rows(Task, TASK_COLUMNS, tasks)
+        write_rows(TaskHistory, HISTORY_COLUMNS, history)
+    return 0, len(tasks), len(history)
+
+
+def task_counts(users, tasks, rng):
+    weights = [rng.paretovariate(PARETO_ALPHA) for _ in range(users)]
+    scale = tasks / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for n in range(tasks - sum(counts)):
+        counts[n % users] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = "Generates users, tasks, task history and email reports in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--prefix", default="generated")
+        parser.add_argument("--password", default="generated")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--days", type=int, default=365, help="How far back the data goes"
+        )
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--user-chunk-size", type=int, default=10000)
+        parser.add_argument("--task-chunk-size", type=int, default=50000)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete the users of an earlier run with the same prefix, and their rows, first",
+        )
+
+    def reset(self, prefix):
+        # * Plain SQL: `QuerySet.delete()` would load every task to send `post_delete`
+        users = f"SELECT id FROM {User._meta.db_table} WHERE username LIKE %s"
+        tasks = f"SELECT id FROM {Task._meta.db_table} WHERE user_id IN ({users})"
+        statements = [
+            (TaskHistory, f"task_id IN ({tasks})"),
+            (Task, f"user_id IN ({users})"),
+            (EmailTaskReport, f"user_id IN ({users})"),
+            (TaskChangeSequence, f"user_id IN ({users})"),
+            (User, "username LIKE %s"),
+        ]
+        pattern = f"{prefix}-%"
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model, where in statements:
+                cursor.execute(
+                    f"DELETE FROM {model._meta.db_table} WHERE {where}", [pattern]
+                )
+                self.stdout.write(
+                    f"Deleted {cursor.rowcount} {model._meta.verbose_name_plural}"
+                )
+
+    def run(self, function, chunks, workers):
+        if workers == 1:
+            yield from map(function, range(chunks))
+            return
+        # * Forked children must not share the parent's database connection
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield from pool.imap_unordered(function, range(chunks))
+
+    def handle(self, users, tasks, prefix, password, seed, days, workers, **options):
+        if users < 1:
+            raise CommandError("--users must be at least 1")
+        if connection.vendor == "sqlite" and workers > 1:
+            self.stdout.write("SQLite allows one writer at a time, using one worker")
+            workers = 1
+        if options["reset"]:
+            self.reset(prefix)
+
+        start = perf_counter()
+        counts = task_counts(users, tasks, random.Random(seed))
+        PLAN.update(
+            seed=seed,
+            prefix=prefix,
+            days=days,
+            users=users,
+            tasks=tasks,
+            user_chunk=options["user_chunk_size"],
+            task_chunk=options["task_chunk_size"],
+            # * One hash for every user, hashing is the slow part of creating users
+            password=make_password(password),
+            now=timezone.now().replace(hour=0, minute=0, second=0, microsecond=0),
+            counts=counts,
+            starts=[0, *itertools.accumulate(counts)],
+            first_user_id=(User.objects.aggregate(id=Max("id"))["id"] or 0) + 1,
+            first_task_id=(Task.objects.aggregate(id=Max("id"))["id"] or 0) + 1,
+        )
+
+        totals = [0, 0, 0]
+        phases = [
+            (generate_users, -(-users // PLAN["user_chunk"])),
+            (generate_tasks, -(-tasks // PLAN["task_chunk"])),
+        ]
+        # * Every user exists before the first task refers to it
+        for function, chunks in phases:
+            for done, result in enumerate(self.run(function, chunks, workers), 1):
+                totals = [total + count for total, count in zip(totals, result)]
+                self.stdout.write(
+                    f"{function.__name__} {done}/{chunks}: {totals[0]} users, "
+                    f"{totals[1]} tasks, {totals[2]} history rows "
+                    f"({perf_counter() - start:.1f}s)"
+                )
+
+        # * Ids were chosen here, move the sequences of PostgreSQL past them
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [User, Task, TaskHistory, EmailTaskReport]
+            ):
+                cursor.execute(sql)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {totals[0]} users, {totals[1]} tasks and {totals[2]} history rows "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,106 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# * Import Time: What a cold web / worker process imports before it is ready, self time summed per installed app
+# * (other packages by their top-level name). The target runs in fresh interpreters with the current settings,
+# * e.g. `python manage.py importtime worker --settings=config.settings.worker`
+# ? Refer: https://docs.python.org/3/using/cmdline.html#cmdoption-X
+TARGETS = {
+    "web": "import config.wsgi",
+    "asgi": "import config.asgi",
+    # * What `celery worker` does before it reports ready: Django setup and every app's `tasks` module
+    "worker": "from config.celery_app import app; app.loader.import_default_modules()",
+}
+# * `-X importtime` only sees `import` statements, Django loads apps and models with `importlib.import_module()`:
+# * send those through `__import__` too, or the self time of every app module would go missing
+PRELUDE = """
+import importlib, importlib.util, sys
+def import_module(name, package=None):
+    name = importlib.util.resolve_name(name, package)
+    __import__(name)
+    return sys.modules[name]
+importlib.import_module = import_module
+"""
+# * `import time: <self us> | <cumulative us> | <module, indented by depth>`, the header line does not match
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)$", re.M)
+
+
+class Command(BaseCommand):
+    help = "Reports the import time of a web or worker process per installed app"
+    # * Only inspects other processes, whose own settings may leave out apps `config/urls.py` needs
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=TARGETS)
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Start-ups without -X importtime to time, the median is reported",
+        )
+
+    def run(self, *options, code):
+        # * `DJANGO_SETTINGS_MODULE` is inherited, `--settings` sets it too. `settings.SETTINGS_MODULE` is `None`
+        # * under `override_settings()` (pytest-django's `settings` fixture).
+        process = subprocess.run(
+            [sys.executable, *options, "-c", code],
+            cwd=settings.ROOT_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode:
+            errors = IMPORT_TIME.sub("", process.stderr).strip().splitlines()
+            raise CommandError(errors[-1] if errors else process.returncode)
+        return process
+
+    def group(self, module):
+        app_modules = sorted(
+            (app.name for app in apps.get_app_configs()), key=len, reverse=True
+        )
+        for name in app_modules:
+            if module == name or module.startswith(f"{name}."):
+                return name
+        return module.split(".", 1)[0]
+
+    def handle(self, target, top, repeat, **options):
+        code = TARGETS[target]
+        stderr = self.run("-X", "importtime", code=PRELUDE + code).stderr
+
+        groups = defaultdict(lambda: [0, 0])
+        for self_us, module in IMPORT_TIME.findall(stderr):
+            group = groups[self.group(module)]
+            group[0] += int(self_us)
+            group[1] += 1
+
+        wall = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.run(code=code)
+            wall.append(time.perf_counter() - start)
+        wall.sort()
+
+        total = sum(self_us for self_us, _ in groups.values())
+        self.stdout.write(
+            f"{'package / app':<40} {'self ms':>9} {'%':>6} {'modules':>8}"
+        )
+        for name, (self_us, count) in sorted(
+            groups.items(), key=lambda item: item[1][0], reverse=True
+        )[:top]:
+            self.stdout.write(
+                f"{name:<40} {self_us / 1000:>9.1f} {self_us / total:>6.1%} {count:>8}"
+            )
+        self.stdout.write(
+            f"{target} ({os.environ['DJANGO_SETTINGS_MODULE']}): "
+            f"{sum(count for _, count in groups.values())} modules, "
+            f"{total / 1000:.1f} ms importing, "
+            f"{wall[len(wall) // 2] * 1000:.1f} ms start-up (median of {repeat})"
+        )
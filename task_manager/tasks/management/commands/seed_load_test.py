@@ -0,0 +1,119 @@
+import json
+import random
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from task_manager.tasks.models import EmailTaskReport, Task, User
+
+# * Load Test Data: `--users` users named `<prefix>-<n>` sharing one password, each with an API token, an email
+# * report and an even share of `--tasks` tasks, plus the manifest `loadtests/locustfile.py` reads them from
+# * e.g. `python manage.py seed_load_test --users 100 --tasks 1000000 --reset`
+DEFAULT_MANIFEST = Path(settings.ROOT_DIR) / "loadtests" / "dataset.json"
+# * Mostly open work, as in a live task list
+STATUS_WEIGHTS = {"PENDING": 40, "IN_PROGRESS": 20, "COMPLETED": 30, "CANCELLED": 10}
+
+
+class Command(BaseCommand):
+    help = "Seeds users, tokens and tasks for the Locust load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--tasks", type=int, default=1000)
+        parser.add_argument("--prefix", default="loadtest")
+        parser.add_argument("--password", default="loadtest")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete the users of an earlier run with the same prefix first",
+        )
+
+    def task(self, user, priority, rng):
+        (status,) = rng.choices(list(STATUS_WEIGHTS), weights=STATUS_WEIGHTS.values())
+        return Task(
+            title=f"Load test task {priority}",
+            description=f"Seeded for {user.username}",
+            completed=status == "COMPLETED",
+            priority=priority,
+            status=status,
+            user=user,
+        )
+
+    def handle(self, users, tasks, prefix, password, seed, batch_size, **options):
+        if users < 1:
+            raise CommandError("--users must be at least 1")
+        if options["reset"]:
+            deleted, _ = User.objects.filter(
+                username__regex=rf"^{re.escape(prefix)}-[0-9]+$"
+            ).delete()
+            self.stdout.write(f"Deleted {deleted} rows of an earlier run")
+
+        # * One hash for every user, hashing is the slow part of creating users
+        password_hash = make_password(password)
+        usernames = [f"{prefix}-{n}" for n in range(users)]
+        with transaction.atomic():
+            User.objects.bulk_create(
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    password=password_hash,
+                )
+                for username in usernames
+            )
+            # * SQLite (and older backends) do not return primary keys from `bulk_create`
+            # * `in_bulk` splits the lookup by the backend's query parameter limit
+            created_users = User.objects.in_bulk(usernames, field_name="username")
+            accounts = [created_users[username] for username in usernames]
+            tokens = Token.objects.bulk_create(
+                Token(user=user, key=Token.generate_key()) for user in accounts
+            )
+            # * `bulk_create` sends no `post_save`, the `EmailTaskReport` of a real signup is created here
+            EmailTaskReport.objects.bulk_create(
+                EmailTaskReport(user=user) for user in accounts
+            )
+
+        rng = random.Random(seed)
+        per_user, remainder = divmod(tasks, users)
+        created = 0
+        for index, user in enumerate(accounts):
+            count = per_user + (index < remainder)
+            for start in range(0, count, batch_size):
+                Task.objects.bulk_create(
+                    [
+                        self.task(user, priority, rng)
+                        for priority in range(
+                            start + 1, min(start + batch_size, count) + 1
+                        )
+                    ],
+                    batch_size=batch_size,
+                )
+            created += count
+            self.stdout.write(f"{user.username}: {count} tasks ({created}/{tasks})")
+
+        options["manifest"].parent.mkdir(parents=True, exist_ok=True)
+        options["manifest"].write_text(
+            json.dumps(
+                {
+                    "password": password,
+                    "tasks": tasks,
+                    "users": [
+                        {"username": token.user.username, "token": token.key}
+                        for token in tokens
+                    ],
+                },
+                indent=2,
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {users} users and {tasks} tasks, manifest: {options['manifest']}"
+            )
+        )
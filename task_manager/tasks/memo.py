@@ -0,0 +1,21 @@
+# * Request Memoisation: Evaluate each distinct task query at most once while serving a single request
+# * Results are stored on the `HttpRequest` itself, so nothing outlives the request/response cycle
+MEMO_ATTRIBUTE = "_task_query_memo"
+
+
+def _memo_for(request):
+    # * DRF wraps the Django request, always memoise on the underlying `HttpRequest`
+    request = getattr(request, "_request", request)
+    return request.__dict__.setdefault(MEMO_ATTRIBUTE, {})
+
+
+def memoised(request, key, compute):
+    memo = _memo_for(request)
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+# * Priming: Record a value that was computed as a by-product of another query
+def prime(request, key, value):
+    _memo_for(request)[key] = value
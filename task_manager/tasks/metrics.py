@@ -0,0 +1,261 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from celery.signals import worker_init
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry
+from prometheus_client import Counter as PrometheusCounter
+from prometheus_client import (
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+# * Request Metrics: Recorded by `PerformanceMiddleware`, exported in the Prometheus text format by `metrics_view`
+# * Every request is timed, sampled requests (`PERF_SAMPLE_RATE`) also account for their queries and cache reads
+# * Gunicorn runs several processes: with `PROMETHEUS_MULTIPROC_DIR` set they share their metrics through files
+# ? Refer: https://github.com/prometheus/client_python#multiprocess-mode-eg-gunicorn
+logger = logging.getLogger(__name__)
+
+REQUEST_DURATION = Histogram(
+    "tasks_http_request_duration_seconds",
+    "Time spent serving a request, middleware included",
+    ["view", "method", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "tasks_http_response_size_bytes",
+    "Size of non-streaming response bodies",
+    ["view"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, float("inf")),
+)
+REQUEST_QUERIES = Histogram(
+    "tasks_http_request_db_queries",
+    "Database queries per sampled request",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+REQUEST_QUERY_DURATION = Histogram(
+    "tasks_http_request_db_duration_seconds",
+    "Time spent in database queries per sampled request",
+    ["view"],
+)
+CACHE_READS = PrometheusCounter(
+    "tasks_http_cache_reads",
+    "Cache reads of sampled requests",
+    ["view", "result"],
+)
+REPEATED_QUERIES = PrometheusCounter(
+    "tasks_http_repeated_queries",
+    "Sampled requests running the same query (duplicate) or the same SQL (similar, N+1) repeatedly",
+    ["view", "kind"],
+)
+
+# * Email Report Metrics: Recorded by `send_email_reminder` in the Celery workers, see `EmailReportRun`
+REPORT_RUN_DURATION = Histogram(
+    "tasks_email_report_run_duration_seconds",
+    "Time spent by one send_email_reminder run",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float("inf")),
+)
+REPORT_RUN_QUERIES = Histogram(
+    "tasks_email_report_run_db_queries",
+    "Database queries per send_email_reminder run",
+    buckets=(1, 10, 100, 1000, 10000, 100000, float("inf")),
+)
+REPORT_EMAILS = PrometheusCounter(
+    "tasks_email_reports",
+    "Email reports found due, rendered, sent and failed",
+    ["stage"],
+)
+REPORT_SMTP_DURATION = Histogram(
+    "tasks_email_report_smtp_duration_seconds",
+    "Time spent handing one report to the email backend",
+)
+REPORT_SEND_LAG = Histogram(
+    "tasks_email_report_lag_seconds",
+    "Time between a report's send_time and its email going out",
+    buckets=(1, 5, 10, 30, 60, 300, 900, 3600, 4 * 3600, 24 * 3600, float("inf")),
+)
+
+CURRENT_STATS = ContextVar("request_stats", default=None)
+MISSING = object()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def repeated_queries(self, similar_threshold):
+        """`(kind, count, sql)` for every statement run more than once with the same parameters
+        (duplicate) or at least `similar_threshold` times with any (similar)"""
+        for sql, count in self.statements.items():
+            if count >= similar_threshold:
+                yield "similar", count, sql
+        for (sql, _), count in self.executions.items():
+            if count > 1 and self.statements[sql] < similar_threshold:
+                yield "duplicate", count, sql
+
+
+# * Query Accounting: An execute wrapper on every connection, a no-op outside of sampled requests
+# * Installed when a connection is created (threads of the ASGI pool, Celery) and for the process's own connections
+# ? Refer: https://docs.djangoproject.com/en/3.2/topics/db/instrumentation/
+def record_query(execute, sql, params, many, context):
+    stats = CURRENT_STATS.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.query_seconds += time.perf_counter() - start
+        stats.queries += 1
+        stats.statements[sql] += 1
+        stats.executions[sql, repr(params)] += 1
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def record_connection_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+# * Cache Accounting: `get()` (and `get_many()` where the backend does not build it on `get()`) of every cache
+# * count hits and misses, new backends are wrapped as each thread creates them
+def count_cache_reads(backend):
+    if getattr(backend, "counts_reads", False):
+        return backend
+    backend.counts_reads = True
+    get, get_many = backend.get, backend.get_many
+
+    def counted_get(key, default=None, *args, **kwargs):
+        value = get(key, MISSING, *args, **kwargs)
+        stats = CURRENT_STATS.get()
+        if stats is not None:
+            if value is MISSING:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is MISSING else value
+
+    def counted_get_many(keys, *args, **kwargs):
+        keys = list(keys)
+        values = get_many(keys, *args, **kwargs)
+        stats = CURRENT_STATS.get()
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+    backend.get = counted_get
+    if type(backend).get_many is not BaseCache.get_many:
+        backend.get_many = counted_get_many
+    return backend
+
+
+def instrument():
+    """Query and cache accounting for this process, called once by `PerformanceMiddleware`"""
+    for connection in connections.all():
+        install_query_recorder(connection)
+    if not getattr(caches, "counts_reads", False):
+        create_connection = caches.create_connection
+        caches.create_connection = lambda alias: count_cache_reads(
+            create_connection(alias)
+        )
+        caches.counts_reads = True
+    for backend in caches.all():
+        count_cache_reads(backend)
+
+
+# * Outside of Requests: The same query and cache accounting around any block, e.g. a Celery task
+@contextmanager
+def record_stats():
+    for connection in connections.all():
+        install_query_recorder(connection)
+    stats = RequestStats()
+    token = CURRENT_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        CURRENT_STATS.reset(token)
+
+
+def observe_request(view, method, response, seconds, stats):
+    REQUEST_DURATION.labels(view, method, response.status_code).observe(seconds)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(view).observe(len(response.content))
+    if stats is None:
+        return
+    REQUEST_QUERIES.labels(view).observe(stats.queries)
+    REQUEST_QUERY_DURATION.labels(view).observe(stats.query_seconds)
+    if stats.cache_hits:
+        CACHE_READS.labels(view, "hit").inc(stats.cache_hits)
+    if stats.cache_misses:
+        CACHE_READS.labels(view, "miss").inc(stats.cache_misses)
+
+
+def report_repeated_queries(view, stats, similar_threshold):
+    for kind, count, sql in stats.repeated_queries(similar_threshold):
+        REPEATED_QUERIES.labels(view, kind).inc()
+        logger.warning("%s ran a %s query %d times: %s", view, kind, count, sql)
+
+
+def server_timing(seconds, stats):
+    """`Server-Timing` header value, durations in milliseconds"""
+    return ", ".join(
+        [
+            f"total;dur={seconds * 1000:.1f}",
+            f'db;dur={stats.query_seconds * 1000:.1f};desc="{stats.queries} queries"',
+            f'cache;desc="{stats.cache_hits} hits, {stats.cache_misses} misses"',
+        ]
+    )
+
+
+def observe_report_run(run, smtp_seconds, lags):
+    REPORT_RUN_DURATION.observe(run.duration)
+    REPORT_RUN_QUERIES.observe(run.queries)
+    for stage in ("due", "rendered", "sent", "failed"):
+        count = getattr(run, "reports_due" if stage == "due" else f"emails_{stage}")
+        if count:
+            REPORT_EMAILS.labels(stage).inc(count)
+    for seconds in smtp_seconds:
+        REPORT_SMTP_DURATION.observe(seconds)
+    for seconds in lags:
+        REPORT_SEND_LAG.observe(seconds)
+
+
+def metrics_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def export_metrics():
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+# * Worker Metrics: Celery workers serve no requests, with `WORKER_METRICS_PORT` set the main process exposes
+# * the metrics on a port of its own. Tasks run in the prefork children, set `PROMETHEUS_MULTIPROC_DIR` to see them
+@worker_init.connect
+def start_worker_metrics_server(**kwargs):
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=metrics_registry())
@@ -0,0 +1,134 @@
+import asyncio
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from task_manager.tasks.caching import get_session_user
+from task_manager.tasks.metrics import (
+    CURRENT_STATS,
+    RequestStats,
+    instrument,
+    observe_request,
+    report_repeated_queries,
+    server_timing,
+)
+from task_manager.tasks.profiling import (
+    Sampler,
+    request_profile_source,
+    save_capture,
+    view_name,
+)
+from task_manager.tasks.routers import pin_to_primary
+from task_manager.tasks.transactions import SAFE_METHODS
+
+
+# * Cached Authentication (Middleware): Drop-in replacement for `AuthenticationMiddleware`,
+# * serving `request.user` from the cache
+# ? Refer: https://docs.djangoproject.com/en/4.0/ref/middleware/#django.contrib.auth.middleware.AuthenticationMiddleware
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_request_user(request))
+
+
+def get_cached_request_user(request):
+    if not hasattr(request, "_cached_user"):
+        request._cached_user = get_session_user(request)
+    return request._cached_user
+
+
+# * Replica Pin (Middleware): A successful unsafe request pins its user to the primary database for a short while
+# * Has to sit below the authentication middleware, DRF updates `request.user` for token clients by then
+# * `MiddlewareMixin` keeps it async-capable under ASGI
+class ReplicaPinMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return response
+
+
+# * Performance (Middleware): Wall time and response size of every request, plus queries, query time and
+# * cache reads of a `PERF_SAMPLE_RATE` share of them, see `task_manager.tasks.metrics`
+# * Sampled requests get a `Server-Timing` header (`PERF_SERVER_TIMING`) and have repeated queries logged
+# * Sits first in `MIDDLEWARE` so the time of the other middleware counts too
+# ? Refer: https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Server-Timing
+class PerformanceMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        instrument()
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            CURRENT_STATS.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        # * Sync views run on copies of this context, their queries and cache reads land in the same `stats`
+        stats, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            CURRENT_STATS.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def start(self):
+        stats = RequestStats() if random.random() < settings.PERF_SAMPLE_RATE else None
+        return stats, CURRENT_STATS.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, start):
+        seconds = time.perf_counter() - start
+        match = request.resolver_match
+        view = (match.view_name or match._func_path) if match else "<unresolved>"
+        observe_request(view, request.method, response, seconds, stats)
+        if stats is not None:
+            report_repeated_queries(
+                view, stats, settings.PERF_SIMILAR_QUERIES_THRESHOLD
+            )
+            if settings.PERF_SERVER_TIMING:
+                response["Server-Timing"] = server_timing(seconds, stats)
+        return response
+
+
+# * Profiling (Middleware): Samples the stack of the requests `request_profile_source` picks, see
+# * `task_manager.tasks.profiling`, below the authentication middleware as the header is for staff only
+# * The response of a profiled request names its `ProfileCapture` in `X-Profile-Capture`
+class ProfilingMiddleware(MiddlewareMixin):
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        source = request_profile_source(request)
+        if source is None:
+            return self.get_response(request)
+        sampler = Sampler().start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        capture = save_capture(
+            sampler,
+            "request",
+            view_name(request),
+            f"{request.method} {request.get_full_path()} [{response.status_code}]",
+            source,
+            request.user,
+        )
+        response["X-Profile-Capture"] = str(capture.pk)
+        return response
+
+    async def __acall__(self, request):
+        # * Async views hop between the event loop and the thread pool, one thread's samples would not add up
+        return await self.get_response(request)
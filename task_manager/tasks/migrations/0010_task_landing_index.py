@@ -0,0 +1,17 @@
+# Generated by Django 3.2.12 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_emailtaskreport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'deleted', 'completed', 'priority'], name='task_landing_idx'),
+        ),
+    ]
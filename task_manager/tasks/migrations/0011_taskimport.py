@@ -0,0 +1,32 @@
+# Generated by Django 3.2.12 on 2026-10-19 11:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0010_task_landing_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='task-imports/%Y/%m/%d/')),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], max_length=8)),
+                ('status', models.CharField(choices=[('QUEUED', 'QUEUED'), ('PROCESSING', 'PROCESSING'), ('COMPLETED', 'COMPLETED'), ('FAILED', 'FAILED')], default='QUEUED', max_length=16)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('rows_imported', models.IntegerField(default=0)),
+                ('rows_failed', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('completed_date', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.12 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tasks", "0012_task_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskChangeSequence",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="auth.user",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="change_seq",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["user", "change_seq", "id"], name="task_sync_idx"
+            ),
+        ),
+    ]
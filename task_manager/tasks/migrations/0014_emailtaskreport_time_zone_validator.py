@@ -0,0 +1,19 @@
+# Generated by Django 3.2.12 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import task_manager.tasks.timezones
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_task_change_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailtaskreport',
+            name='time_zone',
+            field=models.CharField(default='UTC', max_length=32, validators=[task_manager.tasks.timezones.validate_time_zone]),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.12 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_emailtaskreport_time_zone_validator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailReportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('duration', models.FloatField(default=0)),
+                ('reports_due', models.IntegerField(default=0)),
+                ('emails_rendered', models.IntegerField(default=0)),
+                ('emails_sent', models.IntegerField(default=0)),
+                ('emails_failed', models.IntegerField(default=0)),
+                ('queries', models.IntegerField(default=0)),
+                ('smtp_seconds', models.FloatField(default=0)),
+                ('mean_lag', models.FloatField(blank=True, null=True)),
+                ('max_lag', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
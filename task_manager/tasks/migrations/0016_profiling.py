@@ -0,0 +1,49 @@
+# Generated by Django 3.2.12 on 2026-10-19 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import task_manager.tasks.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0015_emailreportrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileTrigger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('request', 'Request'), ('task', 'Celery task')], default='request', max_length=16)),
+                ('target', models.CharField(blank=True, help_text='URL name, view or task name (e.g. task-list, GenericAllTaskView, send_email_reminder), blank for any', max_length=200)),
+                ('remaining', models.PositiveIntegerField(default=1)),
+                ('expires_at', models.DateTimeField(default=task_manager.tasks.models.profile_trigger_expiry)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileCapture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('kind', models.CharField(choices=[('request', 'Request'), ('task', 'Celery task')], max_length=16)),
+                ('source', models.CharField(choices=[('header', 'Header'), ('trigger', 'Trigger')], max_length=16)),
+                ('name', models.CharField(max_length=200)),
+                ('label', models.CharField(max_length=255)),
+                ('duration', models.FloatField()),
+                ('samples', models.PositiveIntegerField()),
+                ('interval', models.FloatField()),
+                ('file', models.FileField(storage=task_manager.tasks.models.profile_storage, upload_to='%Y/%m/%d/')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
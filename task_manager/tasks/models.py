@@ -1,21 +1,82 @@
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta
 
-import pytz
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models import F
 
 # For signals
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
+from django.utils.functional import cached_property
+
+from rest_framework.authtoken.models import Token
+
+from task_manager.tasks.caching import invalidate_cached_token, invalidate_cached_user
+from task_manager.tasks.events import publish_event, task_event_data
+from task_manager.tasks.timezones import validate_time_zone
 
-TIMEZONES = tuple(zip(pytz.all_timezones, pytz.all_timezones))
 STATUS_CHOICES = (
     ("PENDING", "PENDING"),
     ("IN_PROGRESS", "IN_PROGRESS"),
     ("COMPLETED", "COMPLETED"),
     ("CANCELLED", "CANCELLED"),
 )
+IMPORT_STATUS_CHOICES = (
+    ("QUEUED", "QUEUED"),
+    ("PROCESSING", "PROCESSING"),
+    ("COMPLETED", "COMPLETED"),
+    ("FAILED", "FAILED"),
+)
+IMPORT_FORMAT_CHOICES = (("csv", "CSV"), ("jsonl", "JSON Lines"))
+# * Sampled by `LOGGING`, it logs on every task save
+logger = logging.getLogger(__name__)
+
+
+# * Stale Task: Raised by `Task.save()` / `Task.soft_delete()` when the row was changed since the instance was read
+class StaleTaskError(Exception):
+    pass
+
+
+# * Task QuerySet: Shared scopes for the `deleted=False, user=...` filters used across views, viewsets and tasks
+# ? Refer: https://docs.djangoproject.com/en/4.0/topics/db/managers/#creating-a-manager-with-queryset-methods
+class TaskQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(deleted=False)
+
+    def live_for(self, user):
+        return self.live().filter(user=user)
+
+    def pending(self):
+        return self.filter(completed=False)
+
+    def completed(self):
+        return self.filter(completed=True)
+
+
+# * Change Sequence: Per-user counter stamped on every task write, the cursor of the delta sync (`TaskViewSet.sync`)
+# * The row stays locked until the writing transaction commits, so a user's sequence numbers commit in order
+# * and a client never skips a change that commits after it synced
+# * Lock Order: Every writer takes its user's sequence row before it locks or updates any task row (`Task.save()`,
+# * both priority cascades, imports), the other way round a cascade and a plain save of the same user deadlock
+# * Trade-off: A user's writing transactions run one at a time from their first task write until commit, other
+# * users never wait on it. The optimistic cascade still reads its run without locks and only queues up for the
+# * `UPDATE`, see `benchmarks/cascade_contention.py --users` for same-user against spread out writers
+class TaskChangeSequence(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+
+def next_change_seq(user_id):
+    """Bumps and returns the change sequence of `user_id`, call it inside the writing transaction"""
+    sequences = TaskChangeSequence.objects.filter(user_id=user_id)
+    if not sequences.update(value=F("value") + 1):
+        TaskChangeSequence.objects.get_or_create(user_id=user_id)
+        sequences.update(value=F("value") + 1)
+    return sequences.values_list("value", flat=True).get()
 
 
 class Task(models.Model):
@@ -29,10 +90,75 @@ class Task(models.Model):
     status = models.CharField(
         max_length=100, choices=STATUS_CHOICES, default=STATUS_CHOICES[0][0]
     )
+    # * Optimistic Concurrency: Bumped by every update, see `_do_update`
+    version = models.PositiveIntegerField(default=1)
+    # * Delta Sync: `TaskChangeSequence` value of the last write, `created_date` is `auto_now` and not monotonic
+    change_seq = models.BigIntegerField(default=0)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # * Landing pages: live tasks of a user, split by `completed` and ordered by `priority`
+            models.Index(
+                fields=["user", "deleted", "completed", "priority"],
+                name="task_landing_idx",
+            ),
+            # * Delta Sync: changes of a user after a `(change_seq, id)` cursor, soft-deleted rows are the tombstones
+            models.Index(fields=["user", "change_seq", "id"], name="task_sync_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} [Priority: {self.priority}]"
 
+    def save(self, *args, **kwargs):
+        if self.user_id is None:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(savepoint=False):
+            self.change_seq = next_change_seq(self.user_id)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "change_seq"}
+            return super().save(*args, **kwargs)
+
+    # * Conditional Update: `UPDATE ... SET version = n + 1 WHERE id = ... AND version = n`
+    # * No row updated while the row exists means someone else saved it first
+    # ? Refer: https://docs.djangoproject.com/en/3.2/ref/models/instances/#how-django-knows-to-update-vs-insert
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        version_field = self._meta.get_field("version")
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, self.version + 1))
+        updated = super()._do_update(
+            base_qs.filter(version=self.version),
+            using,
+            pk_val,
+            values,
+            update_fields,
+            forced_update,
+        )
+        if updated:
+            self.version += 1
+        elif base_qs.filter(pk=pk_val).exists():
+            raise StaleTaskError(
+                f"Task {pk_val} is no longer at version {self.version}"
+            )
+        return updated
+
+    # * Soft Delete: `UPDATE ... SET deleted = true WHERE id = ... AND version = n`, the row stays behind as the
+    # * tombstone of the delta sync. `update()` sends no `post_save`, the `task.deleted` event is published here
+    def soft_delete(self):
+        with transaction.atomic(savepoint=False):
+            change_seq = next_change_seq(self.user_id)
+            updated = Task.objects.filter(pk=self.pk, version=self.version).update(
+                deleted=True, version=F("version") + 1, change_seq=change_seq
+            )
+            if not updated:
+                raise StaleTaskError(
+                    f"Task {self.pk} is no longer at version {self.version}"
+                )
+        self.deleted, self.version, self.change_seq = True, self.version + 1, change_seq
+        publish_event(self.user_id, "task.deleted", task=task_event_data(self))
+
 
 class TaskHistory(models.Model):
     old_status = models.CharField(
@@ -49,7 +175,125 @@ class TaskHistory(models.Model):
 class EmailTaskReport(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     send_time = models.DateTimeField(default=datetime.now, editable=True)
-    time_zone = models.CharField(max_length=32, choices=TIMEZONES, default="UTC")
+    # * Any `zoneinfo` zone, checked against the cached catalogue in `task_manager.tasks.timezones`
+    time_zone = models.CharField(
+        max_length=32, default="UTC", validators=[validate_time_zone]
+    )
+
+
+# * Email Report Run: What one `send_email_reminder` run did, kept for `EMAIL_REPORT_RUNS_MAX_AGE` days
+# * Lag is the time between a report's `send_time` and its email going out, i.e. how far behind the workers are
+class EmailReportRun(models.Model):
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
+    duration = models.FloatField(default=0)
+    reports_due = models.IntegerField(default=0)
+    emails_rendered = models.IntegerField(default=0)
+    emails_sent = models.IntegerField(default=0)
+    emails_failed = models.IntegerField(default=0)
+    queries = models.IntegerField(default=0)
+    smtp_seconds = models.FloatField(default=0)
+    mean_lag = models.FloatField(null=True, blank=True)
+    max_lag = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.started_at:%Y-%m-%d %H:%M:%S} [{self.emails_sent}/{self.reports_due}]"
+
+
+PROFILE_KIND_CHOICES = (("request", "Request"), ("task", "Celery task"))
+PROFILE_SOURCE_CHOICES = (("header", "Header"), ("trigger", "Trigger"))
+
+
+def profile_trigger_expiry():
+    return timezone.now() + timedelta(hours=1)
+
+
+# * Profile Captures: Kept on the local disk of the process that profiled, outside of `MEDIA_ROOT`
+# * Follows `PROFILE_CAPTURES_DIR` like the default storage follows `MEDIA_ROOT` (e.g. under `override_settings`)
+class ProfileStorage(FileSystemStorage):
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.PROFILE_CAPTURES_DIR)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == "PROFILE_CAPTURES_DIR":
+            self.__dict__.pop("base_location", None)
+            self.__dict__.pop("location", None)
+
+
+def profile_storage():
+    return ProfileStorage()
+
+
+# * Profile Trigger: Arms the sampling profiler (`task_manager.tasks.profiling`) for the next `remaining` requests to
+# * a view or runs of a Celery task, until `expires_at`
+class ProfileTrigger(models.Model):
+    kind = models.CharField(
+        max_length=16, choices=PROFILE_KIND_CHOICES, default=PROFILE_KIND_CHOICES[0][0]
+    )
+    target = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text=(
+            "URL name, view or task name "
+            "(e.g. task-list, GenericAllTaskView, send_email_reminder), blank for any"
+        ),
+    )
+    remaining = models.PositiveIntegerField(default=1)
+    expires_at = models.DateTimeField(default=profile_trigger_expiry)
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, editable=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.target or '*'} [{self.remaining} left]"
+
+
+# * Profile Capture: One sampled request or task run, the profile itself is a speedscope file
+class ProfileCapture(models.Model):
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    kind = models.CharField(max_length=16, choices=PROFILE_KIND_CHOICES)
+    source = models.CharField(max_length=16, choices=PROFILE_SOURCE_CHOICES)
+    # * View or task name, and the request line / task state
+    name = models.CharField(max_length=200)
+    label = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    duration = models.FloatField()
+    samples = models.PositiveIntegerField()
+    interval = models.FloatField()
+    file = models.FileField(upload_to="%Y/%m/%d/", storage=profile_storage)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.label} ({self.duration * 1000:.0f} ms)"
+
+
+# * Task Import: An uploaded CSV / JSON Lines file, processed by the `import_tasks` Celery task
+class TaskImport(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    file = models.FileField(upload_to="task-imports/%Y/%m/%d/")
+    file_format = models.CharField(max_length=8, choices=IMPORT_FORMAT_CHOICES)
+    status = models.CharField(
+        max_length=16,
+        choices=IMPORT_STATUS_CHOICES,
+        default=IMPORT_STATUS_CHOICES[0][0],
+    )
+    rows_processed = models.IntegerField(default=0)
+    rows_imported = models.IntegerField(default=0)
+    rows_failed = models.IntegerField(default=0)
+    # * Per-row errors: `[{"row": 3, "errors": {"title": [...]}}, ...]`, capped at `TASK_IMPORT_MAX_ERRORS`
+    errors = models.JSONField(default=list, blank=True)
+    created_date = models.DateTimeField(auto_now_add=True)
+    completed_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.file.name} [{self.status}]"
 
 
 @receiver(post_save, sender=User)
@@ -57,6 +301,20 @@ def create_EmailTaskReport(sender, instance, **kwargs):
     EmailTaskReport.objects.get_or_create(user=instance)
 
 
+# * Cached Users: Any change to a `User` (password, `is_active`, ...) must be seen by the next request
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_User(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+# * Cached Tokens: Rotating (delete + create) or deleting a token revokes it immediately
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_Token(sender, instance, **kwargs):
+    invalidate_cached_token(instance.key)
+
+
 @receiver(pre_save, sender=Task)
 def create_TaskHistory(sender, instance, **kwargs):
     try:
@@ -65,6 +323,55 @@ def create_TaskHistory(sender, instance, **kwargs):
             TaskHistory.objects.create(
                 old_status=old_task.status, new_status=instance.status, task=instance
             ).save()
-            print("Created TaskHistory Record!")
+            logger.info(
+                "Created TaskHistory Record!",
+                extra={
+                    "task_id": instance.id,
+                    "old_status": old_task.status,
+                    "new_status": instance.status,
+                },
+            )
     except:
-        print("Task not found!")
+        logger.debug("Task not found!", extra={"task_id": instance.id})
+
+
+# * Armed Triggers: Every process rereads them within `PROFILING_POLL_SECONDS`
+@receiver(post_save, sender=ProfileTrigger)
+@receiver(post_delete, sender=ProfileTrigger)
+def refresh_ProfileTrigger(sender, instance, **kwargs):
+    from task_manager.tasks.profiling import refresh_armed_triggers
+
+    refresh_armed_triggers()
+
+
+# * Task Events: Pushed to the owner's event streams after commit, see `task_manager.tasks.events`
+@receiver(post_save, sender=Task)
+def publish_Task(sender, instance, created, **kwargs):
+    if created:
+        event_type = "task.created"
+    elif instance.deleted:
+        event_type = "task.deleted"
+    else:
+        event_type = "task.updated"
+    publish_event(instance.user_id, event_type, task=task_event_data(instance))
+
+
+@receiver(post_delete, sender=Task)
+def publish_Task_delete(sender, instance, **kwargs):
+    publish_event(instance.user_id, "task.deleted", task=task_event_data(instance))
+
+
+@receiver(post_save, sender=TaskHistory)
+def publish_TaskHistory(sender, instance, created, **kwargs):
+    if created and instance.task_id:
+        publish_event(
+            instance.task.user_id,
+            "history.created",
+            history={
+                "id": instance.id,
+                "task": instance.task_id,
+                "old_status": instance.old_status,
+                "new_status": instance.new_status,
+                "updated_date": instance.updated_date,
+            },
+        )
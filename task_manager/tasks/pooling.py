@@ -0,0 +1,60 @@
+import time
+from collections import Counter, defaultdict
+
+from celery.signals import task_prerun, worker_process_init
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# * Connection Pooling: Django 3.2 keeps at most one connection per process and alias (`CONN_MAX_AGE`),
+# * pooling across processes is left to PgBouncer, see `DATABASE_POOL_MODE` in the production settings
+# * Health Checks: A persistent connection is pinged before being reused if it was not checked for
+# * `DATABASE_HEALTH_CHECK_INTERVAL` seconds, a restarted PgBouncer / Postgres then costs a reconnect
+# * instead of failing the next request or Celery task
+# ? Refer: https://docs.djangoproject.com/en/4.1/ref/databases/#persistent-database-connections
+CONNECTION_STATS = defaultdict(Counter)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    CONNECTION_STATS[connection.alias]["connects"] += 1
+    connection.health_checked_at = time.monotonic()
+
+
+@receiver(request_started)
+@task_prerun.connect
+def check_connections(**kwargs):
+    interval = settings.DATABASE_HEALTH_CHECK_INTERVAL
+    now = time.monotonic()
+    for connection in connections.all():
+        # * Never ping (or close) a connection someone is still using, e.g. an eager Celery task in a request
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        CONNECTION_STATS[connection.alias]["reuses"] += 1
+        if (
+            interval is None
+            or now - getattr(connection, "health_checked_at", 0) < interval
+        ):
+            continue
+        connection.health_checked_at = now
+        if not connection.is_usable():
+            CONNECTION_STATS[connection.alias]["health_check_failures"] += 1
+            connection.close()
+
+
+# * Celery prefork: Children inherit the parent's counters, Celery's Django fixup already drops the inherited sockets
+@worker_process_init.connect
+def reset_connection_stats(**kwargs):
+    CONNECTION_STATS.clear()
+
+
+def connection_stats():
+    return {
+        connection.alias: {
+            "open": connection.connection is not None,
+            **CONNECTION_STATS[connection.alias],
+        }
+        for connection in connections.all()
+    }
@@ -0,0 +1,220 @@
+import logging
+import sys
+import threading
+import time
+
+import orjson
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import F
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from task_manager.tasks.models import ProfileCapture, ProfileTrigger
+
+# * Sampling Profiler: A thread that records the stack of one other thread every `PROFILING_INTERVAL` seconds,
+# * written out in speedscope's format (open the file at https://www.speedscope.app)
+# * Captures a request when a staff user sends the `PROFILING_HEADER` header, or the next requests to a view /
+# * runs of a Celery task armed by a `ProfileTrigger` in the admin. Everything else pays for one dict lookup
+# * and, every `PROFILING_POLL_SECONDS`, one cache read of the armed triggers.
+# * WSGI (gunicorn) and Celery only, an ASGI request runs on several threads
+# ? Refer: https://github.com/jlfwong/speedscope/wiki/Importing-from-custom-sources
+# ? Refer: https://docs.python.org/3/library/sys.html#sys._current_frames
+logger = logging.getLogger(__name__)
+
+TRIGGERS_CACHE_KEY = "tasks:profiling:triggers"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Sampler:
+    def __init__(self, thread_id=None, interval=None, max_seconds=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval or settings.PROFILING_INTERVAL
+        self.max_seconds = max_seconds or settings.PROFILING_MAX_SECONDS
+        self.frames, self.frame_index = [], {}
+        self.samples, self.weights = [], []
+        self.stopped = threading.Event()
+        self.duration = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def run(self):
+        last = self.started
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            # * Weighted by the time since the last sample, the interval stretches while the GIL is held elsewhere
+            self.samples.append(self.stack(frame))
+            self.weights.append(now - last)
+            last = now
+            if now - self.started > self.max_seconds:
+                break
+
+    def stack(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            index = self.frame_index.get(key)
+            if index is None:
+                index = self.frame_index[key] = len(self.frames)
+                self.frames.append(
+                    {"name": code.co_name, "file": key[0], "line": key[1]}
+                )
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def speedscope(self, name):
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "task_manager.tasks.profiling",
+            "shared": {"frames": self.frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(self.weights),
+                    "samples": self.samples,
+                    "weights": self.weights,
+                }
+            ],
+        }
+
+
+# * Armed Triggers: `(id, kind, target, expires_at)` of every trigger with captures left, per process for
+# * `PROFILING_POLL_SECONDS` and in the cache, written through on every change of a `ProfileTrigger`
+# * The requests only ever read the cache: nothing armed costs no query, an evicted key disarms until the next change
+armed = {"checked": float("-inf"), "triggers": ()}
+
+
+def armed_triggers(kind):
+    now = time.monotonic()
+    if now - armed["checked"] >= settings.PROFILING_POLL_SECONDS:
+        armed.update(checked=now, triggers=cache.get(TRIGGERS_CACHE_KEY, ()))
+    if not armed["triggers"]:
+        return []
+    now = timezone.now()
+    return [
+        trigger
+        for trigger in armed["triggers"]
+        if trigger[1] == kind and trigger[3] > now
+    ]
+
+
+def refresh_armed_triggers():
+    triggers = tuple(
+        ProfileTrigger.objects.filter(
+            remaining__gt=0, expires_at__gt=timezone.now()
+        ).values_list("id", "kind", "target", "expires_at")
+    )
+    if triggers:
+        cache.set(TRIGGERS_CACHE_KEY, triggers, None)
+    else:
+        cache.delete(TRIGGERS_CACHE_KEY)
+    armed["checked"] = float("-inf")
+
+
+def matches(target, name):
+    return not target or name == target or name.endswith(f".{target}")
+
+
+# * Consuming: The first process to decrement `remaining` gets the capture, the others see the trigger run out
+def take_trigger(kind, name):
+    now = timezone.now()
+    for trigger_id, _, target, _ in armed_triggers(kind):
+        if matches(target, name):
+            taken = ProfileTrigger.objects.filter(
+                pk=trigger_id, remaining__gt=0, expires_at__gt=now
+            ).update(remaining=F("remaining") - 1)
+            refresh_armed_triggers()
+            if taken:
+                return trigger_id
+    return None
+
+
+def view_name(request):
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return "<unresolved>"
+    return match.view_name or match._func_path
+
+
+# * Request: "header" for a staff user's `PROFILING_HEADER`, "trigger" for an armed `ProfileTrigger`, else `None`
+def request_profile_source(request):
+    if settings.PROFILING_HEADER in request.META and request.user.is_staff:
+        return "header"
+    if armed_triggers("request") and take_trigger("request", view_name(request)):
+        return "trigger"
+    return None
+
+
+def save_capture(sampler, kind, name, label, source, user=None):
+    capture = ProfileCapture(
+        kind=kind,
+        name=name,
+        label=label[:255],
+        source=source,
+        user=user if user is not None and user.is_authenticated else None,
+        duration=sampler.duration,
+        samples=len(sampler.samples),
+        interval=sampler.interval,
+    )
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+    capture.file.save(
+        f"{stamp}-{name.replace('/', '_')}.speedscope.json",
+        ContentFile(orjson.dumps(sampler.speedscope(f"{label} ({name})"))),
+        save=False,
+    )
+    capture.save()
+    # * Oldest captures and their files go once there are more than `PROFILING_MAX_CAPTURES`
+    max_captures = settings.PROFILING_MAX_CAPTURES
+    for old in ProfileCapture.objects.all()[max_captures:]:
+        old.file.delete(save=False)
+        old.delete()
+    logger.warning(
+        "Profile captured",
+        extra={
+            "capture_id": capture.pk,
+            "profiled": name,
+            "duration": capture.duration,
+        },
+    )
+    return capture
+
+
+# * Celery: Prefork children run a task on their main thread, the sampler watches it from prerun to postrun
+task_samplers = {}
+
+
+@task_prerun.connect
+def start_task_profile(task_id, task, **kwargs):
+    if armed_triggers("task") and take_trigger("task", task.name):
+        task_samplers[task_id] = Sampler().start()
+
+
+@task_postrun.connect
+def finish_task_profile(task_id, task, state=None, **kwargs):
+    sampler = task_samplers.pop(task_id, None)
+    if sampler is None:
+        return
+    sampler.stop()
+    save_capture(sampler, "task", task.name, f"{task.name} [{state}]", "trigger")
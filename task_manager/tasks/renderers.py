@@ -0,0 +1,41 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from task_manager.tasks.events import format_event
+
+# * orjson: Optional, `JSONRenderer` output is kept as is when it is not installed
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+# * Fast JSON Renderer: Byte compatible with the compact, unicode `JSONRenderer` defaults
+# ? Refer: https://github.com/ijl/orjson#option
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(
+            data,
+            # * Dates, decimals, lazy strings etc. go through DRF's own encoder
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # * Same escaping of the line separators as `JSONRenderer`
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+# * Event Stream Renderer: Lets `text/event-stream` through content negotiation, errors go out as an "error" event
+class EventStreamRenderer(BaseRenderer):
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event("error", data)
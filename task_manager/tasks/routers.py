@@ -0,0 +1,98 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from task_manager.tasks.memo import memoised
+from task_manager.tasks.transactions import SAFE_METHODS
+
+# * Read Replicas: Reads of the tasks app's models go to `settings.DATABASE_REPLICAS` only inside `replica_reads()`
+# * Everything else (writes, reads in write requests, reads inside a transaction) stays on `default`
+# ? Refer: https://docs.djangoproject.com/en/3.2/topics/db/multi-db/#automatic-database-routing
+REPLICA_APP_LABEL = "tasks"
+_replica_reads = ContextVar("tasks_replica_reads", default=None)
+
+
+class ReplicaReads:
+    def __init__(self, request=None):
+        self.request = request
+        # * One replica per unit of work: replicas lag independently, switching mid-request could go back in time
+        self.alias = (
+            random.choice(settings.DATABASE_REPLICAS)
+            if settings.DATABASE_REPLICAS
+            else None
+        )
+
+    def db_for_read(self):
+        if self.alias is None or transaction.get_connection().in_atomic_block:
+            return None
+        if self.request is not None and is_pinned(self.request):
+            return DEFAULT_DB_ALIAS
+        return self.alias
+
+
+@contextmanager
+def replica_reads(request=None):
+    """Unless `request`'s user is pinned to the primary, reads inside the block go to a replica"""
+    token = _replica_reads.set(ReplicaReads(request))
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+# * Read-your-writes: A user who just wrote is pinned to the primary for `REPLICA_PIN_SECONDS`
+# * Stored in the cache rather than a cookie so it holds across devices and token clients
+def replica_pin_key(user_id):
+    return f"tasks:replica-pin:{user_id}"
+
+
+def pin_to_primary(user):
+    cache.set(replica_pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    # * `request.user` is resolved lazily, DRF's authentication has run by the time the first query is routed
+    request = getattr(request, "_request", request)
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return False
+    return memoised(
+        request,
+        ("replica-pin", user.pk),
+        lambda: bool(cache.get(replica_pin_key(user.pk))),
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # * Only the tasks app: sessions, users and tokens are loaded lazily and must see the latest login / logout
+        replica_reads = _replica_reads.get()
+        if replica_reads is None or model._meta.app_label != REPLICA_APP_LABEL:
+            return None
+        return replica_reads.db_for_read()
+
+    def db_for_write(self, model, **hints):
+        # * Instances read from a replica remember it in `_state.db`, never write back to it
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+# * Replica Reads (Mixin): Safe methods of a view / viewset read from a replica
+class ReplicaReadsMixin:
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads(request):
+            return super().dispatch(request, *args, **kwargs)
@@ -1,51 +1,149 @@
 # Celery - Tasks
+import logging
 from datetime import datetime, timedelta
+from time import perf_counter
 
 # from celery.decorators import periodic_task
+from django.conf import settings
 from django.core.mail import send_mail
 from pytz import timezone
 from config.celery_app import app
 
-from task_manager.tasks.models import STATUS_CHOICES, EmailTaskReport, Task, User
+from task_manager.tasks.imports import run_import
+from task_manager.tasks.metrics import observe_report_run, record_stats
+from task_manager.tasks.routers import replica_reads
+from task_manager.tasks.models import (
+    STATUS_CHOICES,
+    EmailReportRun,
+    EmailTaskReport,
+    Task,
+    TaskImport,
+    User,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# * Report Body: A count and a numbered list of the user's tasks per status, `CANCELLED` left out
+# * Benchmarked in `task_manager/tasks/tests/bench_hot_paths.py`
+def build_report(user):
+    all_tasks = Task.objects.live_for(user)
+    content = "Task report:\n\n\n"
+    for i in range(len(STATUS_CHOICES) - 1):
+        tasks = all_tasks.filter(status=STATUS_CHOICES[i][0])
+        content += f"{STATUS_CHOICES[i][0].title()} :  {str(tasks.count())}\n"
+        for i in range(len(tasks)):
+            content += f"{i + 1}. {tasks[i]}\n"
+        content += "\n\n"
+    return content
 
 
 # @periodic_task(run_every=timedelta(seconds=10))
+# * Each run is counted in the worker's Prometheus metrics, runs with a report due (sent or failed) are also
+# * recorded as an `EmailReportRun` so the beat's idle runs don't write a row every 10 seconds
+# * A report whose email fails is logged and retried by the next run, the others still go out
 @app.task
 def send_email_reminder():
-    print("Starting to process Emails")
+    logger.debug("Starting to process Emails")
     now_utc = datetime.now(timezone("UTC"))
+    run = EmailReportRun(started_at=now_utc)
+    smtp_seconds, lags = [], []
+    start = perf_counter()
+
+    with record_stats() as stats:
+        for email_report in EmailTaskReport.objects.filter(send_time__lt=now_utc):
+            run.reports_due += 1
+            user = User.objects.get(id=email_report.user.id)
+
+            # Create content and subject
+            subject = user.username + "'s report"
+
+            # * Report contents are read from a replica, the reports due above come from the primary
+            # * so a lagging replica can never send the same report twice
+            with replica_reads():
+                content = build_report(user)
+            run.emails_rendered += 1
 
-    for email_report in EmailTaskReport.objects.filter(send_time__lt=now_utc):
-        user = User.objects.get(id=email_report.user.id)
-
-        # Create content and subject
-        subject = user.username + "'s report"
-
-        all_tasks = Task.objects.filter(deleted=False, user=user)
-        content = "Task report:\n\n\n"
-        for i in range(len(STATUS_CHOICES) - 1):
-            tasks = all_tasks.filter(status=STATUS_CHOICES[i][0])
-            content += f"{STATUS_CHOICES[i][0].title()} :  {str(tasks.count())}\n"
-            for i in range(len(tasks)):
-                content += f"{i + 1}. {tasks[i]}\n"
-            content += "\n\n"
-
-        # Send mail
-        send_mail(
-            subject,
-            content,
-            "tasks@task_manager.org",
-            [user.email],
+            # Send mail
+            lag = (
+                datetime.now(timezone("UTC")) - email_report.send_time
+            ).total_seconds()
+            sending = perf_counter()
+            try:
+                send_mail(
+                    subject,
+                    content,
+                    "tasks@task_manager.org",
+                    [user.email],
+                )
+            except Exception:
+                run.emails_failed += 1
+                logger.exception("Could not send the report of user %s", user.id)
+                continue
+            finally:
+                smtp_seconds.append(perf_counter() - sending)
+            run.emails_sent += 1
+            lags.append(lag)
+            email_report.send_time = email_report.send_time + timedelta(days=1)
+            email_report.save()
+            logger.debug("Email sent!", extra={"user_id": user.id})
+
+    run.duration = perf_counter() - start
+    run.queries = stats.queries
+    run.smtp_seconds = sum(smtp_seconds)
+    if lags:
+        run.mean_lag, run.max_lag = sum(lags) / len(lags), max(lags)
+    observe_report_run(run, smtp_seconds, lags)
+    if run.reports_due:
+        run.save()
+        logger.info(
+            "Processed email reports",
+            extra={
+                "reports_due": run.reports_due,
+                "emails_sent": run.emails_sent,
+                "emails_failed": run.emails_failed,
+                "duration": run.duration,
+                "max_lag": run.max_lag,
+            },
         )
-        email_report.send_time = email_report.send_time + timedelta(days=1)
-        email_report.save()
-        print("Email sent!")
-        print(f"Completed Processing User {user.id} to user email: {user.email}")
+    return {
+        "reports_due": run.reports_due,
+        "emails_sent": run.emails_sent,
+        "emails_failed": run.emails_failed,
+    }
+
+
+# * Email Report Run Pruning: Deletes `EmailReportRun` rows older than `EMAIL_REPORT_RUNS_MAX_AGE` days, once a day
+@app.task
+def prune_email_report_runs():
+    cutoff = datetime.now(timezone("UTC")) - timedelta(
+        days=settings.EMAIL_REPORT_RUNS_MAX_AGE
+    )
+    deleted, _ = EmailReportRun.objects.filter(started_at__lt=cutoff).delete()
+    return {"runs_deleted": deleted}
+
+
+# * Task Import: Large files outlive the default `CELERY_TASK_SOFT_TIME_LIMIT`
+@app.task(
+    soft_time_limit=settings.TASK_IMPORT_TIME_LIMIT,
+    time_limit=settings.TASK_IMPORT_TIME_LIMIT + 60,
+)
+def import_tasks(task_import_id):
+    task_import = run_import(TaskImport.objects.get(pk=task_import_id))
+    return {
+        "rows_imported": task_import.rows_imported,
+        "rows_failed": task_import.rows_failed,
+    }
 
 
 app.conf.beat_schedule = {
-    'send-every-10-seconds': {
-        'task': 'task_manager.tasks.tasks.send_email_reminder',
-        'schedule': 10.0
+    "send-every-10-seconds": {
+        "task": "task_manager.tasks.tasks.send_email_reminder",
+        "schedule": 10.0,
+    },
+    "prune-email-report-runs-daily": {
+        "task": "task_manager.tasks.tasks.prune_email_report_runs",
+        "schedule": timedelta(days=1),
     },
-}
\ No newline at end of file
+}
@@ -0,0 +1,120 @@
+# * Hot Path Benchmarks: pytest-benchmark timings of the model-level code every request or report run goes through
+# * Not collected by a plain `pytest` run (`bench_*.py`), `python -m benchmarks.regressions` runs them against the
+# * stored baselines and fails on a regression
+# ? Refer: https://pytest-benchmark.readthedocs.io/en/v3.4.1/usage.html
+from types import SimpleNamespace
+
+import pytest
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+from task_manager.tasks.apiviews import TaskHistoryFilter, TaskSerializer
+from task_manager.tasks.middleware import ProfilingMiddleware
+from task_manager.tasks.models import (
+    STATUS_CHOICES,
+    Task,
+    TaskHistory,
+    create_TaskHistory,
+)
+from task_manager.tasks.tasks import build_report
+from task_manager.tasks.views import priority_cascade_logic
+
+pytestmark = pytest.mark.django_db
+
+STATUSES = [status for status, _ in STATUS_CHOICES]
+
+
+def seed_tasks(user, size):
+    Task.objects.bulk_create(
+        Task(
+            title=f"Benchmark task {i}",
+            description="Seeded by the hot path benchmarks",
+            completed=STATUSES[i % len(STATUSES)] == "COMPLETED",
+            priority=i + 1,
+            status=STATUSES[i % len(STATUSES)],
+            user=user,
+        )
+        for i in range(size)
+    )
+    return Task.objects.filter(user=user).order_by("priority")
+
+
+# * Cascade: A new task at priority 1 shifts a run of 100 pending tasks, the setup shifts them back each round
+@pytest.mark.parametrize("mode", ["optimistic", "locking"])
+def test_priority_cascade_logic(benchmark, settings, user, mode):
+    settings.TASKS_PRIORITY_CASCADE_MODE = mode
+    Task.objects.bulk_create(
+        Task(title=f"Pending {i}", priority=i + 1, status="PENDING", user=user)
+        for i in range(100)
+    )
+    form = SimpleNamespace(cleaned_data={"priority": 1}, instance=Task(user=user))
+
+    def reset():
+        Task.objects.filter(user=user).update(priority=F("priority") - 1)
+
+    benchmark.pedantic(
+        priority_cascade_logic, args=(form, user), setup=reset, rounds=50
+    )
+    assert Task.objects.filter(user=user, priority=1).count() == 0
+
+
+# * History Signal: The `pre_save` receiver of a save that changes the status, one read and one insert
+def test_create_TaskHistory(benchmark, user):
+    task = seed_tasks(user, 1).get()
+    task.status = "COMPLETED"
+
+    benchmark(create_TaskHistory, sender=Task, instance=task)
+    assert TaskHistory.objects.filter(task=task).exists()
+
+
+# * List Serialisation: One page of tasks with their users, read up front so only the serialiser is timed
+def test_TaskSerializer_list(benchmark, user):
+    tasks = list(seed_tasks(user, 100).select_related("user"))
+
+    data = benchmark(lambda: TaskSerializer(tasks, many=True).data)
+    assert len(data) == 100
+
+
+# * History Filter: Status and date filters over 1,000 history rows of one task
+def test_TaskHistoryFilter(benchmark, user):
+    task = seed_tasks(user, 1).get()
+    TaskHistory.objects.bulk_create(
+        TaskHistory(
+            old_status=STATUSES[i % len(STATUSES)],
+            new_status=STATUSES[(i + 1) % len(STATUSES)],
+            task=task,
+        )
+        for i in range(1000)
+    )
+    query = {
+        "new_status": "COMPLETED",
+        "updated_date": timezone.localdate().isoformat(),
+    }
+
+    def run():
+        return list(
+            TaskHistoryFilter(query, queryset=TaskHistory.objects.filter(task=task)).qs
+        )
+
+    assert len(benchmark(run)) == 250
+
+
+# * Report Body: The email of a user with 200 tasks, as `send_email_reminder` builds it
+def test_build_report(benchmark, user):
+    seed_tasks(user, 200)
+
+    content = benchmark(build_report, user)
+    assert content.startswith("Task report:")
+    assert "Pending :  50" in content
+
+
+# * Profiling (Disabled): What `ProfilingMiddleware` costs every request while nothing is armed
+def test_ProfilingMiddleware_disabled(benchmark, user):
+    request = RequestFactory().get("/tasks/")
+    request.user = user
+    middleware = ProfilingMiddleware(lambda request: HttpResponse())
+
+    response = benchmark(middleware, request)
+    assert "X-Profile-Capture" not in response
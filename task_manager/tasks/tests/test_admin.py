@@ -0,0 +1,42 @@
+from django.db.models import F
+from django.test import TestCase
+from tasks.models import STATUS_CHOICES, Task, User
+
+
+class TaskAdminTestCases(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="bruce_wayne", email="bruce@wayne.org", password="i_am_batman"
+        )
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        self.task = Task.objects.create(
+            title="Buy Milk!", description="From Milk shop", priority=1, user=self.user
+        )
+
+    def post_change(self, version):
+        return self.client.post(
+            f"/admin/tasks/task/{self.task.pk}/change/",
+            {
+                "title": "Edited in the admin",
+                "description": "From Milk shop",
+                "user": self.user.pk,
+                "priority": 1,
+                "status": STATUS_CHOICES[0][0],
+                "version": version,
+                "change_seq": 0,
+            },
+        )
+
+    # * An edit saved while the admin form was open is a 409 showing the latest row, not a 500
+    def test_change_conflict(self):
+        Task.objects.filter(pk=self.task.pk).update(version=F("version") + 1)
+        response = self.post_change(self.task.version)
+        self.assertContains(response, "changed by someone else", status_code=409)
+        self.assertContains(
+            response, f'name="version" value="{self.task.version + 1}"', status_code=409
+        )
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Buy Milk!")
+
+        response = self.post_change(self.task.version + 1)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Edited in the admin")
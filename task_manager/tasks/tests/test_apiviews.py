@@ -1,8 +1,16 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
+
+from django.db.models import F
+from django.db.models.signals import pre_save
+from django.test import TestCase, override_settings
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
-from tasks.models import STATUS_CHOICES, TaskHistory, User, Task
-from datetime import date
+from tasks import models as models_module
+from tasks.apiviews import TaskSerializer
+from tasks.models import STATUS_CHOICES, Task, TaskHistory, User, next_change_seq
+from tasks.renderers import FastJSONRenderer
 
 
 class APIReadTestCases(TestCase):
@@ -107,7 +115,8 @@ class APITestCases(TestCase):
         )
         task.save()
         response = self.client.delete(f"/api/v1/task/{task.id}/")
-        self.assertFalse(Task.objects.filter(user=self.user))
+        self.assertFalse(Task.objects.live_for(self.user))
+        self.assertTrue(Task.objects.get(pk=task.pk).deleted)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
     def test_task_update(self):
@@ -135,3 +144,230 @@ class APITestCases(TestCase):
             Task.objects.filter(id=task.id).first().title, "Buy Milk Sweets!"
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class APIValuesReadTestCases(TestCase):
+    """Test the `.values()` read path against the full `TaskSerializer`"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(
+            username="bruce_wayne",
+            email="bruce@wayne.org",
+            first_name="Bruce",
+            last_name="Wayne",
+        )
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        for i, (choice, _) in enumerate(STATUS_CHOICES):
+            Task.objects.create(
+                title=f"Ünïcode task {i}",
+                description='Line\u2028separator, "quotes" and ☕',
+                priority=i,
+                completed=i % 2 == 0,
+                status=choice,
+                user=self.user,
+            )
+        Task.objects.create(
+            title="Deleted", description="", user=self.user, deleted=True
+        )
+        self.tasks = Task.objects.live_for(self.user)
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_list_contract(self):
+        response = self.client.get("/api/v1/task/")
+        expected = self.render(TaskSerializer(self.tasks, many=True).data)
+        self.assertEqual(response.content, expected)
+
+    def test_filtered_list_contract(self):
+        response = self.client.get("/api/v1/task/?completed=true&title=task")
+        tasks = self.tasks.filter(completed=True)
+        expected = self.render(TaskSerializer(tasks, many=True).data)
+        self.assertEqual(response.content, expected)
+
+    def test_retrieve_contract(self):
+        task = self.tasks.last()
+        response = self.client.get(f"/api/v1/task/{task.id}/")
+        self.assertEqual(response.content, self.render(TaskSerializer(task).data))
+
+    def test_retrieve_other_user(self):
+        user = User.objects.create(username="joker")
+        task = Task.objects.create(title="Joke", description="", user=user)
+        response = self.client.get(f"/api/v1/task/{task.id}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_queries(self):
+        # * SAVEPOINT + RELEASE, session, user and a single `.values()` query
+        with self.assertNumQueries(5):
+            self.client.get("/api/v1/task/")
+
+    def test_renderer_contract(self):
+        data = {
+            "text": 'Ünïcode \u2028 \u2029 ☕ "quotes"',
+            "date": date(2022, 2, 2),
+            "nested": [1, 2.5, None, True, {"key": "value"}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), self.render(data))
+
+
+class APIConcurrencyTestCases(TestCase):
+    """Test `ETag` / `If-Match` and conflicting API updates"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        self.task = Task.objects.create(
+            title="Buy Milk!", description="From Milk shop", user=self.user
+        )
+
+    def patch(self, **headers):
+        return self.client.patch(
+            f"/api/v1/task/{self.task.id}/", {"title": "Buy Milk Sweets!"}, **headers
+        )
+
+    def test_etag(self):
+        response = self.client.get(f"/api/v1/task/{self.task.id}/")
+        etag = response["ETag"]
+        self.assertEqual(etag, f'"{self.task.version}"')
+        response = self.patch(HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], f'"{self.task.version + 1}"')
+
+    def test_stale_if_match(self):
+        etag = self.client.get(f"/api/v1/task/{self.task.id}/")["ETag"]
+        Task.objects.filter(pk=self.task.pk).update(version=F("version") + 1)
+        response = self.patch(HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Buy Milk!")
+
+    def test_conflict(self):
+        # * Another writer saves between `get_object()` and `save()`
+        def concurrent_save(sender, instance, **kwargs):
+            pre_save.disconnect(concurrent_save, sender=Task)
+            Task.objects.filter(pk=instance.pk).update(version=F("version") + 1)
+
+        pre_save.connect(concurrent_save, sender=Task)
+        self.addCleanup(pre_save.disconnect, concurrent_save, sender=Task)
+        response = self.patch()
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Buy Milk!")
+
+    def test_stale_if_match_delete(self):
+        etag = self.client.get(f"/api/v1/task/{self.task.id}/")["ETag"]
+        Task.objects.filter(pk=self.task.pk).update(version=F("version") + 1)
+        response = self.client.delete(
+            f"/api/v1/task/{self.task.id}/", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertFalse(Task.objects.get(pk=self.task.pk).deleted)
+
+    def test_delete_conflict(self):
+        # * Another writer saves between `get_object()` and the tombstone `UPDATE`
+        def concurrent_save(user_id):
+            Task.objects.filter(pk=self.task.pk).update(version=F("version") + 1)
+            return next_change_seq(user_id)
+
+        with mock.patch.object(models_module, "next_change_seq", concurrent_save):
+            response = self.client.delete(f"/api/v1/task/{self.task.id}/")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Task.objects.get(pk=self.task.pk).deleted)
+
+
+class APISyncTestCases(TestCase):
+    """Test the delta sync of `/api/v1/task/sync/`"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.client.force_authenticate(self.user)
+        self.tasks = [
+            Task.objects.create(
+                title=f"Buy Milk {index}!", priority=index, user=self.user
+            )
+            for index in range(3)
+        ]
+
+    def sync(self, since=None):
+        response = self.client.get(
+            "/api/v1/task/sync/", {"since": since} if since else {}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_full_sync(self):
+        self.tasks[0].deleted = True
+        self.tasks[0].save()
+        data = self.sync()
+        self.assertEqual(
+            [change["id"] for change in data["changes"]],
+            [task.pk for task in self.tasks[1:]],
+        )
+        self.assertFalse(data["has_more"])
+        # * Tombstones after the cursor of a full sync are harmless, the client never had the task
+        self.assertEqual(
+            [
+                (change["id"], change["deleted"])
+                for change in self.sync(data["next_token"])["changes"]
+            ],
+            [(self.tasks[0].pk, True)],
+        )
+
+    def test_delta_sync(self):
+        token = self.sync()["next_token"]
+        self.tasks[1].title = "Buy Sweets!"
+        self.tasks[1].save()
+        self.client.delete(f"/api/v1/task/{self.tasks[0].pk}/")
+        created = Task.objects.create(title="Buy Eggs!", user=self.user)
+        Task.objects.create(title="Buy Eggs!", user=User.objects.create(username="x"))
+
+        data = self.sync(token)
+        self.assertEqual(
+            [(change["id"], change["deleted"]) for change in data["changes"]],
+            [(self.tasks[1].pk, False), (self.tasks[0].pk, True), (created.pk, False)],
+        )
+        self.assertEqual(data["changes"][0]["title"], "Buy Sweets!")
+        self.assertEqual(self.sync(data["next_token"])["changes"], [])
+
+    def test_bulk_writes_are_synced(self):
+        token = self.sync()["next_token"]
+        self.client.force_authenticate(None)
+        self.client.force_login(self.user)
+        self.client.post(
+            "/create-task/",
+            {
+                "title": "Buy Eggs!",
+                "description": "From Egg shop",
+                "priority": 0,
+                "completed": False,
+                "status": STATUS_CHOICES[0][0],
+            },
+        )
+        changes = self.sync(token)["changes"]
+        self.assertEqual(
+            [change["id"] for change in changes],
+            [task.pk for task in self.tasks] + [Task.objects.get(title="Buy Eggs!").pk],
+        )
+
+    @override_settings(TASK_SYNC_PAGE_SIZE=2)
+    def test_pages(self):
+        data = self.sync()
+        self.assertTrue(data["has_more"])
+        self.assertEqual(len(data["changes"]), 2)
+        data = self.sync(data["next_token"])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(
+            [change["id"] for change in data["changes"]], [self.tasks[2].pk]
+        )
+
+    def test_invalid_token(self):
+        token = self.sync()["next_token"]
+        self.client.force_authenticate(User.objects.create(username="alfred"))
+        for since in (token, "not-a-token"):
+            response = self.client.get("/api/v1/task/sync/", {"since": since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
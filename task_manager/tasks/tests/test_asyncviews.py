@@ -0,0 +1,79 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, TransactionTestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tasks.apiviews import TaskViewSet
+from tasks.asyncviews import async_reads
+from tasks.models import Task, User
+
+
+class APIAsyncReadTestCases(TransactionTestCase):
+    """Async views read from another thread's connection, hence `TransactionTestCase`"""
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.token = Token.objects.create(user=self.user)
+        self.task = Task.objects.create(
+            title="Buy Milk!",
+            description="From Milk shop",
+            priority=1,
+            user=self.user,
+        )
+        self.list_view = async_reads(TaskViewSet, {"get": "list", "post": "create"})
+        self.detail_view = async_reads(TaskViewSet, {"get": "retrieve"})
+
+    def request(self, view, method="get", path="/api/v1/task/", token=None, **kwargs):
+        request = getattr(self.factory, method)(
+            path,
+            # * Django 3.2's `AsyncRequestFactory` takes extra headers by their ASGI name
+            AUTHORIZATION=f"Token {token or self.token.key}",
+            **kwargs.pop("extra", {}),
+        )
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_list_matches_sync_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = self.request(self.list_view)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            json.loads(response.content), client.get("/api/v1/task/").json()
+        )
+
+    def test_retrieve(self):
+        response = self.request(
+            self.detail_view, path=f"/api/v1/task/{self.task.pk}/", pk=self.task.pk
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["title"], "Buy Milk!")
+        self.assertEqual(response["ETag"], '"1"')
+
+    def test_retrieve_other_users_task(self):
+        other = User.objects.create(username="clark_kent")
+        response = self.request(
+            self.detail_view,
+            path=f"/api/v1/task/{self.task.pk}/",
+            token=Token.objects.create(user=other).key,
+            pk=self.task.pk,
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unauthenticated(self):
+        response = async_to_sync(self.list_view)(self.factory.get("/api/v1/task/"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_writes_use_sync_view(self):
+        response = self.request(
+            self.list_view,
+            method="post",
+            extra={
+                "data": {"title": "Buy Eggs!", "description": "From Egg shop"},
+                "content_type": "application/json",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Task.objects.filter(title="Buy Eggs!").exists())
@@ -0,0 +1,73 @@
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from tasks.models import User
+
+
+class APITokenTestCases(TestCase):
+    """Test cached and signed token authentication"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.token = Token.objects.create(user=self.user)
+
+    def get_tasks(self, keyword, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f"{keyword} {key}")
+        return self.client.get("/api/v1/task/")
+
+    def get_access_token(self):
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        response = self.client.post("/api/v1/token/access/")
+        self.client.logout()
+        return response.data["access_token"]
+
+    def test_cached_token(self):
+        self.assertEqual(self.get_tasks("Token", self.token.key).status_code, 200)
+        # * SAVEPOINT + RELEASE and the task list: no `Token` + `User` lookup
+        with self.assertNumQueries(3):
+            response = self.get_tasks("Token", self.token.key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_rotated_token(self):
+        self.get_tasks("Token", self.token.key)
+        key = self.token.key
+        self.token.delete()
+        Token.objects.create(user=self.user)
+        response = self.get_tasks("Token", key)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_token(self):
+        self.get_tasks("Token", self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        response = self.get_tasks("Token", self.token.key)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_signed_token(self):
+        access_token = self.get_access_token()
+        self.assertEqual(self.get_tasks("Signed", access_token).status_code, 200)
+        with self.assertNumQueries(3):
+            response = self.get_tasks("Signed", access_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_signed_token_tampered(self):
+        access_token = self.get_access_token()
+        response = self.get_tasks("Signed", access_token[:-1] + "x")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(SIGNED_TOKEN_MAX_AGE=-1)
+    def test_signed_token_expired(self):
+        access_token = self.get_access_token()
+        response = self.get_tasks("Signed", access_token)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_signed_token_password_change(self):
+        access_token = self.get_access_token()
+        self.user.set_password("i_am_not_batman")
+        self.user.save()
+        response = self.get_tasks("Signed", access_token)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+import pytest
+from django.test import TestCase
+from django.urls import resolve
+from tasks.budgets import QueryBudget, get_query_budget
+from tasks.models import Task
+from tasks.views import GenericPendingTaskView
+
+
+class QueryBudgetTestCases(TestCase):
+    def test_class_budget(self):
+        budget = get_query_budget(resolve("/tasks/"), "GET")
+        self.assertEqual(budget, QueryBudget(5, True))
+        # * Writes are not budgeted, the priority cascade scales with the tasks it shifts
+        self.assertIsNone(get_query_budget(resolve("/tasks/"), "POST"))
+        self.assertIsNone(get_query_budget(resolve("/create-task/"), "GET"))
+
+    def test_viewset_budget(self):
+        self.assertEqual(
+            get_query_budget(resolve("/api/v1/task/"), "GET"), QueryBudget(4, True)
+        )
+        self.assertEqual(
+            get_query_budget(resolve("/api/v1/task/1/history/"), "GET"),
+            QueryBudget(5, True),
+        )
+        self.assertIsNone(get_query_budget(resolve("/api/v1/task/1/"), "PATCH"))
+
+    def test_handler_budget(self):
+        with mock.patch.object(
+            GenericPendingTaskView.get, "query_budget", QueryBudget(2), create=True
+        ):
+            self.assertEqual(
+                get_query_budget(resolve("/tasks/"), "GET"), QueryBudget(2)
+            )
+
+
+# * Query Budgets (pytest): The `query_budgets` fixture of `task_manager/conftest.py` fails the request itself
+@pytest.mark.django_db
+def test_query_budget_exceeded(client, user, monkeypatch):
+    client.force_login(user)
+    monkeypatch.setattr(GenericPendingTaskView, "query_budget", QueryBudget(1))
+    with pytest.raises(pytest.fail.Exception, match="its budget is 1"):
+        client.get("/tasks/")
+
+
+@pytest.mark.django_db
+def test_query_budget_rows(client, user, monkeypatch):
+    client.force_login(user)
+    for priority in range(1, 4):
+        Task.objects.create(title="N+1", description="", priority=priority, user=user)
+    get_context_data = GenericPendingTaskView.get_context_data
+
+    def get_context_data_per_row(view, **kwargs):
+        context = get_context_data(view, **kwargs)
+        context["owners"] = [task.user.username for task in Task.objects.all()]
+        return context
+
+    monkeypatch.setattr(
+        GenericPendingTaskView, "get_context_data", get_context_data_per_row
+    )
+    with pytest.raises(pytest.fail.Exception, match="once per row"):
+        client.get("/tasks/")
+
+
+@pytest.mark.django_db
+@pytest.mark.ignore_query_budget
+def test_query_budget_ignored(client, user, monkeypatch):
+    client.force_login(user)
+    monkeypatch.setattr(GenericPendingTaskView, "query_budget", QueryBudget(1))
+    assert client.get("/tasks/").status_code == 200
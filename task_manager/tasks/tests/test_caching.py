@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from tasks.models import STATUS_CHOICES, Task, User
+
+
+class SessionCacheTestCases(TestCase):
+    """Cached authentication and coalesced session writes"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        Task.objects.create(
+            title="Buy Milk!",
+            description="From Milk shop",
+            priority=10,
+            completed=False,
+            status=STATUS_CHOICES[0][0],
+            user=self.user,
+        )
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        # * Warm the user cache
+        self.client.get("/tasks/")
+
+    def test_cached_user_skips_lookup(self):
+        # * SAVEPOINT + RELEASE, session and the landing page query: no `auth_user` lookup
+        with self.assertNumQueries(4):
+            response = self.client.get("/tasks/")
+        self.assertEqual(response.context["user"], self.user)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_cached_db_session_skips_lookup(self):
+        self.client = self.client_class()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        self.client.get("/tasks/")
+        with self.assertNumQueries(3):
+            self.client.get("/tasks/")
+
+    def test_deactivated_user_is_logged_out(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+    def test_password_change_is_logged_out(self):
+        self.user.set_password("i_am_not_batman")
+        self.user.save()
+        response = self.client.get("/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+    @override_settings(SESSION_COUNTER_FLUSH_EVERY=10)
+    def test_session_counter_coalescing(self):
+        with CaptureQueriesContext(connection) as queries:
+            for total_views in range(25):
+                response = self.client.get("/sessiontest/")
+                self.assertContains(response, f"Total views is {total_views} ")
+        session_writes = [
+            query for query in queries if query["sql"].startswith("UPDATE")
+        ]
+        # * Session already exists after login: one write per 10 views
+        self.assertEqual(len(session_writes), 2)
+
+    # * Evicted between `add` and `incr` (`ValueError`), or the cache is down behind `IGNORE_EXCEPTIONS` (`None`)
+    def test_session_counter_cache_miss(self):
+        self.client.get("/sessiontest/")
+        for incr in (mock.Mock(side_effect=ValueError), mock.Mock(return_value=None)):
+            with self.subTest(incr=incr), mock.patch.object(cache, "incr", incr):
+                response = self.client.get("/sessiontest/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.session["total_views"], 2)
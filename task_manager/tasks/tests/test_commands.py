@@ -0,0 +1,137 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from tasks.models import EmailTaskReport, Task, TaskChangeSequence, TaskHistory, User
+
+
+class ImportTimeCommandTestCases(SimpleTestCase):
+    def test_worker_import_time(self):
+        out = StringIO()
+        call_command("importtime", "worker", top=50, repeat=1, stdout=out)
+        report = out.getvalue()
+        self.assertIn("task_manager.tasks ", report)
+        self.assertIn("celery ", report)
+        self.assertRegex(report, r"worker \(config\.settings\.\w+\): \d+ modules")
+
+
+class SeedLoadTestCommandTestCases(TestCase):
+    def test_seed_load_test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = Path(directory) / "dataset.json"
+            call_command(
+                "seed_load_test",
+                users=3,
+                tasks=10,
+                manifest=manifest,
+                stdout=StringIO(),
+            )
+            dataset = json.loads(manifest.read_text())
+        users = User.objects.filter(username__startswith="loadtest-")
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Task.objects.filter(user__in=users).count(), 10)
+        self.assertEqual(
+            [
+                Task.objects.filter(user__username=f"loadtest-{n}").count()
+                for n in range(3)
+            ],
+            [4, 3, 3],
+        )
+        self.assertEqual(len(dataset["users"]), 3)
+        user = users.get(username=dataset["users"][0]["username"])
+        self.assertTrue(user.check_password(dataset["password"]))
+        self.assertEqual(user.auth_token.key, dataset["users"][0]["token"])
+        # * Like real signups, whose `EmailTaskReport` comes from `post_save`
+        self.assertEqual(EmailTaskReport.objects.filter(user__in=users).count(), 3)
+
+    # * Only the accounts of this run get tokens and tasks
+    def test_seed_load_test_other_users(self):
+        other = User.objects.create(username="loadtest-admin")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        manifest = Path(directory.name) / "dataset.json"
+        call_command(
+            "seed_load_test", users=2, tasks=4, manifest=manifest, stdout=StringIO()
+        )
+        dataset = json.loads(manifest.read_text())
+        self.assertEqual(
+            [user["username"] for user in dataset["users"]],
+            ["loadtest-0", "loadtest-1"],
+        )
+        self.assertFalse(Task.objects.filter(user=other).exists())
+
+        call_command(
+            "seed_load_test", users=1, reset=True, manifest=manifest, stdout=StringIO()
+        )
+        self.assertEqual(
+            list(User.objects.order_by("pk").values_list("username", flat=True)),
+            ["loadtest-admin", "loadtest-0"],
+        )
+
+    def test_seed_load_test_without_users(self):
+        with self.assertRaisesMessage(CommandError, "--users must be at least 1"):
+            call_command("seed_load_test", users=0, stdout=StringIO())
+
+
+class GenerateDataCommandTestCases(TestCase):
+    def generate(self, prefix, **options):
+        call_command(
+            "generate_data",
+            users=20,
+            tasks=300,
+            prefix=prefix,
+            workers=1,
+            user_chunk_size=7,
+            task_chunk_size=40,
+            stdout=StringIO(),
+            **options,
+        )
+        return Task.objects.filter(user__username__startswith=f"{prefix}-")
+
+    def test_generate_data(self):
+        tasks = self.generate("generated")
+        users = User.objects.filter(username__startswith="generated-")
+        self.assertEqual(users.count(), 20)
+        self.assertEqual(tasks.count(), 300)
+        self.assertEqual(EmailTaskReport.objects.filter(user__in=users).count(), 20)
+        for user in users:
+            count = tasks.filter(user=user).count()
+            self.assertEqual(TaskChangeSequence.objects.get(user=user).value, count)
+            self.assertEqual(
+                list(
+                    tasks.filter(user=user)
+                    .order_by("id")
+                    .values_list("priority", flat=True)
+                ),
+                list(range(1, count + 1)),
+            )
+        self.assertTrue(users.first().check_password("generated"))
+        # * The history of every task ends in its status, one version per change
+        for task in tasks.exclude(version=1):
+            history = TaskHistory.objects.filter(task=task).order_by("id")
+            self.assertEqual(history.count(), task.version - 1)
+            self.assertEqual(history.last().new_status, task.status)
+        self.assertEqual(tasks.filter(version=1).exclude(status="PENDING").count(), 0)
+
+    def test_generate_data_is_deterministic(self):
+        fields = ("title", "status", "priority", "deleted", "created_date")
+        first = self.generate("first", seed=7).order_by("id").values_list(*fields)
+        second = self.generate("second", seed=7).order_by("id").values_list(*fields)
+        third = self.generate("third", seed=8).order_by("id").values_list(*fields)
+        self.assertEqual(list(first), list(second))
+        self.assertNotEqual(list(first), list(third))
+
+    def test_generate_data_reset(self):
+        self.generate("generated")
+        tasks = self.generate("generated", reset=True)
+        self.assertEqual(tasks.count(), 300)
+        self.assertEqual(
+            TaskHistory.objects.filter(task__user__username__startswith="generated-")
+            .values("task")
+            .distinct()
+            .count(),
+            tasks.exclude(version=1).count(),
+        )
@@ -0,0 +1,94 @@
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.events import get_event_bus
+from tasks.models import STATUS_CHOICES, Task, User
+
+
+@override_settings(TASK_EVENTS_HEARTBEAT=0.01, TASK_EVENTS_MAX_AGE=1)
+class APIEventStreamTestCases(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.client.force_authenticate(self.user)
+
+    def events(self, subscription):
+        events = []
+        while event := subscription.get(0):
+            events.append(event)
+        return [event["type"] for event in events], events
+
+    def test_task_events(self):
+        with get_event_bus().subscribe(self.user.pk) as subscription:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    "/api/v1/task/",
+                    {"title": "Buy Milk!", "description": "From Milk shop"},
+                )
+            task = Task.objects.get(user=self.user)
+            types, events = self.events(subscription)
+            self.assertEqual(types, ["task.created"])
+            self.assertEqual(events[0]["task"]["id"], task.pk)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(f"/api/v1/task/{task.pk}/", {"status": "COMPLETED"})
+            types, events = self.events(subscription)
+            self.assertEqual(types, ["history.created", "task.updated"])
+            self.assertEqual(events[1]["task"]["version"], 2)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/api/v1/task/{task.pk}/")
+            self.assertEqual(self.events(subscription)[0], ["task.deleted"])
+
+    def test_rolled_back_write_is_not_published(self):
+        with get_event_bus().subscribe(self.user.pk) as subscription:
+            with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                Task.objects.create(title="Buy Milk!", user=self.user)
+                transaction.set_rollback(True)
+            self.assertEqual(self.events(subscription)[0], [])
+
+    def test_priority_cascade_is_one_event(self):
+        for priority in range(1, 4):
+            Task.objects.create(title="Buy Milk!", priority=priority, user=self.user)
+        self.client.force_authenticate(None)
+        self.client.force_login(self.user)
+        with get_event_bus().subscribe(self.user.pk) as subscription:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    "/create-task/",
+                    {
+                        "title": "Buy Eggs!",
+                        "description": "From Egg shop",
+                        "priority": 1,
+                        "completed": False,
+                        "status": STATUS_CHOICES[0][0],
+                    },
+                )
+            types, events = self.events(subscription)
+        self.assertEqual(types, ["tasks.changed", "task.created"])
+
+    def test_stream(self):
+        response = self.client.get(
+            "/api/v1/task/events/", HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b"event: ready\n"))
+
+        get_event_bus().publish(self.user.pk, {"type": "task.updated", "task": {}})
+        get_event_bus().publish(self.user.pk + 1, {"type": "task.deleted"})
+        self.assertEqual(
+            next(stream),
+            b'event: task.updated\ndata: {"type": "task.updated", "task": {}}\n\n',
+        )
+        self.assertEqual(next(stream), b": keep-alive\n\n")
+        response.close()
+
+    def test_stream_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(
+            "/api/v1/task/events/", HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(response.content.startswith(b"event: error\n"))
@@ -0,0 +1,134 @@
+import random
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from tasks.imports import PriorityBlocks
+from tasks.models import Task, TaskImport, User
+from tasks.tasks import import_tasks
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TASK_IMPORT_CHUNK_SIZE=2)
+class APIImportTestCases(TestCase):
+    """Test the bulk task import"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+
+    def upload(self, name, content, **data):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                "/api/v1/task/import/",
+                {"file": SimpleUploadedFile(name, content.encode()), **data},
+                format="multipart",
+            )
+        return response, callbacks
+
+    def test_import_csv(self):
+        for priority in (1, 2, 4):
+            Task.objects.create(
+                title=f"Existing {priority}",
+                description="",
+                priority=priority,
+                user=self.user,
+            )
+        response, callbacks = self.upload(
+            "tasks.csv",
+            "id,title,description,completed,priority\n"
+            "7,New A,From an export,False,1\n"
+            ",New B,,False,\n"
+            ",New C,Completed,True,1\n"
+            ",New D,Invalid,False,high\n",
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "QUEUED")
+        self.assertEqual(len(callbacks), 1)
+
+        import_tasks(response.data["id"])
+        task_import = TaskImport.objects.get(pk=response.data["id"])
+        self.assertEqual(task_import.status, "COMPLETED")
+        self.assertEqual(
+            (
+                task_import.rows_processed,
+                task_import.rows_imported,
+                task_import.rows_failed,
+            ),
+            (4, 2, 2),
+        )
+        self.assertEqual([error["row"] for error in task_import.errors], [2, 4])
+        self.assertIn("priority", task_import.errors[1]["errors"])
+        # * Same priorities as creating `New A` and `New C` one by one through the form
+        self.assertEqual(
+            list(
+                Task.objects.filter(user=self.user)
+                .order_by("completed", "priority")
+                .values_list("title", "priority")
+            ),
+            [
+                ("New A", 1),
+                ("Existing 1", 2),
+                ("Existing 2", 3),
+                ("Existing 4", 4),
+                ("New C", 1),
+            ],
+        )
+
+        response = self.client.get(f"/api/v1/task-import/{task_import.id}/")
+        self.assertEqual(response.data["rows_imported"], 2)
+
+    def test_import_jsonl(self):
+        response, _ = self.upload(
+            "export.txt",
+            '{"title": "One", "description": "Imported", "priority": 3}\n'
+            "\n"
+            "{not json\n"
+            '["title"]\n'
+            '{"title": "Two", "description": "Imported", "priority": 3}\n',
+            filetype="jsonl",
+        )
+        import_tasks(response.data["id"])
+        task_import = TaskImport.objects.get(pk=response.data["id"])
+        self.assertEqual((task_import.rows_imported, task_import.rows_failed), (2, 2))
+        self.assertEqual(
+            list(Task.objects.order_by("priority").values_list("title", "priority")),
+            [("Two", 3), ("One", 4)],
+        )
+
+    def test_import_invalid(self):
+        response, callbacks = self.upload("tasks.xlsx", "")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(callbacks), 0)
+
+    def test_import_other_user(self):
+        user = User.objects.create(username="joker")
+        task_import = TaskImport.objects.create(user=user, file_format="csv")
+        response = self.client.get(f"/api/v1/task-import/{task_import.id}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_priority_blocks(self):
+        # * Row-by-row `priority_cascade_logic` against the in-memory blocks
+        generator = random.Random(7)
+        for _ in range(50):
+            occupied = {
+                priority: ("task", priority)
+                for priority in generator.sample(range(30), 12)
+            }
+            blocks = PriorityBlocks(sorted(occupied.items()))
+            for index in range(20):
+                priority = generator.randrange(30)
+                cascade = priority
+                while cascade in occupied:
+                    cascade += 1
+                for shifted in range(cascade, priority, -1):
+                    occupied[shifted] = occupied[shifted - 1]
+                occupied[priority] = ("row", index)
+                blocks.insert(priority, ("row", index))
+            self.assertEqual(
+                dict(blocks), {key: priority for priority, key in occupied.items()}
+            )
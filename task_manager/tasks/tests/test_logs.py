@@ -0,0 +1,35 @@
+import json
+import logging
+from io import StringIO
+
+from django.test import SimpleTestCase
+from tasks.logs import JSONFormatter, QueueStreamHandler, SampleFilter
+
+
+class StructuredLoggingTestCases(SimpleTestCase):
+    def record(self, level=logging.INFO, **extra):
+        record = logging.LogRecord(
+            "task_manager.tasks.models", level, __file__, 1, "Saved %s", ("task",), None
+        )
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_formatter(self):
+        entry = json.loads(JSONFormatter().format(self.record(task_id=7)))
+        self.assertEqual(entry["message"], "Saved task")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["task_id"], 7)
+
+    def test_sample_filter(self):
+        sample = SampleFilter(rate=0.0)
+        self.assertFalse(sample.filter(self.record()))
+        self.assertTrue(sample.filter(self.record(logging.WARNING)))
+        self.assertTrue(SampleFilter(rate=1.0).filter(self.record()))
+
+    def test_queue_stream_handler(self):
+        stream = StringIO()
+        handler = QueueStreamHandler(stream)
+        handler.setFormatter(JSONFormatter())
+        handler.handle(self.record(task_id=7))
+        handler.close()
+        self.assertEqual(json.loads(stream.getvalue())["task_id"], 7)
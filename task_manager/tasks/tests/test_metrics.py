@@ -0,0 +1,58 @@
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from tasks.middleware import PerformanceMiddleware
+from tasks.models import User
+
+
+class PerformanceMiddlewareTestCases(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+
+    @override_settings(PERF_SAMPLE_RATE=1.0, PERF_SERVER_TIMING=True)
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/tasks/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r"^total;dur=[\d.]+, db;dur=[\d.]+;")
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertRegex(timing, r'cache;desc="\d+ hits, \d+ misses"')
+
+    @override_settings(PERF_SAMPLE_RATE=0.0, PERF_SERVER_TIMING=True)
+    def test_unsampled_request(self):
+        response = self.client.get("/tasks/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0, PERF_SIMILAR_QUERIES_THRESHOLD=3)
+    def test_repeated_queries_logged(self):
+        def view(request):
+            for pk in range(3):
+                User.objects.filter(pk=pk).exists()
+            User.objects.filter(username="alfred").exists()
+            User.objects.filter(username="alfred").exists()
+            return HttpResponse()
+
+        middleware = PerformanceMiddleware(view)
+        with self.assertLogs("task_manager.tasks.metrics", "WARNING") as logs:
+            middleware(RequestFactory().get("/"))
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn("ran a similar query 3 times", logs.output[0])
+        self.assertIn("ran a duplicate query 2 times", logs.output[1])
+
+    def test_metrics_endpoint(self):
+        self.client.get("/tasks/")
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'tasks_http_request_duration_seconds_count{method="GET",status="200",'
+            'view="task_manager.tasks.views.GenericPendingTaskView"}',
+            response.content.decode(),
+        )
+        response = self.client.get("/metrics/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
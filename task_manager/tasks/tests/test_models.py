@@ -0,0 +1,130 @@
+import threading
+import time
+
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from tasks.imports import write_rows
+from tasks.models import StaleTaskError, Task, User
+from tasks.views import locking_priority_cascade, optimistic_priority_cascade
+
+SEQUENCE_TABLE = "tasks_taskchangesequence"
+TASK_TABLE = "tasks_task"
+
+
+class ChangeSequenceLockOrderTestCases(TransactionTestCase):
+    """Every writer takes the user's `TaskChangeSequence` row before any task row, like `Task.save()`"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.tasks = [
+            Task.objects.create(
+                title=f"Task {priority}",
+                description="Lock order",
+                priority=priority,
+                user=self.user,
+            )
+            for priority in (1, 2, 3)
+        ]
+
+    def pending(self):
+        return Task.objects.live_for(self.user).pending()
+
+    def statements(self, write):
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            write()
+        return statements
+
+    # * `reads_unlocked`: The optimistic cascade reads its run without locks, only its writes count
+    def assertSequenceFirst(self, statements, reads_unlocked=False):
+        tables = [
+            table
+            for sql in statements
+            if not (reads_unlocked and sql.startswith("SELECT"))
+            for table in (SEQUENCE_TABLE, TASK_TABLE)
+            if f'"{table}"' in sql
+        ]
+        self.assertEqual(tables[0], SEQUENCE_TABLE, statements)
+
+    def test_sequence_locked_first(self):
+        writes = {
+            "save": lambda: self.tasks[0].save(),
+            "locking": lambda: locking_priority_cascade(
+                self.pending(), 1, self.user.pk
+            ),
+            "optimistic": lambda: optimistic_priority_cascade(
+                self.pending(), 1, self.user.pk
+            ),
+            "import": lambda: write_rows(
+                self.user, [("Imported", "Lock order", False, 1, "PENDING")]
+            ),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name), transaction.atomic():
+                self.assertSequenceFirst(
+                    self.statements(write), reads_unlocked=name == "optimistic"
+                )
+                transaction.set_rollback(True)
+
+    # * Two Connections: The cascade / import pauses right after locking the tasks while a plain save of one of
+    # * them starts. Taken the other way round, the save holds the sequence row and Postgres aborts one of them
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_no_deadlock_with_save(self):
+        writes = {
+            "locking": lambda: locking_priority_cascade(
+                self.pending(), 1, self.user.pk
+            ),
+            "import": lambda: write_rows(
+                self.user, [("Imported", "Lock order", False, 1, "PENDING")]
+            ),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                self.assertEqual(self.run_concurrently(write), [])
+
+    def run_concurrently(self, write):
+        locked, errors = threading.Event(), []
+
+        def pause_after_lock(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if "FOR UPDATE" in sql and not locked.is_set():
+                locked.set()
+                time.sleep(0.5)
+            return result
+
+        def writer():
+            try:
+                with connection.execute_wrapper(pause_after_lock):
+                    with transaction.atomic():
+                        write()
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        def saver():
+            task = Task.objects.get(pk=self.tasks[0].pk)
+            locked.wait(5)
+            try:
+                with transaction.atomic():
+                    task.title = "Saved meanwhile"
+                    task.save()
+            except StaleTaskError:
+                # * Waited for the writer's commit, which moved the task on: a conflict, not a deadlock
+                pass
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer), threading.Thread(target=saver)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
@@ -0,0 +1,56 @@
+from time import monotonic
+from unittest import mock
+
+from django.db import OperationalError, connection, connections
+from django.test import TransactionTestCase, override_settings
+from tasks.pooling import CONNECTION_STATS, check_connections
+
+
+class ConnectionPoolingTestCases(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        CONNECTION_STATS.clear()
+        connection.ensure_connection()
+
+    def test_database_health(self):
+        response = self.client.get("/health/db/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["databases"]["default"]["healthy"])
+        self.assertTrue(response.json()["connections"]["default"]["open"])
+
+    def test_database_health_public(self):
+        response = self.client.get("/health/db/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"healthy": True})
+        with mock.patch.object(
+            connections["replica"], "cursor", side_effect=OperationalError
+        ):
+            response = self.client.get("/health/db/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {"healthy": False})
+
+    def test_database_health_unreachable(self):
+        with mock.patch.object(
+            connections["replica"], "cursor", side_effect=OperationalError
+        ):
+            response = self.client.get("/health/db/")
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()["databases"]["replica"]["healthy"])
+
+    @override_settings(DATABASE_HEALTH_CHECK_INTERVAL=0)
+    def test_unusable_connection_is_closed(self):
+        with mock.patch.object(
+            connection, "is_usable", return_value=False
+        ), mock.patch.object(connection, "close") as close:
+            check_connections()
+        close.assert_called_once_with()
+        self.assertEqual(CONNECTION_STATS["default"]["health_check_failures"], 1)
+
+    @override_settings(DATABASE_HEALTH_CHECK_INTERVAL=60)
+    def test_recently_checked_connection_is_not_pinged(self):
+        connection.health_checked_at = monotonic()
+        with mock.patch.object(connection, "is_usable") as is_usable:
+            check_connections()
+        is_usable.assert_not_called()
+        self.assertEqual(CONNECTION_STATS["default"]["reuses"], 1)
@@ -0,0 +1,129 @@
+import json
+import tempfile
+from datetime import timedelta
+from time import monotonic
+
+import pytest
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from tasks.models import ProfileCapture, ProfileTrigger, User
+from tasks.profiling import Sampler
+from tasks.tasks import send_email_reminder
+
+
+# * A profiled request also saves its capture, on top of the queries of its view
+@pytest.mark.ignore_query_budget
+class ProfilingTestCases(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        captures_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(captures_dir.cleanup)
+        settings = override_settings(
+            PROFILE_CAPTURES_DIR=captures_dir.name, PROFILING_INTERVAL=0.001
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # * Before the rollback, deleting disarms the triggers in the cache too
+        self.addCleanup(ProfileTrigger.objects.all().delete)
+
+    def read_capture(self, capture):
+        with capture.file.open("rb") as file:
+            return json.loads(file.read())
+
+    def test_header_staff_only(self):
+        response = self.client.get("/tasks/", HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Capture", response)
+        self.assertFalse(ProfileCapture.objects.exists())
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        cache.clear()
+        response = self.client.get("/tasks/", HTTP_X_PROFILE="1")
+        capture = ProfileCapture.objects.get()
+        self.assertEqual(response["X-Profile-Capture"], str(capture.pk))
+        self.assertEqual(
+            (capture.kind, capture.source, capture.name, capture.user),
+            (
+                "request",
+                "header",
+                "task_manager.tasks.views.GenericPendingTaskView",
+                self.user,
+            ),
+        )
+        self.assertEqual(capture.label, "GET /tasks/ [200]")
+        self.assertEqual(self.read_capture(capture)["profiles"][0]["type"], "sampled")
+
+    def test_trigger_consumed(self):
+        ProfileTrigger.objects.create(
+            kind="request", target="GenericAllTaskView", remaining=1
+        )
+        self.client.get("/tasks/")
+        self.assertFalse(ProfileCapture.objects.exists())
+        response = self.client.get("/all-tasks/")
+        self.assertIn("X-Profile-Capture", response)
+        response = self.client.get("/all-tasks/")
+        self.assertNotIn("X-Profile-Capture", response)
+        self.assertEqual(ProfileCapture.objects.get().source, "trigger")
+        self.assertEqual(ProfileTrigger.objects.get().remaining, 0)
+
+    def test_expired_trigger(self):
+        ProfileTrigger.objects.create(
+            kind="request", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.client.get("/tasks/")
+        self.assertNotIn("X-Profile-Capture", response)
+
+    def test_task_trigger(self):
+        ProfileTrigger.objects.create(kind="task", target="send_email_reminder")
+        send_email_reminder.apply()
+        capture = ProfileCapture.objects.get()
+        self.assertEqual((capture.kind, capture.source), ("task", "trigger"))
+        self.assertTrue(capture.name.endswith("send_email_reminder"))
+        self.assertTrue(capture.label.endswith("[SUCCESS]"))
+
+    @override_settings(PROFILING_MAX_CAPTURES=2)
+    def test_captures_pruned(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        cache.clear()
+        pks = [
+            self.client.get("/tasks/", HTTP_X_PROFILE="1")["X-Profile-Capture"]
+            for _ in range(3)
+        ]
+        self.assertEqual(
+            list(ProfileCapture.objects.values_list("pk", flat=True)),
+            [int(pk) for pk in reversed(pks[1:])],
+        )
+
+    def test_speedscope(self):
+        def busy():
+            deadline = monotonic() + 0.05
+            while monotonic() < deadline:
+                pass
+
+        sampler = Sampler(interval=0.001).start()
+        busy()
+        sampler.stop()
+        profile = sampler.speedscope("busy")
+        samples = profile["profiles"][0]["samples"]
+        self.assertGreater(len(samples), 5)
+        self.assertEqual(len(samples), len(profile["profiles"][0]["weights"]))
+        names = [frame["name"] for frame in profile["shared"]["frames"]]
+        self.assertIn("busy", names)
+        # * Root first, the sampled function last
+        leaves = [names[sample[-1]] for sample in samples]
+        self.assertGreater(leaves.count("busy"), len(samples) / 2)
+
+    def test_admin_download(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True, is_superuser=True)
+        cache.clear()
+        pk = self.client.get("/tasks/", HTTP_X_PROFILE="1")["X-Profile-Capture"]
+        response = self.client.get("/admin/tasks/profilecapture/")
+        self.assertContains(response, f"/admin/tasks/profilecapture/{pk}/download/")
+        response = self.client.get(f"/admin/tasks/profilecapture/{pk}/download/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(".speedscope.json", response["Content-Disposition"])
+        profile = json.loads(b"".join(response.streaming_content))
+        self.assertIn("shared", profile)
@@ -0,0 +1,110 @@
+from django.core import mail
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from tasks.models import STATUS_CHOICES, Task, User
+from tasks.tasks import send_email_reminder
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTestCases(TransactionTestCase):
+    """`replica` is never written to by the app, rows only there stand in for replicated data"""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        # * `bulk_create` skips signals, nothing is written back to `default`
+        User.objects.using("replica").bulk_create([self.user])
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+
+    def create_task(self, title, using="default"):
+        task = Task(
+            title=title,
+            description="From Milk shop",
+            priority=1,
+            completed=False,
+            status=STATUS_CHOICES[0][0],
+            user=self.user,
+        )
+        if using == "default":
+            task.save()
+        else:
+            Task.objects.using(using).bulk_create([task])
+        return Task.objects.using(using).get(title=title)
+
+    def test_landing_and_detail_read_from_replica(self):
+        self.create_task("Only on the primary")
+        task = self.create_task("Replicated", using="replica")
+
+        response = self.client.get("/tasks/")
+        self.assertContains(response, "Replicated")
+        self.assertNotContains(response, "Only on the primary")
+        self.assertEqual(self.client.get(f"/detail-task/{task.pk}/").status_code, 200)
+
+    def test_api_reads_from_replica(self):
+        self.create_task("Only on the primary")
+        self.create_task("Replicated", using="replica")
+
+        titles = [task["title"] for task in self.client.get("/api/v1/task/").data]
+        self.assertEqual(titles, ["Replicated"])
+
+    def test_export_reads_from_replica(self):
+        self.create_task("Only on the primary")
+        self.create_task("Replicated", using="replica")
+
+        response = self.client.get("/api/v1/task/export/?filetype=jsonl")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Replicated", content)
+        self.assertNotIn("Only on the primary", content)
+
+    def test_read_your_writes(self):
+        self.create_task("Replicated", using="replica")
+        response = self.client.post(
+            "/create-task/",
+            {
+                "title": "Just written",
+                "description": "From Milk shop",
+                "priority": 2,
+                "completed": False,
+                "status": STATUS_CHOICES[0][0],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+
+        response = self.client.get("/tasks/")
+        self.assertContains(response, "Just written")
+        self.assertNotContains(response, "Replicated")
+
+    def test_pin_expires(self):
+        self.create_task("Replicated", using="replica")
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            self.client.post(
+                "/api/v1/task/",
+                {"title": "Just written", "description": "From Milk shop"},
+            )
+        titles = [task["title"] for task in self.client.get("/api/v1/task/").data]
+        self.assertEqual(titles, ["Replicated"])
+
+    def test_writes_go_to_primary(self):
+        task = self.create_task("Replicated")
+        Task.objects.using("replica").bulk_create([task])
+        task = Task.objects.using("replica").get(pk=task.pk)
+        # * Read from the replica, saved to the primary
+        task.title = "Renamed"
+        task.save()
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Renamed")
+        self.assertEqual(
+            Task.objects.using("replica").get(pk=task.pk).title, "Replicated"
+        )
+
+    def test_report_reads_from_replica(self):
+        self.create_task("Only on the primary")
+        self.create_task("Replicated", using="replica")
+        send_email_reminder.apply()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Replicated", mail.outbox[0].body)
+        self.assertNotIn("Only on the primary", mail.outbox[0].body)
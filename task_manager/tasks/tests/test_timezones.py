@@ -0,0 +1,24 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+class APITimeZoneTestCases(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_search(self):
+        response = self.client.get("/api/v1/time-zones/", {"search": "new york"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(), [{"region": "America", "zones": ["America/New_York"]}]
+        )
+        self.assertIn("max-age=86400", response["Cache-Control"])
+
+    def test_groups(self):
+        groups = {
+            group["region"]: group["zones"]
+            for group in self.client.get("/api/v1/time-zones/").json()
+        }
+        self.assertIn("Europe/Berlin", groups["Europe"])
+        self.assertIn("UTC", groups["Other"])
@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from tasks.models import STATUS_CHOICES, User
+
+
+class AtomicWritesTestCases(TransactionTestCase):
+    """Test that reads skip the `ATOMIC_REQUESTS` transaction and writes keep it"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+
+    def transactions(self, method, url, **data):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400)
+        return [query["sql"] for query in context.captured_queries].count("BEGIN")
+
+    def test_reads_outside_transaction(self):
+        self.assertEqual(self.transactions("get", "/tasks/"), 0)
+        self.assertEqual(self.transactions("get", "/api/v1/task/"), 0)
+
+    @override_settings(TASKS_NON_ATOMIC_READS=False)
+    def test_reads_in_transaction(self):
+        self.assertEqual(self.transactions("get", "/tasks/"), 1)
+
+    def test_writes_in_transaction(self):
+        task = {
+            "title": "Buy Milk!",
+            "description": "From Milk shop",
+            "priority": 1,
+            "completed": False,
+            "status": STATUS_CHOICES[0][0],
+        }
+        self.assertEqual(self.transactions("post", "/create-task/", **task), 1)
@@ -1,20 +1,39 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from multiprocessing.connection import wait
+from smtplib import SMTPException
 from time import sleep
+from unittest import mock
 from django.contrib.auth.models import AnonymousUser
-from django.test import LiveServerTestCase, RequestFactory, TestCase
+from django.core import mail
+from django.core.cache import caches
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.test import LiveServerTestCase, RequestFactory, TestCase, override_settings
 from rest_framework import status
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
-from tasks.models import STATUS_CHOICES, EmailTaskReport, Task, User
-from tasks.tasks import send_email_reminder
+from tasks import models as models_module
+from tasks import tasks as tasks_module
+from tasks import views as views_module
+from tasks.models import (
+    STATUS_CHOICES,
+    EmailReportRun,
+    EmailTaskReport,
+    StaleTaskError,
+    Task,
+    User,
+    next_change_seq,
+)
+from tasks.tasks import prune_email_report_runs, send_email_reminder
 from tasks.views import (
     EmailTaskReportForm,
     GenericAllTaskView,
     GenericCompletedTaskView,
     GenericPendingTaskView,
     TaskCreateForm,
+    locking_priority_cascade,
+    optimistic_priority_cascade,
 )
 
 from selenium.webdriver.common.by import By
@@ -146,7 +165,7 @@ class ViewTestCases(TestCase):
         )
         task.save()
         response = self.client.delete(f"/delete-task/{task.pk}/")
-        self.assertFalse(Task.objects.filter(id=task.id).exists())
+        self.assertFalse(Task.objects.live().filter(id=task.id).exists())
 
     def test_mail_settings(self):
         self.client.login(username="bruce_wayne", password="i_am_batman")
@@ -154,6 +173,277 @@ class ViewTestCases(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
+class QueryCountTestCases(TestCase):
+    """Query budget of each HTML page for a logged in user with a full page of tasks"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        for priority in range(12):
+            Task.objects.create(
+                title=f"Task number {priority}",
+                description="From Milk shop",
+                priority=priority,
+                completed=priority % 3 == 0,
+                status=STATUS_CHOICES[0][0],
+                user=self.user,
+            )
+        self.task = Task.objects.filter(user=self.user).first()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+
+    # * Every request: SAVEPOINT + RELEASE (ATOMIC_REQUESTS inside `TestCase`), session and user lookup
+    def assertPageQueries(self, url, num):
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    # * Landing pages: counts, paginator count and the page come from a single statement
+    def test_pending_tasks_queries(self):
+        self.assertPageQueries("/tasks/", 5)
+
+    def test_all_tasks_queries(self):
+        self.assertPageQueries("/all-tasks/", 5)
+
+    def test_completed_tasks_queries(self):
+        self.assertPageQueries("/completed-tasks/", 5)
+
+    def test_landing_page_context(self):
+        response = self.client.get("/tasks/?page=2")
+        self.assertEqual(response.context["count_completed"], 4)
+        self.assertEqual(response.context["count_total"], 12)
+        self.assertEqual(response.context["paginator"].count, 8)
+        self.assertEqual(
+            [task.priority for task in response.context["tasks"]], [8, 10, 11]
+        )
+
+    def test_landing_fragments(self):
+        caches["template_fragments"].clear()
+        self.client.get("/all-tasks/")
+        cached = len(caches["template_fragments"]._cache)
+        # * header, five cards, pagination
+        self.assertEqual(cached, 7)
+        task = Task.objects.get(pk=self.task.pk)
+        task.title = "Task number one hundred"
+        task.save()
+        response = self.client.get("/all-tasks/")
+        self.assertContains(response, "Task number one hundred")
+        self.assertNotContains(response, "Task number 0<")
+        self.assertContains(response, "4 of 12 tasks completed")
+        self.assertEqual(len(caches["template_fragments"]._cache), cached + 1)
+
+    def test_task_detail_queries(self):
+        self.assertPageQueries(f"/detail-task/{self.task.pk}/", 5)
+
+    def test_task_update_queries(self):
+        self.assertPageQueries(f"/update-task/{self.task.pk}/", 5)
+
+    def test_task_delete_queries(self):
+        self.assertPageQueries(f"/delete-task/{self.task.pk}/", 5)
+
+    def test_task_create_queries(self):
+        self.assertPageQueries("/create-task/", 2)
+
+    def test_mail_settings_queries(self):
+        self.assertPageQueries(f"/mail-settings/{self.user.pk}/", 5)
+
+
+class ConcurrencyTestCases(TestCase):
+    """Test versioned saves and both priority cascade modes"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
+        self.user.set_password("i_am_batman")
+        self.user.save()
+        self.client.login(username="bruce_wayne", password="i_am_batman")
+        self.tasks = {
+            priority: Task.objects.create(
+                title=f"Task {priority}",
+                description="Cascade",
+                priority=priority,
+                user=self.user,
+            )
+            for priority in (1, 2, 3, 5)
+        }
+
+    def priorities(self):
+        return list(
+            Task.objects.filter(user=self.user)
+            .order_by("priority")
+            .values_list("title", "priority")
+        )
+
+    def post_task(self, url, priority, **data):
+        return self.client.post(
+            url,
+            {
+                "title": "New task",
+                "description": "Cascade",
+                "priority": priority,
+                "completed": False,
+                "status": STATUS_CHOICES[0][0],
+                **data,
+            },
+        )
+
+    def test_stale_save(self):
+        first = Task.objects.get(pk=self.tasks[1].pk)
+        second = Task.objects.get(pk=self.tasks[1].pk)
+        first.title = "First"
+        first.save()
+        self.assertEqual(first.version, 2)
+        second.title = "Second"
+        # * `save()` marks the surrounding atomic block for rollback, callers catch it outside a savepoint
+        with self.assertRaises(StaleTaskError), transaction.atomic():
+            second.save()
+        self.assertEqual(Task.objects.get(pk=first.pk).title, "First")
+
+    def test_cascade_modes(self):
+        for mode in ("optimistic", "locking"):
+            with self.subTest(mode=mode), override_settings(
+                TASKS_PRIORITY_CASCADE_MODE=mode
+            ):
+                Task.objects.filter(title="New task").delete()
+                for task in self.tasks.values():
+                    Task.objects.filter(pk=task.pk).update(priority=task.priority)
+                self.post_task("/create-task/", 1)
+                self.assertEqual(
+                    self.priorities(),
+                    [
+                        ("New task", 1),
+                        ("Task 1", 2),
+                        ("Task 2", 3),
+                        ("Task 3", 4),
+                        ("Task 5", 5),
+                    ],
+                )
+
+    @override_settings(TASKS_PRIORITY_CASCADE_RETRIES=0)
+    def test_cascade_fallback(self):
+        self.post_task("/create-task/", 2)
+        self.assertEqual(
+            self.priorities(),
+            [
+                ("Task 1", 1),
+                ("New task", 2),
+                ("Task 2", 3),
+                ("Task 3", 4),
+                ("Task 5", 5),
+            ],
+        )
+
+    def test_cascade_versions(self):
+        version = Task.objects.get(pk=self.tasks[2].pk).version
+        self.post_task("/create-task/", 2)
+        self.assertEqual(Task.objects.get(pk=self.tasks[2].pk).version, version + 1)
+        self.assertEqual(Task.objects.get(pk=self.tasks[1].pk).version, version)
+
+    def test_update_skips_itself(self):
+        task = self.tasks[5]
+        self.post_task(f"/update-task/{task.pk}/", 2, version=task.version)
+        self.assertEqual(
+            self.priorities(),
+            [
+                ("Task 1", 1),
+                ("New task", 2),
+                ("Task 2", 3),
+                ("Task 3", 4),
+            ],
+        )
+
+    # * A run longer than SQLite's expression depth (1000) and more than one `CASCADE_CHUNK_SIZE`
+    def test_optimistic_long_run(self):
+        Task.objects.filter(user=self.user).delete()
+        Task.objects.bulk_create(
+            Task(title=f"Task {i}", description="Cascade", priority=i, user=self.user)
+            for i in range(1, 1201)
+        )
+        pending = Task.objects.live_for(self.user).pending()
+        self.assertEqual(optimistic_priority_cascade(pending, 1, self.user.pk), 1200)
+        self.assertEqual(
+            list(pending.order_by("priority").values_list("priority", flat=True)),
+            list(range(2, 1202)),
+        )
+
+    def test_optimistic_conflict_retried(self):
+        attempts = []
+
+        # * Another writer moves a task of the run between the read and the `UPDATE`, on the first attempt only
+        # * (inside the attempt's transaction, its rollback undoes the move as well)
+        def concurrent_move(user_id):
+            if not attempts:
+                Task.objects.filter(pk=self.tasks[2].pk).update(priority=4)
+            attempts.append(user_id)
+            return next_change_seq(user_id)
+
+        pending = Task.objects.live_for(self.user).pending()
+        with mock.patch.object(views_module, "next_change_seq", concurrent_move):
+            self.assertEqual(optimistic_priority_cascade(pending, 1, self.user.pk), 3)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(
+            self.priorities(),
+            [("Task 1", 2), ("Task 2", 3), ("Task 3", 4), ("Task 5", 5)],
+        )
+
+    # * A lock timeout / deadlock half way through the run rolls the whole cascade back
+    def test_locking_cascade_error_propagates(self):
+        reads = []
+
+        def lock_timeout(execute, sql, params, many, context):
+            if sql.startswith("SELECT") and '"tasks_task"' in sql:
+                reads.append(sql)
+                if len(reads) == 3:
+                    raise OperationalError("lock timeout")
+            return execute(sql, params, many, context)
+
+        pending = Task.objects.live_for(self.user).pending()
+        with self.assertRaises(OperationalError), connection.execute_wrapper(
+            lock_timeout
+        ):
+            locking_priority_cascade(pending, 1, self.user.pk)
+        self.assertEqual(
+            self.priorities(),
+            [("Task 1", 1), ("Task 2", 2), ("Task 3", 3), ("Task 5", 5)],
+        )
+
+    def test_delete_conflict(self):
+        task = self.tasks[5]
+
+        # * Another writer saves between `get_object()` and the tombstone `UPDATE`
+        def concurrent_save(user_id):
+            Task.objects.filter(pk=task.pk).update(version=F("version") + 1)
+            return next_change_seq(user_id)
+
+        with mock.patch.object(models_module, "next_change_seq", concurrent_save):
+            response = self.client.post(f"/delete-task/{task.pk}/")
+        self.assertContains(response, "changed by someone else", status_code=409)
+        self.assertFalse(Task.objects.get(pk=task.pk).deleted)
+
+        response = self.client.post(f"/delete-task/{task.pk}/")
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertTrue(Task.objects.get(pk=task.pk).deleted)
+
+    def test_update_conflict(self):
+        task = self.tasks[5]
+        Task.objects.filter(pk=task.pk).update(version=F("version") + 1)
+        response = self.post_task(f"/update-task/{task.pk}/", 1, version=task.version)
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(
+            response, f'name="version" value="{task.version + 1}"', status_code=409
+        )
+        # * The cascade was rolled back with the conflicting save
+        self.assertEqual(
+            self.priorities(),
+            [("Task 1", 1), ("Task 2", 2), ("Task 3", 3), ("Task 5", 5)],
+        )
+
+        response = self.post_task(
+            f"/update-task/{task.pk}/", 1, version=task.version + 1
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(self.priorities()[0], ("New task", 1))
+
+
 class FormTestCases(TestCase):
     def test_user_create_form(self):
         form = TaskCreateForm(
@@ -182,6 +472,19 @@ class FormTestCases(TestCase):
 
         self.assertTrue(form.is_valid())
 
+    def test_email_form_time_zone(self):
+        form = EmailTaskReportForm(
+            data={"send_time": "2022-02-14 07:25:00", "time_zone": "Asia/Kolkata"}
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["send_time"].hour, 1)
+        form = EmailTaskReportForm(
+            data={"send_time": "2022-02-14 07:25:00", "time_zone": "Mars/Olympus"}
+        )
+        self.assertEqual(
+            form.errors["time_zone"], ["Mars/Olympus is not a known time zone."]
+        )
+
 
 class CeleryTestCases(TestCase):
     def setUp(self):
@@ -204,24 +507,43 @@ class CeleryTestCases(TestCase):
         ).save()
         send_email_reminder.apply()
 
+    # * Every user gets a report, due right away
+    def test_email_report_run_recorded(self):
+        send_email_reminder.apply()
+        run = EmailReportRun.objects.get()
+        self.assertEqual(
+            (run.reports_due, run.emails_rendered, run.emails_sent, run.emails_failed),
+            (1, 1, 1, 0),
+        )
+        self.assertGreater(run.queries, 0)
+        self.assertGreaterEqual(run.max_lag, 0)
+        self.assertEqual(len(mail.outbox), 1)
 
-# Trying Selenium
-# class HostTestCases(LiveServerTestCase):
-#     def setUp(self):
-#         self.user = User.objects.create(username="bruce_wayne", email="bruce@wayne.org")
-#         self.user.set_password("i_am_batman")
-#         self.user.save()
-
-#     def test_userlogin_page(self):
-#         driver = webdriver.Chrome()
-
-#         driver.get("http://127.0.0.1:8000/user/login/")
-#         username = driver.find_element_by_id("id_username")
-#         password = driver.find_element_by_id("id_password")
-#         submit = driver.find_element_by_xpath("/html/body/div/div/form/button")
+    # * Nothing due: The run is only counted in the metrics
+    def test_idle_email_report_run_not_recorded(self):
+        EmailTaskReport.objects.update(send_time=datetime.now() + timedelta(days=1))
+        result = send_email_reminder.apply().get()
+        self.assertEqual(result["reports_due"], 0)
+        self.assertFalse(EmailReportRun.objects.exists())
 
-#         username.send_keys("bruce_wayne")
-#         password.send_keys("i_am_batman")
-#         submit.send_keys(Keys.RETURN)
+    def test_email_report_runs_pruned(self):
+        EmailReportRun.objects.create(started_at=datetime.now() - timedelta(days=30))
+        recent_run = EmailReportRun.objects.create()
+        self.assertEqual(prune_email_report_runs.apply().get(), {"runs_deleted": 1})
+        self.assertEqual(
+            list(EmailReportRun.objects.values_list("pk", flat=True)),
+            [recent_run.pk],
+        )
 
-#         self.assertEqual(Task.objects.filter(user=self.user).count(), 0)
+    def test_failed_email_retried(self):
+        report = EmailTaskReport.objects.get(user=self.user)
+        with mock.patch.object(
+            tasks_module, "send_mail", side_effect=SMTPException
+        ), self.assertLogs("task_manager.tasks.tasks", "ERROR"):
+            result = send_email_reminder.apply().get()
+        self.assertEqual(result["emails_failed"], 1)
+        run = EmailReportRun.objects.get()
+        self.assertEqual((run.emails_sent, run.emails_failed), (0, 1))
+        self.assertIsNone(run.max_lag)
+        # * Still due, the next run tries again
+        self.assertEqual(EmailTaskReport.objects.get().send_time, report.send_time)
@@ -0,0 +1,47 @@
+import zoneinfo
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+
+# * Time Zone Catalogue: IANA zone names from `zoneinfo` (system database or the `tzdata` package),
+# * read on first use and kept for the life of the process instead of being built into `choices` at import
+# ? Refer: https://docs.python.org/3/library/zoneinfo.html#data-sources
+TIME_ZONE_SEARCH_LIMIT = 50
+
+
+@lru_cache(maxsize=None)
+def time_zone_names():
+    return frozenset(zoneinfo.available_timezones())
+
+
+# * Grouped by region (`Europe/Berlin` -> "Europe"), zones without a region (`UTC`, `EST`) under "Other"
+@lru_cache(maxsize=None)
+def time_zone_groups():
+    groups = {}
+    for name in sorted(time_zone_names()):
+        region = name.split("/", 1)[0] if "/" in name else "Other"
+        groups.setdefault(region, []).append(name)
+    return groups
+
+
+def validate_time_zone(value):
+    if value not in time_zone_names():
+        raise ValidationError(
+            "%(value)s is not a known time zone.",
+            code="invalid_time_zone",
+            params={"value": value},
+        )
+
+
+def search_time_zones(query, limit=TIME_ZONE_SEARCH_LIMIT):
+    """Grouped zones whose name contains `query`, e.g. "new york" finds `America/New_York`"""
+    query = query.strip().lower().replace(" ", "_")
+    results, found = {}, 0
+    for region, names in time_zone_groups().items():
+        for name in names:
+            if query in name.lower():
+                results.setdefault(region, []).append(name)
+                found += 1
+                if found == limit:
+                    return results
+    return results
@@ -0,0 +1,36 @@
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# * Atomic Writes: Opt a view out of `ATOMIC_REQUESTS` for safe methods only
+# * GET / HEAD / OPTIONS run in autocommit (no BEGIN / COMMIT round trips, no transaction held while rendering),
+# * every other method is still wrapped in `transaction.atomic` exactly like `ATOMIC_REQUESTS` would
+# ? Refer: https://docs.djangoproject.com/en/3.2/topics/db/transactions/#tying-transactions-to-http-requests
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def atomic_writes(view_func=None, using=DEFAULT_DB_ALIAS):
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (
+                settings.TASKS_NON_ATOMIC_READS
+                and request.method in SAFE_METHODS
+                # * Already inside someone's transaction: a savepoint keeps DRF's `set_rollback()` on errors local
+                and not transaction.get_connection(using).in_atomic_block
+            ):
+                return view_func(request, *args, **kwargs)
+            with transaction.atomic(using=using):
+                return view_func(request, *args, **kwargs)
+
+        return transaction.non_atomic_requests(using=using)(wrapper)
+
+    return decorator(view_func) if view_func else decorator
+
+
+# * Atomic Writes (Mixin): `atomic_writes` for class-based views and DRF viewsets, applied by `as_view()`
+class AtomicWritesMixin:
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return atomic_writes(super().as_view(*args, **kwargs))
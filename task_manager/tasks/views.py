@@ -1,17 +1,48 @@
+import logging
 from datetime import datetime
+from time import perf_counter
+from zoneinfo import ZoneInfo
 
+from django.conf import settings
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView
-from django.db import transaction
-from django.forms import ModelForm, ValidationError
-from django.http import HttpResponse, HttpResponseRedirect
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Page
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Count, F, IntegerField, Q, Subquery
+from django.forms import HiddenInput
+from django.forms import IntegerField as IntegerFormField
+from django.forms import ModelForm, TextInput, ValidationError
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotFound,
+    HttpResponseRedirect,
+    JsonResponse,
+)
+from django.utils.translation import gettext as _
 from django.views.generic import ListView
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
-from pytz import timezone
 
-from task_manager.tasks.models import EmailTaskReport, Task, User
+from task_manager.tasks.budgets import query_budget
+from task_manager.tasks.events import publish_event
+from task_manager.tasks.memo import memoised, prime
+from task_manager.tasks.metrics import export_metrics
+from task_manager.tasks.models import (
+    EmailTaskReport,
+    StaleTaskError,
+    Task,
+    User,
+    next_change_seq,
+)
+from task_manager.tasks.pooling import connection_stats
+from task_manager.tasks.routers import ReplicaReadsMixin
+from task_manager.tasks.timezones import validate_time_zone
+from task_manager.tasks.transactions import AtomicWritesMixin, atomic_writes
+
+logger = logging.getLogger(__name__)
 
 
 class UserForm(UserCreationForm):
@@ -42,53 +73,259 @@ class UserLoginView(LoginView):
 
 # ! Additional Views
 # * Learning Cookies: Simple view counter tied with each session
+# * Write Coalescing: Hits are counted in the cache and written to the session every
+# * `SESSION_COUNTER_FLUSH_EVERY` views, so most hits don't save the session.
+# * Up to that many views can be lost if the cache is flushed.
+@atomic_writes
 def session_storage_view(request):
     total_views = request.session.get("total_views", 0)
-    request.session["total_views"] = total_views + 1
+    pending_views = None
+    if request.session.session_key is not None:
+        counter_key = f"tasks:session-views:{request.session.session_key}"
+        cache.add(counter_key, 0, settings.SESSION_COOKIE_AGE)
+        try:
+            pending_views = cache.incr(counter_key)
+        except ValueError:
+            # * Evicted between `add` and `incr`
+            pass
+    if pending_views is None:
+        # * New session, or no counter (evicted, or the cache is down and `IGNORE_EXCEPTIONS` returned `None`):
+        # * Write through so the session (and its key) gets created / the hit is kept
+        request.session["total_views"] = total_views + 1
+        return HttpResponse(f"Total views is {total_views} and user is {request.user}")
+    if pending_views >= settings.SESSION_COUNTER_FLUSH_EVERY:
+        request.session["total_views"] = total_views + pending_views
+        try:
+            cache.decr(counter_key, pending_views)
+        except ValueError:
+            # * Evicted since the `incr`: Nothing left to take back
+            pass
+    total_views += pending_views - 1
     return HttpResponse(f"Total views is {total_views} and user is {request.user}")
 
 
+# * Database Health: Readiness probe, `SELECT 1` on every configured database
+# * Responds 503 as soon as one database is unreachable so the load balancer takes the instance out of rotation
+# * Anyone gets the up / down status, the per database timings and this process's connection stats only go to
+# * `METRICS_ALLOWED_IPS` like `/metrics/`
+@transaction.non_atomic_requests
+def database_health_view(request):
+    databases = {}
+    for connection in connections.all():
+        start = perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            healthy = True
+        except DatabaseError:
+            healthy = False
+        databases[connection.alias] = {
+            "healthy": healthy,
+            "ms": round((perf_counter() - start) * 1000, 2),
+        }
+    healthy = all(db["healthy"] for db in databases.values())
+    status_code = 200 if healthy else 503
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return JsonResponse({"healthy": healthy}, status=status_code)
+    return JsonResponse(
+        {
+            "healthy": healthy,
+            "databases": databases,
+            "connections": connection_stats(),
+        },
+        status=status_code,
+    )
+
+
+# * Metrics: Prometheus scrape target for `PerformanceMiddleware`'s metrics, only answered to `METRICS_ALLOWED_IPS`
+@transaction.non_atomic_requests
+def metrics_view(request):
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseNotFound()
+    content, content_type = export_metrics()
+    return HttpResponse(content, content_type=content_type)
+
+
 # ! Pre-requisite Mixins and functions
 # * Authorisation (Combined Mixin): To allow access only to users who are 'logged in' and allow them only to view their respective 'tasks'
 class AuthorisedTaskManager(LoginRequiredMixin):
     def get_queryset(self):
-        return Task.objects.filter(deleted=False, user=self.request.user)
+        return Task.objects.live_for(self.request.user)
 
 
 # * Task Counter (Mixin): Creates context variables and count the completed tasks in `count_completed` and total number of tasks in `count_total`
 # ? Refer: https://docs.djangoproject.com/en/4.0/ref/class-based-views/generic-display/
+# * Single Round Trip: The counts ride along with the requested page as conditional aggregates in scalar subqueries,
+# * which the database evaluates once per statement, and the paginator's count is derived from them.
+# ? Refer: https://docs.djangoproject.com/en/4.0/ref/models/expressions/#subquery-expressions
 class TaskCounterMixin:
+    count_expressions = {
+        "count_total": Count("pk"),
+        "count_completed": Count("pk", filter=Q(completed=True)),
+    }
+
+    # * Number of tasks listed by the landing page, overridden by the pending and completed pages
+    def get_landing_count(self, counts):
+        return counts["count_total"]
+
+    def get_task_counts(self):
+        return memoised(
+            self.request,
+            ("task_counts", self.request.user.pk),
+            lambda: Task.objects.live_for(self.request.user).aggregate(
+                **self.count_expressions
+            ),
+        )
+
+    def get_counted_queryset(self, queryset):
+        live_tasks = Task.objects.live_for(self.request.user).order_by()
+        return queryset.annotate(
+            **{
+                name: Subquery(
+                    live_tasks.values("user")
+                    .annotate(count=expression)
+                    .values("count"),
+                    output_field=IntegerField(),
+                )
+                for name, expression in self.count_expressions.items()
+            }
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(
+            queryset,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        page = (
+            self.kwargs.get(self.page_kwarg)
+            or self.request.GET.get(self.page_kwarg)
+            or 1
+        )
+        try:
+            page_number = int(page)
+        except ValueError:
+            if page != "last":
+                raise Http404(
+                    _("Page is not “last”, nor can it be converted to an int.")
+                )
+            # * Last page needs the count before the offset is known
+            paginator.count = self.get_landing_count(self.get_task_counts())
+            page_number = paginator.num_pages
+
+        bottom = max(page_number - 1, 0) * paginator.per_page
+        end = bottom + paginator.per_page + paginator.orphans
+        rows = list(self.get_counted_queryset(queryset)[bottom:end])
+        if rows:
+            counts = {name: getattr(rows[0], name) for name in self.count_expressions}
+            prime(self.request, ("task_counts", self.request.user.pk), counts)
+        else:
+            # * Empty or out of range page: fall back to a plain aggregate
+            counts = self.get_task_counts()
+        paginator.count = self.get_landing_count(counts)
+
+        try:
+            page_number = paginator.validate_number(page_number)
+        except InvalidPage as e:
+            raise Http404(
+                _("Invalid page (%(page_number)s): %(message)s")
+                % {"page_number": page_number, "message": str(e)}
+            )
+        top = bottom + paginator.per_page
+        if top + paginator.orphans >= paginator.count:
+            top = paginator.count
+        page = Page(rows[: top - bottom], page_number, paginator)
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["count_completed"] = Task.objects.filter(
-            completed=True, deleted=False, user=self.request.user
-        ).count()
-        context["count_total"] = Task.objects.filter(
-            deleted=False, user=self.request.user
-        ).count()
+        counts = self.get_task_counts()
+        context["count_completed"] = counts["count_completed"]
+        context["count_total"] = counts["count_total"]
         return context
 
 
 # * Priority Casacade Logic (Database Transaction Function): Lifted up for model logic in `GenericTaskCreateView` and `GenericTaskUpdateView`
+# * `TASKS_PRIORITY_CASCADE_MODE`: "optimistic" tries `optimistic_priority_cascade` first,
+# * "locking" always locks the run
 def priority_cascade_logic(form, user):
-    conflicting_priority = form.cleaned_data["priority"]
+    priority = form.cleaned_data["priority"]
+    # * The edited task moves to `priority` itself, it never has to make room for itself
+    pending = Task.objects.live_for(user).pending().exclude(pk=form.instance.pk)
+    shifted = None
+    if settings.TASKS_PRIORITY_CASCADE_MODE == "optimistic":
+        shifted = optimistic_priority_cascade(pending, priority, user.pk)
+    if shifted is None:
+        shifted = locking_priority_cascade(pending, priority, user.pk)
+    # * `bulk_update` / `update()` send no signals, one event covers every shifted task
+    if shifted:
+        publish_event(user.pk, "tasks.changed", reason="priority_cascade")
+
+
+# * Change Sequence: Every shifted task gets one new `change_seq` of `user_id`
+# * Lock Order: The sequence row is taken before the tasks are locked, as in `Task.save()` (see `TaskChangeSequence`)
+def locking_priority_cascade(pending, conflicting_priority, user_id):
     tasks = list()
     with transaction.atomic():
+        change_seq = next_change_seq(user_id)
         while True:
             # ? Refer: https://docs.djangoproject.com/en/4.0/ref/models/querysets/#get
             try:
-                task = Task.objects.select_for_update().get(
-                    deleted=False,
-                    completed=False,
-                    user=user,
-                    priority=conflicting_priority,
-                )
+                task = pending.select_for_update().get(priority=conflicting_priority)
                 conflicting_priority += 1
                 task.priority += 1
+                task.version = F("version") + 1
                 tasks.append(task)
-            except:
+            except Task.DoesNotExist:
                 break
-        Task.objects.bulk_update(tasks, ["priority"])
+        for task in tasks:
+            task.change_seq = change_seq
+        Task.objects.bulk_update(tasks, ["priority", "version", "change_seq"])
+    return len(tasks)
+
+
+# * Optimistic Cascade: Reads the run of consecutive priorities without locks and shifts it with
+# * `UPDATE ... WHERE id IN (...) AND priority >= start AND priority < end`, `CASCADE_CHUNK_SIZE` tasks at a time,
+# * retried when a task of the run moved, was completed or was deleted in between (fewer rows updated than read)
+# * Returns the number of shifted tasks, `None` once `TASKS_PRIORITY_CASCADE_RETRIES` is exhausted so the caller
+# * can fall back to locking.
+CASCADE_CHUNK_SIZE = 500
+
+
+def optimistic_priority_cascade(pending, priority, user_id):
+    for attempt in range(settings.TASKS_PRIORITY_CASCADE_RETRIES):
+        run = []
+        tasks = (
+            pending.filter(priority__gte=priority)
+            .order_by("priority")
+            .values_list("pk", "priority")
+        )
+        for pk, task_priority in tasks.iterator(chunk_size=100):
+            if task_priority != priority + len(run):
+                break
+            run.append(pk)
+        if not run:
+            return 0
+        with transaction.atomic():
+            change_seq = next_change_seq(user_id)
+            updated = 0
+            for start in range(0, len(run), CASCADE_CHUNK_SIZE):
+                end = start + CASCADE_CHUNK_SIZE
+                chunk = run[start:end]
+                updated += pending.filter(
+                    pk__in=chunk,
+                    priority__gte=priority + start,
+                    priority__lt=priority + start + len(chunk),
+                ).update(
+                    priority=F("priority") + 1,
+                    version=F("version") + 1,
+                    change_seq=change_seq,
+                )
+            if updated == len(run):
+                return updated
+            transaction.set_rollback(True)
+    return None
 
 
 # ! Task Views
@@ -109,9 +346,21 @@ class TaskCreateForm(ModelForm):
         fields = ["title", "description", "completed", "priority", "status"]
 
 
+# * Task Update Form: Carries the `version` the user is editing, a newer row makes `save()` raise `StaleTaskError`
+class TaskUpdateForm(TaskCreateForm):
+    version = IntegerFormField(widget=HiddenInput, min_value=1, required=False)
+
+    # * Posted without a `version`: Last write wins, as before
+    def clean_version(self):
+        return self.cleaned_data["version"] or self.instance.version
+
+    class Meta(TaskCreateForm.Meta):
+        fields = TaskCreateForm.Meta.fields + ["version"]
+
+
 # ! CRUD with Task Model
 # * Create Task Page: Form consisting of `Task` attributes to create a new record in the database
-class GenericTaskCreateView(CreateView):
+class GenericTaskCreateView(AtomicWritesMixin, CreateView):
     form_class = TaskCreateForm
     template_name = "task/create.html"
     success_url = "/tasks"
@@ -122,8 +371,8 @@ class GenericTaskCreateView(CreateView):
         if form.cleaned_data["completed"] == False:
             priority_cascade_logic(form, self.request.user)
 
-        # * Save newly created object
-        self.object = form.save()
+        # * Save newly created object, owned from the start so its `task.created` event reaches the user
+        self.object = form.save(commit=False)
         self.object.user = self.request.user
         self.object.save()
 
@@ -131,8 +380,8 @@ class GenericTaskCreateView(CreateView):
 
 
 # * Update Task Page: Form consisting of `Task` attributes with their pre-existing data
-class GenericTaskUpdateView(AuthorisedTaskManager, UpdateView):
-    form_class = TaskCreateForm
+class GenericTaskUpdateView(AtomicWritesMixin, AuthorisedTaskManager, UpdateView):
+    form_class = TaskUpdateForm
     template_name = "task/update.html"
     success_url = "/all-tasks"
 
@@ -141,92 +390,168 @@ class GenericTaskUpdateView(AuthorisedTaskManager, UpdateView):
     # ? Refer: https://docs.djangoproject.com/en/4.0/ref/forms/api/#django.forms.Form.has_changed
     def form_valid(self, form):
         """If the form is valid, save the associated model."""
-        if form.has_changed() and (
-            "priority" in form.changed_data
-            or (
-                "completed" in form.changed_data
-                and form.cleaned_data["completed"] == False
-            )
-        ):
-            priority_cascade_logic(form, self.request.user)
-
-        # * Save updated object
-        self.object = form.save()
+        try:
+            # * Savepoint: A conflicting save must not leave the cascade behind
+            with transaction.atomic():
+                if form.has_changed() and (
+                    "priority" in form.changed_data
+                    or (
+                        "completed" in form.changed_data
+                        and form.cleaned_data["completed"] == False
+                    )
+                ):
+                    priority_cascade_logic(form, self.request.user)
+
+                # * Save updated object
+                self.object = form.save()
+        except StaleTaskError:
+            return self.form_conflict(form)
 
         return HttpResponseRedirect(self.get_success_url())
 
+    # * Conflict: Re-render the user's changes against the latest `version`, submitting again overwrites
+    def form_conflict(self, form):
+        form.data = form.data.copy()
+        form.data["version"] = Task.objects.values_list("version", flat=True).get(
+            pk=form.instance.pk
+        )
+        form.add_error(
+            None,
+            "This task was changed by someone else while you were editing it. "
+            "Submit again to overwrite their changes.",
+        )
+        response = self.form_invalid(form)
+        response.status_code = 409
+        return response
+
 
 # * Delete Task Page: Form consists of `confirm`ation button with POST to be a safe-method as soft-deletion of `Task` causes side-effect
-class GenericTaskDeleteView(AuthorisedTaskManager, DeleteView):
+class GenericTaskDeleteView(AtomicWritesMixin, AuthorisedTaskManager, DeleteView):
     model = Task
     template_name = "task/delete.html"
     success_url = "/all-tasks"
 
+    # * The soft-deleted row stays behind as the tombstone synced to offline clients
+    # * Conflict: A save racing the delete re-renders the confirmation with the latest row
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        try:
+            with transaction.atomic():
+                self.object.soft_delete()
+        except StaleTaskError:
+            self.object = self.get_object()
+            context = self.get_context_data(object=self.object, conflict=True)
+            return self.render_to_response(context, status=409)
+        return HttpResponseRedirect(self.get_success_url())
+
 
 # * Detail Task Page: Details of specific `Task` model with context-variable as `object`
-class GenericTaskDetailView(AuthorisedTaskManager, DetailView):
+@query_budget(4, constant=True)
+class GenericTaskDetailView(
+    AtomicWritesMixin, ReplicaReadsMixin, AuthorisedTaskManager, DetailView
+):
     model = Task
     template_name = "task/detail.html"
 
 
 # ! Landing
 # * List Pending Tasks Page: `ListView` of all pending `Task` records available in the database
-class GenericPendingTaskView(TaskCounterMixin, LoginRequiredMixin, ListView):
-    queryset = Task.objects.filter(completed=False, deleted=False).order_by("-priority")
+@query_budget(5, constant=True)
+class GenericPendingTaskView(
+    AtomicWritesMixin,
+    ReplicaReadsMixin,
+    TaskCounterMixin,
+    LoginRequiredMixin,
+    ListView,
+):
+    queryset = Task.objects.live().pending().order_by("-priority")
     template_name = "task/tasks.html"
     context_object_name = "tasks"
     # * Pagination Feature using `paginator`
     paginate_by = 5
 
+    def get_landing_count(self, counts):
+        return counts["count_total"] - counts["count_completed"]
+
     def get_queryset(self):
-        return Task.objects.filter(
-            completed=False, deleted=False, user=self.request.user
-        ).order_by("priority")
+        return Task.objects.live_for(self.request.user).pending().order_by("priority")
 
 
 # * List All Tasks Page: `ListView` of all `Task` records available in the database
-class GenericAllTaskView(TaskCounterMixin, LoginRequiredMixin, ListView):
-    queryset = Task.objects.filter(deleted=False).order_by("-priority")
+@query_budget(5, constant=True)
+class GenericAllTaskView(
+    AtomicWritesMixin,
+    ReplicaReadsMixin,
+    TaskCounterMixin,
+    LoginRequiredMixin,
+    ListView,
+):
+    queryset = Task.objects.live().order_by("-priority")
     template_name = "task/all.html"
     context_object_name = "tasks"
     # * Pagination Feature using `paginator`
     paginate_by = 5
 
     def get_queryset(self):
-        return Task.objects.filter(deleted=False, user=self.request.user).order_by(
-            "priority"
-        )
+        return Task.objects.live_for(self.request.user).order_by("priority")
 
 
 # * List Completed Tasks Page: `ListView` of all completed `Task` records available in the database
-class GenericCompletedTaskView(TaskCounterMixin, LoginRequiredMixin, ListView):
-    queryset = Task.objects.filter(completed=True, deleted=False).order_by("-priority")
+@query_budget(5, constant=True)
+class GenericCompletedTaskView(
+    AtomicWritesMixin,
+    ReplicaReadsMixin,
+    TaskCounterMixin,
+    LoginRequiredMixin,
+    ListView,
+):
+    queryset = Task.objects.live().completed().order_by("-priority")
     template_name = "task/completed.html"
     context_object_name = "tasks"
     # * Pagination Feature using `paginator`
     paginate_by = 5
 
+    def get_landing_count(self, counts):
+        return counts["count_completed"]
+
     def get_queryset(self):
-        return Task.objects.filter(
-            completed=True, deleted=False, user=self.request.user
-        ).order_by("priority")
+        return Task.objects.live_for(self.request.user).completed().order_by("priority")
 
 
 class EmailTaskReportForm(ModelForm):
     class Meta:
         model = EmailTaskReport
         fields = ["send_time", "time_zone"]
+        # * Time Zone Picker: A text input suggesting zones from `/api/v1/time-zones/`,
+        # * instead of a ~600 option `<select>`
+        widgets = {
+            "time_zone": TextInput(
+                attrs={
+                    "list": "time-zone-options",
+                    "autocomplete": "off",
+                    "data-search-url": "/api/v1/time-zones/",
+                }
+            )
+        }
+
+    def clean_time_zone(self):
+        time_zone = self.cleaned_data["time_zone"]
+        validate_time_zone(time_zone)
+        return time_zone
 
     def clean(self):
+        if "send_time" not in self.cleaned_data or "time_zone" not in self.cleaned_data:
+            return self.cleaned_data
         # * Render Form: Convert UTC to Local
         send_time = self.cleaned_data["send_time"]
         time_zone = self.cleaned_data["time_zone"]
         send_time = send_time.replace(tzinfo=None)
-        local_time = timezone(time_zone).localize(send_time)
-        print({"send_time": send_time, "time_zone": time_zone})
-        send_time = local_time.astimezone(timezone("UTC"))
-        print("local_time:", self.cleaned_data["send_time"], "\nsend time:", send_time)
-        print("UTC:", datetime.utcnow())
+        local_time = send_time.replace(tzinfo=ZoneInfo(time_zone))
+        send_time = local_time.astimezone(ZoneInfo("UTC"))
+        logger.debug(
+            "Converted send time to UTC",
+            extra={"local_time": local_time, "send_time": send_time},
+        )
         return {"send_time": send_time, "time_zone": time_zone}
 
     def __init__(self, *args, **kwargs):
@@ -239,8 +564,11 @@ class EmailTaskReportForm(ModelForm):
         else:
             time_str = datetime.strptime(send_time, "%Y-%m-%d %H:%M:%S")
 
-        local_time = time_str.astimezone(timezone(self.instance.time_zone))
-        print(time_str, local_time)
+        local_time = time_str.astimezone(ZoneInfo(self.instance.time_zone))
+        logger.debug(
+            "Converted send time to local time",
+            extra={"send_time": time_str, "local_time": local_time},
+        )
         self.instance.send_time = str(local_time)
         # self.fields["send_time"] = local_time
         # print(utc_time, local_time)
@@ -251,7 +579,9 @@ class EmailTaskReportForm(ModelForm):
         super(EmailTaskReportForm, self).__init__(*args, **kwargs)
 
 
-class GenericEmailTaskReportUpdateView(LoginRequiredMixin, UpdateView):
+class GenericEmailTaskReportUpdateView(
+    AtomicWritesMixin, LoginRequiredMixin, UpdateView
+):
     form_class = EmailTaskReportForm
     template_name = "mail_settings.html"
     success_url = "/all-tasks"